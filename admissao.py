@@ -0,0 +1,125 @@
+"""Controle de admissão do servidor: limite de taxa por cliente e recusa de requisições quando a fila enche.
+
+As recusas são respostas HTTP curtas, dadas antes de decodificar o XML: 429 para o cliente que passou da sua
+taxa e 503 quando a fila de requisições à espera de uma thread está cheia, as duas com Retry-After. Uma
+requisição recusada não foi executada, então o cliente pode repeti-la com segurança depois da espera.
+"""
+
+import math
+import threading
+import time
+
+# Cabeçalho HTTP com a identificação do cliente. Como o próprio cliente o escolhe, ele só divide o balde do
+# endereço IP entre os clientes atrás do mesmo endereço (NAT); o endereço tem sempre o seu próprio balde.
+CABECALHO_CLIENTE = "X-Seega-Cliente"
+MULTIPLO_TAXA_ENDERECO = 10
+MAXIMO_CLIENTES = 10000
+
+class LimitadorTaxa:
+    """Um balde de fichas por cliente: `taxa` requisições por segundo em média, com rajadas de até `rajada`."""
+
+    def __init__(self, taxa, rajada):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.baldes = {}  # cliente -> [fichas, instante da última atualização]
+        self.lock = threading.Lock()
+        self.recusas = 0
+
+    def espera(self, cliente):
+        """Consome uma ficha do cliente. Retorna 0 se a requisição pode seguir ou os segundos até a próxima ficha."""
+        agora = time.monotonic()
+        with self.lock:
+            balde = self.baldes.get(cliente)
+            if balde is None:
+                if len(self.baldes) >= MAXIMO_CLIENTES:
+                    self._esquecer_cheios(agora)
+                balde = self.baldes[cliente] = [self.rajada, agora]
+            fichas = min(self.rajada, balde[0] + (agora - balde[1]) * self.taxa)
+            balde[1] = agora
+            if fichas >= 1:
+                balde[0] = fichas - 1
+                return 0.0
+            balde[0] = fichas
+            self.recusas += 1
+            return (1 - fichas) / self.taxa
+
+    def _esquecer_cheios(self, agora):
+        """Descarta os baldes que já se encheram de novo: recriá-los depois dá no mesmo."""
+        self.baldes = {cliente: balde for cliente, balde in self.baldes.items()
+                       if balde[0] + (agora - balde[1]) * self.taxa < self.rajada}
+
+class ControleAdmissao:
+    """Conta as requisições em andamento (em atendimento ou na fila do pool de `workers` threads) e recusa as
+    novas quando a fila chega a `fila_maxima`. Com `taxa` > 0, também limita a taxa de cada cliente (endereço
+    IP e cabeçalho X-Seega-Cliente) e a de cada endereço, somando todos os seus clientes, a `taxa_endereco`.
+
+    Nos dois modos, a unidade contada é a requisição: as conexões persistentes ociosas não contam.
+    """
+
+    def __init__(self, workers, fila_maxima, taxa=0.0, rajada=0, taxa_endereco=None):
+        self.workers = workers
+        self.fila_maxima = fila_maxima
+        self.em_andamento = 0
+        self.recusas_fila = 0
+        self.lock = threading.Lock()
+        self.limitador = LimitadorTaxa(taxa, rajada or max(1, int(2 * taxa))) if taxa > 0 else None
+        if taxa_endereco is None:
+            taxa_endereco = MULTIPLO_TAXA_ENDERECO * taxa
+        self.limitador_endereco = (LimitadorTaxa(taxa_endereco, max(1, int(2 * taxa_endereco)))
+                                   if taxa > 0 and taxa_endereco > 0 else None)
+
+    def limitar(self, endereco, cliente=None):
+        """Segundos que o cliente deve esperar antes de mandar a requisição (0 se ela pode seguir).
+
+        `endereco` é o IP de onde a conexão veio e `cliente`, o valor do cabeçalho X-Seega-Cliente, se houver.
+        """
+        if self.limitador_endereco:
+            espera = self.limitador_endereco.espera(endereco)
+            if espera:
+                return espera
+        return self.limitador.espera((endereco, cliente)) if self.limitador else 0.0
+
+    def entrar(self):
+        """Admite uma requisição, a menos que a fila esteja cheia. Toda entrada admitida pede um `sair`."""
+        with self.lock:
+            if self.em_andamento - self.workers >= self.fila_maxima:
+                self.recusas_fila += 1
+                return False
+            self.em_andamento += 1
+            return True
+
+    def sair(self):
+        with self.lock:
+            self.em_andamento -= 1
+
+    def fila(self):
+        return max(0, self.em_andamento - self.workers)
+
+    def espera_fila(self):
+        """Retry-After de uma recusa por fila cheia: um segundo para cada pool inteiro de requisições na fila."""
+        return 1 + self.fila() // self.workers
+
+    def nivel_carga(self):
+        """De 0 (threads sobrando) a 3 (fila pela metade ou mais), usado para espaçar as consultas de estado."""
+        ocupacao = self.em_andamento / self.workers
+        if ocupacao < 0.5:
+            return 0
+        if ocupacao <= 1:
+            return 1
+        return 2 if self.fila() < self.fila_maxima / 2 else 3
+
+    def estatisticas(self):
+        return {
+            "em_andamento": self.em_andamento,
+            "fila": self.fila(),
+            "fila_maxima": self.fila_maxima,
+            "nivel_carga": self.nivel_carga(),
+            "recusas_fila": self.recusas_fila,
+            "recusas_taxa": ((self.limitador.recusas if self.limitador else 0) +
+                             (self.limitador_endereco.recusas if self.limitador_endereco else 0)),
+            "clientes": len(self.limitador.baldes) if self.limitador else 0,
+        }
+
+def segundos_retry_after(segundos):
+    """Valor do cabeçalho Retry-After, que só aceita segundos inteiros."""
+    return str(max(1, math.ceil(segundos)))
@@ -0,0 +1,144 @@
+"""Consultas de regras com e sem o cache de formas canônicas (cache_regras.py), em rastros de partidas gravadas.
+
+Os rastros vêm de um diário de partidas (o --dados do servidor) ou, sem --dados, de partidas aleatórias
+jogadas e gravadas em um diário temporário, como em bench_diario.py. Cada partida é reaplicada registro a
+registro e, a cada ação da fase de movimentação, o rastro anota as consultas feitas naquela posição:
+existe_captura_com_movimento e jogador_esta_bloqueado do jogador da vez e, para um movimento,
+verificar_e_realizar_capturas na casa de chegada e pode_continuar_jogada_apos_captura depois das capturas.
+
+O rastro inteiro é reproduzido contra game_logic e contra cache_regras, com o cache vazio (frio) e de novo
+com o cache já preenchido (quente); por fim, as consultas de cada função são medidas separadas, sem cache e
+com o cache quente. Se a capacidade for menor que o número de posições distintas do rastro, a LRU descarta as
+entradas antes de elas voltarem e a rodada quente não acerta mais que a fria.
+
+Uso:
+    python benchmarks/bench_cache_regras.py --partidas 300 --saida cache.json
+    python benchmarks/bench_cache_regras.py --dados dados/ --capacidade 50000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_diario import jogar
+import cache_regras
+import diario
+import game_logic
+from partida import Partida
+
+def gravar_partidas(diretorio, partidas, semente):
+    registro = diario.Diario(diretorio)
+    with contextlib.redirect_stdout(io.StringIO()):
+        jogar(partidas, semente, registro)
+    registro.fechar()
+
+def rastro_do_diario(diretorio):
+    """Lista de (função, argumentos) com as consultas de regras de todas as partidas gravadas no diário."""
+    partidas, rastro = {}, []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for numero in diario.segmentos(diretorio):
+            for match_id, _, tipo, jogador, campos, texto in diario.ler_segmento(diario._caminho_segmento(diretorio, numero)):
+                if tipo == diario.CRIAR:
+                    partidas[match_id] = Partida(match_id, tamanho=campos[0] or game_logic.TABULEIRO_TAMANHO)
+                    continue
+                partida = partidas.get(match_id)
+                if partida is None or tipo in (diario.IA, diario.REMOVIDA):
+                    continue
+                if tipo in (diario.MOVER, diario.REMOVER) and partida.fase == "movimentacao":
+                    antes = [linha[:] for linha in partida.tabuleiro]
+                    rastro.append(("existe_captura_com_movimento", (antes, jogador)))
+                    rastro.append(("jogador_esta_bloqueado", (antes, jogador)))
+                    if tipo == diario.MOVER:
+                        lo, co, ld, cd = campos
+                        movido = [linha[:] for linha in antes]
+                        game_logic.realizar_movimento(movido, lo, co, ld, cd)
+                        rastro.append(("verificar_e_realizar_capturas", (movido, ld, cd, jogador)))
+                        depois = [linha[:] for linha in movido]
+                        game_logic.verificar_e_realizar_capturas(depois, ld, cd, jogador)
+                        rastro.append(("pode_continuar_jogada_apos_captura", (depois, ld, cd, jogador)))
+                diario.aplicar(partida, tipo, jogador, campos, texto)
+    return rastro
+
+def reproduzir(regras, rastro):
+    """Segundos para fazer todas as consultas do rastro com o motor `regras`."""
+    chamadas = []
+    for nome, argumentos in rastro:
+        if nome == "verificar_e_realizar_capturas":
+            # Essa consulta altera o tabuleiro; as cópias são feitas antes de começar a medir.
+            argumentos = ([linha[:] for linha in argumentos[0]],) + argumentos[1:]
+        chamadas.append((getattr(regras, nome), argumentos))
+    inicio = time.perf_counter()
+    for funcao, argumentos in chamadas:
+        funcao(*argumentos)
+    return time.perf_counter() - inicio
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dados", help="Diretório de um diário de partidas (o --dados do servidor).")
+    parser.add_argument("--partidas", type=int, default=300, help="Partidas aleatórias gravadas quando não há --dados.")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--capacidade", type=int, default=cache_regras.CAPACIDADE_PADRAO, help="Entradas de cada LRU.")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Rodadas sem cache e com o cache quente (vale a melhor).")
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    if args.dados:
+        rastro = rastro_do_diario(args.dados)
+    else:
+        with tempfile.TemporaryDirectory() as diretorio:
+            gravar_partidas(diretorio, args.partidas, args.semente)
+            rastro = rastro_do_diario(diretorio)
+
+    sem_cache = min(reproduzir(game_logic, rastro) for _ in range(args.repeticoes))
+    cache_regras.configurar(args.capacidade)
+    frio = reproduzir(cache_regras, rastro)
+    estatisticas_frio = cache_regras.estatisticas()
+    quente = min(reproduzir(cache_regras, rastro) for _ in range(args.repeticoes))
+    por_funcao = {}
+    for nome in dict.fromkeys(nome for nome, _ in rastro):
+        parte = [consulta for consulta in rastro if consulta[0] == nome]
+        por_funcao[nome] = {
+            "consultas": len(parte),
+            "sem_cache_us": min(reproduzir(game_logic, parte) for _ in range(args.repeticoes)) / len(parte) * 1e6,
+            "cache_quente_us": min(reproduzir(cache_regras, parte) for _ in range(args.repeticoes)) / len(parte) * 1e6,
+        }
+
+    consultas = len(rastro)
+    resultados = {
+        "consultas": consultas,
+        "sem_cache_us": sem_cache / consultas * 1e6,
+        "cache_frio_us": frio / consultas * 1e6,
+        "cache_quente_us": quente / consultas * 1e6,
+        "taxa_acerto_frio": estatisticas_frio["taxa_acerto"],
+        "taxa_acerto_formas_frio": estatisticas_frio["taxa_acerto_formas"],
+        "entradas": estatisticas_frio["entradas"],
+        "formas": estatisticas_frio["formas"],
+        "memoria_mb": estatisticas_frio["memoria_bytes"] / 2 ** 20,
+        "por_funcao": por_funcao,
+    }
+
+    print(f"{consultas} consultas em {args.partidas if not args.dados else 'todas as'} partidas gravadas, "
+          f"capacidade {args.capacidade}")
+    print(f"{'motor':>16} {'us/consulta':>12} {'consultas/s':>12} {'vs sem cache':>13}")
+    for nome, segundos in (("sem cache", sem_cache), ("cache frio", frio), ("cache quente", quente)):
+        print(f"{nome:>16} {segundos / consultas * 1e6:12.2f} {consultas / segundos:12.0f} {sem_cache / segundos:12.2f}x")
+    print(f"acertos com o cache frio: {resultados['taxa_acerto_frio']:.1%} dos resultados, "
+          f"{resultados['taxa_acerto_formas_frio']:.1%} das formas canônicas; {resultados['entradas']} resultados e "
+          f"{resultados['formas']} formas em {resultados['memoria_mb']:.1f} MB")
+    print(f"\n{'função':36} {'consultas':>9} {'sem cache us':>13} {'cache quente us':>16}")
+    for nome, dados in por_funcao.items():
+        print(f"{nome:36} {dados['consultas']:9d} {dados['sem_cache_us']:13.2f} {dados['cache_quente_us']:16.2f}")
+
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump(resultados, arquivo, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Custo do diário de partidas (diario.py): tempo extra por ação gravada e tempo de recuperação.
+
+Joga partidas aleatórias diretamente sobre `Partida`, com e sem diário, e compara o tempo por ação.
+Depois mede a restauração das mesmas partidas só pelo diário (reaplicando todas as ações) e por um
+snapshot seguido de um diário vazio.
+
+Uso:
+    python benchmarks/bench_diario.py --partidas 500 --saida diario.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import diario
+from partida import Partida
+
+def jogar(partidas, semente, registro=None, max_acoes=400):
+    """Joga partidas aleatórias até o fim. Retorna (partidas, ações aceitas, segundos gastos nas ações)."""
+    rnd = random.Random(semente)
+    criadas, acoes, tempo = [], 0, 0.0
+    for match_id in range(1, partidas + 1):
+        partida = Partida(match_id)
+        if registro:
+            registro.registrar(match_id, 0, diario.CRIAR)
+            partida.diario = registro
+        partida.register_player()
+        partida.register_player()
+        for _ in range(max_acoes):
+            if partida.vencedor is not None:
+                break
+            jogador = partida.jogador_atual
+            legais = partida.get_legal_moves(jogador)
+            if legais["colocacoes"]:
+                metodo, argumentos = partida.place_piece, rnd.choice(legais["colocacoes"])
+            elif legais["remocoes"]:
+                metodo, argumentos = partida.remove_piece_when_blocked, rnd.choice(legais["remocoes"])
+            elif legais["movimentos"]:
+                metodo, argumentos = partida.move_piece, rnd.choice(legais["movimentos"])[:4]
+            else:
+                break
+            inicio = time.perf_counter()
+            metodo(jogador, *argumentos)
+            tempo += time.perf_counter() - inicio
+            acoes += 1
+        criadas.append(partida)
+    return criadas, acoes, tempo
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--partidas", type=int, default=500)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        jogar(args.partidas, args.semente)
+        _, acoes, sem_diario = jogar(args.partidas, args.semente)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        registro = diario.Diario(diretorio)
+        with contextlib.redirect_stdout(io.StringIO()):
+            partidas, acoes_diario, com_diario = jogar(args.partidas, args.semente, registro)
+        segmento = registro.rotacionar()
+        registro.fechar()
+        bytes_diario = registro.bytes_gravados
+
+        def restaurar():
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                restauradas, _, _, reaplicados = diario.restaurar(
+                    diretorio, criar_partida=lambda match_id, tamanho: Partida(match_id, tamanho=tamanho), importar_partida=lambda match_id, dados: Partida.importar(dados))
+            return time.perf_counter() - inicio, restauradas, reaplicados
+
+        so_diario, restauradas, reaplicados = restaurar()
+        iguais = all(restauradas[p.match_id].exportar()["tabuleiro"] == p.tabuleiro for p in partidas)
+
+        inicio = time.perf_counter()
+        diario.gravar_snapshot(diretorio, {"segmento": segmento, "maior_id": args.partidas, "ias": {},
+                                           "partidas": [partida.exportar() for partida in partidas]})
+        gravacao_snapshot = time.perf_counter() - inicio
+        tamanho_snapshot = os.path.getsize(os.path.join(diretorio, diario.ARQUIVO_SNAPSHOT))
+        com_snapshot, _, _ = restaurar()
+
+    resultado = {
+        "partidas": args.partidas,
+        "acoes": acoes,
+        "us_por_acao_sem_diario": sem_diario / acoes * 1e6,
+        "us_por_acao_com_diario": com_diario / acoes_diario * 1e6,
+        "bytes_por_acao": bytes_diario / acoes_diario,
+        "restauracao_so_diario_s": so_diario,
+        "acoes_reaplicadas": reaplicados,
+        "restauracao_com_snapshot_s": com_snapshot,
+        "gravacao_snapshot_s": gravacao_snapshot,
+        "tamanho_snapshot_bytes": tamanho_snapshot,
+        "restauracao_correta": iguais,
+    }
+
+    print(f"{args.partidas} partidas, {acoes} ações")
+    print(f"tempo por ação: {resultado['us_por_acao_sem_diario']:.1f} us sem diário, "
+          f"{resultado['us_por_acao_com_diario']:.1f} us com diário "
+          f"(+{resultado['us_por_acao_com_diario'] - resultado['us_por_acao_sem_diario']:.1f} us), "
+          f"{resultado['bytes_por_acao']:.1f} bytes por ação")
+    print(f"restauração só pelo diário: {so_diario:.3f} s ({reaplicados} ações, "
+          f"{reaplicados / so_diario:.0f} ações/s){'' if iguais else ' — ESTADO DIFERENTE!'}")
+    print(f"restauração pelo snapshot: {com_snapshot:.3f} s (snapshot de {tamanho_snapshot / 1024:.0f} KB "
+          f"gravado em {gravacao_snapshot:.3f} s)")
+
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump(resultado, arquivo, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Espectadores (watch_match) contra a latência dos jogadores.
+
+Sobe o server.py e roda os mesmos jogadores simulados de carga.py em três cenários: sem espectadores, com
+espectadores que consultam get_state em intervalos fixos (o que havia antes, ocupando a vaga do jogador 1) e
+com espectadores em watch_match. Compara a latência das jogadas e o CPU do servidor em cada um.
+
+Antes, mede no próprio processo o custo de montar a resposta XML de get_state a cada chamada contra o
+estado dos espectadores, codificado uma vez por versão.
+
+Uso:
+    python benchmarks/bench_espectadores.py --jogadores 16 --espectadores 200 --duracao 10 --saida espectadores.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import timeit
+import xmlrpc.client
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from carga import _processo_clientes, esperar_servidor, percentil, uso_processo
+from partida import Partida
+from servidores import dumps_resposta
+
+METODOS_JOGADA = ("place_piece", "move_piece", "remove_piece_when_blocked")
+
+def custo_resposta(repeticoes=5000):
+    """Microssegundos para gerar a resposta XML do estado: get_state a cada chamada e watch_match já codificado."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        partida = Partida(1)
+        partida.register_player()
+        partida.register_player()
+        for linha, coluna in ((0, 0), (0, 1), (4, 4), (4, 3), (1, 0), (3, 4)):
+            partida.place_piece(partida.jogador_atual, linha, coluna)
+
+    def resposta(valor):
+        return dumps_resposta((valor,))
+
+    return {
+        "get_state_us": timeit.timeit(lambda: resposta(partida.get_state(1)), number=repeticoes) / repeticoes * 1e6,
+        "watch_match_us": timeit.timeit(lambda: resposta(partida.watch_match(-1, 0)), number=repeticoes) / repeticoes * 1e6,
+    }
+
+def _espectador(url, modo, ate, intervalo_poll, rnd, contagem):
+    proxy = xmlrpc.client.ServerProxy(url, allow_none=True)
+    match_id, versao = None, -1
+    while time.time() < ate:
+        try:
+            if match_id is None:
+                partidas = [p["match_id"] for p in proxy.list_matches() if p["vencedor"] is None]
+                if not partidas:
+                    time.sleep(0.2)
+                    continue
+                match_id, versao = rnd.choice(partidas), -1
+            if modo == "watch_match":
+                estado = proxy.watch_match(match_id, versao, 5)
+                versao = estado["versao"]
+                if estado.get("ocupado"):
+                    time.sleep(1.0)
+            else:
+                estado = proxy.get_state(match_id, 1)
+                time.sleep(intervalo_poll)
+            contagem[0] += 1
+            if estado.get("vencedor"):
+                match_id = None
+        except (xmlrpc.client.Fault, OSError, xmlrpc.client.ProtocolError):
+            # Contado à parte: uma recusa (429/503) ou erro não pode passar por resposta recebida.
+            contagem[1] += 1
+            match_id = None
+            time.sleep(0.2)
+
+def _processo_espectadores(url, quantidade, modo, semente, intervalo_poll, ate, fila):
+    contagens = [[0, 0] for _ in range(quantidade)]  # respostas, erros
+    threads = [threading.Thread(target=_espectador, args=(url, modo, ate, intervalo_poll, random.Random(semente + i), contagens[i]))
+               for i in range(quantidade)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    fila.put((sum(contagem[0] for contagem in contagens), sum(contagem[1] for contagem in contagens)))
+
+def divisao(total, partes):
+    return [total // partes + (i < total % partes) for i in range(partes)]
+
+def cenario(args, modo):
+    """Roda jogadores e, se `modo` não for None, espectadores. Retorna latências das jogadas e CPU do servidor."""
+    url = f"http://127.0.0.1:{args.porta}"
+    # Todos os clientes saem do mesmo endereço, então o limite de taxa fica desligado.
+    servidor = subprocess.Popen([sys.executable, os.path.join(RAIZ, "server.py"), "--porta", str(args.porta),
+                                 "--porta-binaria", "0", "--porta-admin", "0", "--taxa-por-cliente", "0",
+                                 "--workers", str(args.workers), "--modo", args.modo],
+                                stdout=subprocess.DEVNULL, cwd=RAIZ)
+    try:
+        esperar_servidor(url)
+        cpu_inicio, _ = uso_processo(servidor.pid)
+        inicio = time.time()
+        ate = inicio + args.duracao
+        fila_jogadores, fila_espectadores = multiprocessing.Queue(), multiprocessing.Queue()
+        processos = [multiprocessing.Process(target=_processo_clientes,
+                                             args=(url, args.jogadores, args.semente, args.intervalo_poll, ate, False, fila_jogadores))]
+        if modo:
+            processos += [multiprocessing.Process(target=_processo_espectadores,
+                                                  args=(url, n, modo, args.semente + 1000 * i, args.intervalo_poll, ate, fila_espectadores))
+                          for i, n in enumerate(divisao(args.espectadores, args.processos)) if n]
+        for processo in processos:
+            processo.start()
+        latencias, _, jogadas = fila_jogadores.get()
+        parciais = [fila_espectadores.get() for _ in processos[1:]]
+        respostas_espectadores = sum(respostas for respostas, _ in parciais)
+        erros_espectadores = sum(erros for _, erros in parciais)
+        for processo in processos:
+            processo.join()
+        duracao = time.time() - inicio
+        cpu_fim, _ = uso_processo(servidor.pid)
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+    jogadas_lat = [valor for metodo in METODOS_JOGADA for valor in latencias.get(metodo, [])]
+    return {
+        "espectadores": modo or "nenhum",
+        "jogadas": jogadas,
+        "jogadas_por_segundo": len(jogadas_lat) / duracao,
+        "jogada_p50_ms": percentil(jogadas_lat, 50) * 1000 if jogadas_lat else None,
+        "jogada_p99_ms": percentil(jogadas_lat, 99) * 1000 if jogadas_lat else None,
+        "respostas_espectadores_por_segundo": respostas_espectadores / duracao,
+        "erros_espectadores": erros_espectadores,
+        "cpu_servidor": (cpu_fim - cpu_inicio) / duracao if cpu_fim is not None and cpu_inicio is not None else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jogadores", type=int, default=16)
+    parser.add_argument("--espectadores", type=int, default=200)
+    parser.add_argument("--processos", type=int, default=2, help="Processos que dividem os espectadores.")
+    parser.add_argument("--duracao", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--modo", default="async", help="Modo do servidor; no modo threads cada conexão ocupa uma thread.")
+    parser.add_argument("--intervalo-poll", type=float, default=0.05)
+    parser.add_argument("--porta", type=int, default=56755)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    custo = custo_resposta()
+    print(f"resposta XML do estado: get_state {custo['get_state_us']:.1f} us por chamada, "
+          f"watch_match {custo['watch_match_us']:.1f} us (codificado uma vez por versão)")
+
+    cenarios = [cenario(args, modo) for modo in (None, "get_state", "watch_match")]
+    print(f"\n{args.jogadores} jogadores, {args.espectadores} espectadores, modo {args.modo}, {args.workers} workers, "
+          f"{args.duracao:.0f} s")
+    print(f"{'espectadores':>12} {'jogadas/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'respostas esp./s':>17} {'erros esp.':>11} {'CPU':>6}")
+    for dados in cenarios:
+        print(f"{dados['espectadores']:>12} {dados['jogadas_por_segundo']:10.1f} {dados['jogada_p50_ms']:8.2f} "
+              f"{dados['jogada_p99_ms']:8.2f} {dados['respostas_espectadores_por_segundo']:17.0f} "
+              f"{dados['erros_espectadores']:11d} {dados['cpu_servidor']:6.0%}")
+
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump({"custo_resposta": custo, "cenarios": cenarios}, arquivo, indent=2)
+
+if __name__ == "__main__":
+    main()
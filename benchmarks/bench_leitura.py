@@ -0,0 +1,123 @@
+"""Latência das leituras de estado (get_state) com a partida recebendo jogadas sem parar.
+
+Roda no próprio processo, sem rede: threads escritoras jogam partidas aleatórias em uma mesma `Partida`
+enquanto threads leitoras pedem o estado e montam a resposta XML, como o servidor faz a cada poll. Compara
+duas leituras:
+- `lock`: a leitura de antes, que toma o lock da partida, monta o estado apontando para o tabuleiro vivo e
+  codifica a resposta depois de soltar o lock (disputando o lock com as escritas);
+- `publicado`: o `get_state` atual, que lê o estado imutável publicado pela última escrita, sem lock, e
+  reaproveita a resposta já codificada.
+
+Uso:
+    python benchmarks/bench_leitura.py --leitores 8 --escritores 2 --duracao 5 --saida leitura.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carga import percentil
+from partida import Partida
+from servidores import dumps_resposta
+
+def leitura_com_lock(partida, player_id):
+    """A leitura anterior: o estado é montado com o lock, mas referencia o tabuleiro que as escritas alteram."""
+    with partida.lock:
+        erro = partida.mensagens_erro.pop(player_id, None)
+        return {
+            "versao": partida.versao,
+            "tabuleiro": partida.tabuleiro,
+            "jogador_atual": partida.jogador_atual,
+            "fase": partida.fase,
+            "vencedor": partida.vencedor,
+            "chat_seq": partida.chat_seq,
+            "seu_turno": partida.jogador_atual == player_id,
+            "error": erro,
+            "modo_remocao": partida.modo_remocao.get(player_id, False),
+        }
+
+def leitura_publicada(partida, player_id):
+    return partida.get_state(player_id)
+
+def escritor(partida, rnd, ate, contagem):
+    """Joga lances aleatórios na partida (pelos dois lados) e recomeça quando ela termina."""
+    while time.perf_counter() < ate:
+        if partida.vencedor is not None:
+            partida.reset_game()
+            partida.register_player()
+            partida.register_player()
+            continue
+        jogador = partida.jogador_atual
+        legais = partida.get_legal_moves(jogador)
+        if legais["colocacoes"]:
+            partida.place_piece(jogador, *rnd.choice(legais["colocacoes"]))
+        elif legais["remocoes"]:
+            partida.remove_piece_when_blocked(jogador, *rnd.choice(legais["remocoes"]))
+        elif legais["movimentos"]:
+            partida.move_piece(jogador, *rnd.choice(legais["movimentos"])[:4])
+        else:
+            partida.surrender(jogador)
+        contagem[0] += 1
+
+def leitor(partida, ler, player_id, ate, latencias):
+    while time.perf_counter() < ate:
+        inicio = time.perf_counter()
+        dumps_resposta((ler(partida, player_id),))
+        latencias.append(time.perf_counter() - inicio)
+
+def medir(ler, args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        partida = Partida(1)
+        partida.register_player()
+        partida.register_player()
+        ate = time.perf_counter() + args.duracao
+        contagens = [[0] for _ in range(args.escritores)]
+        latencias = [[] for _ in range(args.leitores)]
+        threads = [threading.Thread(target=escritor, args=(partida, random.Random(args.semente + i), ate, contagens[i]))
+                   for i in range(args.escritores)]
+        threads += [threading.Thread(target=leitor, args=(partida, ler, 1 + i % 2, ate, latencias[i]))
+                    for i in range(args.leitores)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    todas = [valor for lista in latencias for valor in lista]
+    return {
+        "leituras_por_segundo": len(todas) / args.duracao,
+        "escritas_por_segundo": sum(contagem[0] for contagem in contagens) / args.duracao,
+        "p50_us": percentil(todas, 50) * 1e6,
+        "p99_us": percentil(todas, 99) * 1e6,
+        "max_us": max(todas) * 1e6,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leitores", type=int, default=8)
+    parser.add_argument("--escritores", type=int, default=2)
+    parser.add_argument("--duracao", type=float, default=5.0)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    resultados = {"lock": medir(leitura_com_lock, args), "publicado": medir(leitura_publicada, args)}
+
+    print(f"{args.leitores} leitores, {args.escritores} escritores, {args.duracao:.0f} s")
+    print(f"{'leitura':>10} {'leituras/s':>11} {'escritas/s':>11} {'p50 us':>8} {'p99 us':>8} {'máx. us':>9}")
+    for nome, dados in resultados.items():
+        print(f"{nome:>10} {dados['leituras_por_segundo']:11.0f} {dados['escritas_por_segundo']:11.0f} "
+              f"{dados['p50_us']:8.1f} {dados['p99_us']:8.1f} {dados['max_us']:9.0f}")
+
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump({"leitores": args.leitores, "escritores": args.escritores, "resultados": resultados}, arquivo, indent=2)
+
+if __name__ == "__main__":
+    main()
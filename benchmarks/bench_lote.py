@@ -0,0 +1,80 @@
+"""Compara a avaliação em lote (lote.py) com as funções escalares de game_logic.py.
+
+Uso: python benchmarks/bench_lote.py [--quantidade 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import game_logic
+import lote
+
+def _cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+def _escalar_mascaras(tabuleiro, jogador):
+    mascara = np.zeros((5, 5, 4), dtype=bool)
+    legais = game_logic.movimentos_legais({"tabuleiro": tabuleiro}, jogador)
+    for (lo, co, ld, cd) in legais["movimentos"]:
+        direcao = [(-1, 0), (1, 0), (0, -1), (0, 1)].index((ld - lo, cd - co))
+        mascara[lo, co, direcao] = True
+    return mascara
+
+def _escalar_capturas(tabuleiro, jogador, movimento):
+    copia = [linha[:] for linha in tabuleiro]
+    game_logic.realizar_movimento(copia, *movimento)
+    capturou = game_logic.verificar_e_realizar_capturas(copia, movimento[2], movimento[3], jogador)
+    return copia, capturou
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quantidade", type=int, default=100_000)
+    parser.add_argument("--jogador", type=int, default=1)
+    args = parser.parse_args()
+
+    tabuleiros = lote.tabuleiros_aleatorios(args.quantidade)
+    listas = tabuleiros.tolist()
+    jogador = args.jogador
+
+    rng = np.random.default_rng(1)
+    origens = rng.integers(0, 5, (args.quantidade, 2))
+    direcoes = lote.DIRECOES[rng.integers(0, 4, args.quantidade)]
+    destinos = np.clip(origens + direcoes, 0, 4)
+    movimentos = np.concatenate([origens, destinos], axis=1)
+    movimentos_lista = movimentos.tolist()
+
+    casos = [
+        ("verificar_vitoria", lambda: lote.vitorias(tabuleiros, jogador),
+         lambda: [game_logic.verificar_vitoria(t, jogador) for t in listas]),
+        ("jogador_esta_bloqueado", lambda: lote.bloqueados(tabuleiros, jogador),
+         lambda: [game_logic.jogador_esta_bloqueado(t, jogador) for t in listas]),
+        ("existe_captura_com_movimento", lambda: lote.existe_captura(tabuleiros, jogador),
+         lambda: [game_logic.existe_captura_com_movimento(t, jogador) for t in listas]),
+        ("movimentos_legais", lambda: lote.mascaras_movimentos(tabuleiros, jogador),
+         lambda: [_escalar_mascaras(t, jogador) for t in listas]),
+        ("verificar_e_realizar_capturas", lambda: lote.realizar_movimentos_com_captura(tabuleiros, jogador, movimentos),
+         lambda: [_escalar_capturas(t, jogador, m) for t, m in zip(listas, movimentos_lista)]),
+    ]
+
+    print(f"{'função':32} {'escalar (s)':>12} {'lote (s)':>10} {'aceleração':>11}  confere")
+    for nome, em_lote, escalar in casos:
+        resultado_lote, tempo_lote = _cronometrar(em_lote)
+        resultado_escalar, tempo_escalar = _cronometrar(escalar)
+        if nome == "verificar_e_realizar_capturas":
+            novos, _, capturou = resultado_lote
+            confere = (np.array_equal(novos, np.array([r[0] for r in resultado_escalar], dtype=np.int8)) and
+                       np.array_equal(capturou, np.array([r[1] for r in resultado_escalar])))
+        else:
+            confere = np.array_equal(np.asarray(resultado_lote), np.array(resultado_escalar))
+        print(f"{nome:32} {tempo_escalar:12.3f} {tempo_lote:10.3f} {tempo_escalar / tempo_lote:10.1f}x  {'sim' if confere else 'NÃO'}")
+
+if __name__ == "__main__":
+    main()
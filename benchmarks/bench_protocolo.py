@@ -0,0 +1,146 @@
+"""Compara o XML-RPC com o protocolo binário (protocolo_binario.py): bytes por chamada e latência.
+
+Sobe o server.py localmente, monta uma partida no meio da colocação com algumas mensagens de chat e mede:
+- o tamanho da requisição e da resposta de cada método nos dois protocolos (no XML-RPC, só o corpo, sem
+  os cabeçalhos HTTP, o que favorece o XML);
+- a latência de chamadas em sequência pela mesma conexão e a vazão do binário com pipelining;
+- o tempo de decodificação da resposta de get_state no cliente.
+
+Uso:
+    python benchmarks/bench_protocolo.py --chamadas 2000 --saida protocolo.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import timeit
+import xmlrpc.client
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from carga import esperar_servidor, percentil
+from protocolo_binario import CABECALHO, ClienteBinario, codificar, decodificar, montar_requisicao
+
+def preparar_partida(proxy):
+    """Cria uma partida com dois jogadores, oito peças colocadas e algumas mensagens de chat."""
+    match_id = proxy.create_match()
+    proxy.join_match(match_id)
+    proxy.join_match(match_id)
+    for _ in range(8):
+        estado = proxy.get_state(match_id, 1)
+        jogador = estado["jogador_atual"]
+        linha, coluna = proxy.get_legal_moves(match_id, jogador)["colocacoes"][0]
+        proxy.place_piece(match_id, jogador, linha, coluna)
+    for i in range(5):
+        proxy.send_chat_message(match_id, 1 + i % 2, f"mensagem de teste {i}")
+    return match_id
+
+def chamadas(match_id):
+    return [
+        ("get_state", (match_id, 1)),
+        ("wait_state", (match_id, 1, -1, 0)),
+        ("get_legal_moves", (match_id, 1)),
+        ("get_chat", (match_id, 1, 0, 20)),
+        ("place_piece", (match_id, 2, 0, 0)),
+    ]
+
+def tamanhos(proxy, match_id):
+    """Bytes de requisição e resposta de cada método em cada protocolo."""
+    resultado = {}
+    for metodo, argumentos in chamadas(match_id):
+        resposta = getattr(proxy, metodo)(*argumentos)
+        xml_req = len(xmlrpc.client.dumps(argumentos, metodo, allow_none=True).encode())
+        xml_resp = len(xmlrpc.client.dumps((resposta,), methodresponse=True, allow_none=True).encode())
+        bin_req = len(montar_requisicao(1, metodo, argumentos))
+        bin_resp = CABECALHO.size + len(codificar(resposta))
+        resultado[metodo] = {"xml_requisicao": xml_req, "xml_resposta": xml_resp,
+                             "binario_requisicao": bin_req, "binario_resposta": bin_resp}
+    return resultado
+
+def latencias_sequenciais(chamar, match_id, quantidade):
+    valores = []
+    for _ in range(quantidade):
+        inicio = time.perf_counter()
+        chamar("get_state", match_id, 1)
+        valores.append(time.perf_counter() - inicio)
+    return valores
+
+def resumo_latencias(valores):
+    return {"media_ms": sum(valores) / len(valores) * 1000, "p50_ms": percentil(valores, 50) * 1000,
+            "p99_ms": percentil(valores, 99) * 1000, "chamadas_por_segundo": len(valores) / sum(valores)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chamadas", type=int, default=2000)
+    parser.add_argument("--porta", type=int, default=56655)
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.porta}"
+    # As chamadas em sequência passam da taxa de um cliente, então o limite de taxa fica desligado, e a fila
+    # aceita todas as chamadas do pipelining de uma vez.
+    servidor = subprocess.Popen([sys.executable, os.path.join(RAIZ, "server.py"), "--porta", str(args.porta),
+                                 "--porta-binaria", str(args.porta + 1), "--porta-admin", "0", "--taxa-por-cliente", "0",
+                                 "--fila-maxima", str(args.chamadas)],
+                                stdout=subprocess.DEVNULL, cwd=RAIZ)
+    try:
+        esperar_servidor(url)
+        proxy = xmlrpc.client.ServerProxy(url, allow_none=True)
+        binario = ClienteBinario(("127.0.0.1", args.porta + 1))
+        match_id = preparar_partida(proxy)
+        bytes_por_metodo = tamanhos(proxy, match_id)
+
+        def chamar_xml(metodo, *argumentos):
+            return getattr(proxy, metodo)(*argumentos)
+
+        latencias_sequenciais(chamar_xml, match_id, 100)
+        latencias_sequenciais(binario.chamar, match_id, 100)
+        xml = resumo_latencias(latencias_sequenciais(chamar_xml, match_id, args.chamadas))
+        sequencial = resumo_latencias(latencias_sequenciais(binario.chamar, match_id, args.chamadas))
+
+        inicio = time.perf_counter()
+        futuros = [binario.chamar_assincrono("get_state", match_id, 1) for _ in range(args.chamadas)]
+        for futuro in futuros:
+            futuro.result()
+        pipeline = args.chamadas / (time.perf_counter() - inicio)
+
+        estado = proxy.get_state(match_id, 1)
+        corpo_xml = xmlrpc.client.dumps((estado,), methodresponse=True, allow_none=True).encode()
+        corpo_binario = bytes(codificar(estado))
+        repeticoes = 5000
+        decodificacao = {
+            "xml_us": timeit.timeit(lambda: xmlrpc.client.loads(corpo_xml), number=repeticoes) / repeticoes * 1e6,
+            "binario_us": timeit.timeit(lambda: decodificar(corpo_binario), number=repeticoes) / repeticoes * 1e6,
+        }
+        binario.close()
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+    resultado = {"bytes": bytes_por_metodo, "xml": xml, "binario": sequencial,
+                 "binario_pipeline_chamadas_por_segundo": pipeline, "decodificacao_get_state": decodificacao}
+
+    print(f"{'método':18} {'XML req':>8} {'XML resp':>9} {'bin req':>8} {'bin resp':>9} {'redução':>8}")
+    for metodo, dados in bytes_por_metodo.items():
+        xml_total = dados["xml_requisicao"] + dados["xml_resposta"]
+        bin_total = dados["binario_requisicao"] + dados["binario_resposta"]
+        print(f"{metodo:18} {dados['xml_requisicao']:8d} {dados['xml_resposta']:9d} {dados['binario_requisicao']:8d} "
+              f"{dados['binario_resposta']:9d} {xml_total / bin_total:7.1f}x")
+    print(f"\nget_state em sequência ({args.chamadas} chamadas):")
+    for nome, dados in (("XML-RPC", xml), ("binário", sequencial)):
+        print(f"  {nome:8} média {dados['media_ms']:.3f} ms  p50 {dados['p50_ms']:.3f} ms  p99 {dados['p99_ms']:.3f} ms  "
+              f"{dados['chamadas_por_segundo']:.0f} chamadas/s")
+    print(f"  binário com pipelining: {pipeline:.0f} chamadas/s")
+    print(f"decodificação de get_state no cliente: XML {decodificacao['xml_us']:.1f} us, "
+          f"binário {decodificacao['binario_us']:.1f} us")
+
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump(resultado, arquivo, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Micro-benchmarks de cada função de regras em posições de início, meio e fim de jogo.
+
+Uso:
+    python benchmarks/bench_regras.py --saida regras.json
+    python benchmarks/bench_regras.py --motor bitboard --comparar regras.json
+    python benchmarks/bench_regras.py --tamanho 9 --comparar regras.json   # custo no 9x9 contra o 5x5
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import game_logic
+from posicoes import posicoes_representativas
+
+# "lista" é o game_logic, usado pelo servidor; bitboard e cache são medidos nas funções que oferecem.
+MOTORES = {
+    "lista": "game_logic",
+    "bitboard": "bitboard",
+    "cache": "cache_regras",
+}
+
+def _casos(regras, estado):
+    """Chamadas representativas de cada função pública de game_logic que o motor oferece, para um estado."""
+    tabuleiro = estado.tabuleiro()
+    jogador = estado.jogador
+    estado_regras = {"tabuleiro": tabuleiro, "jogador_peca_central": estado.jogador_centro,
+                     "turnos_peca_central": estado.turnos_centro}
+    movimentos = list(game_logic.movimentos_legais(estado_regras, jogador)["movimentos"]) or [(0, 0, 0, 1)]
+    lo, co, ld, cd = movimentos[0]
+    tamanho = len(tabuleiro)
+    pecas = [(l, c) for l in range(tamanho) for c in range(tamanho) if tabuleiro[l][c] == jogador] or [(0, 0)]
+    l, c = pecas[0]
+
+    def copia():
+        return [linha[:] for linha in tabuleiro]
+
+    casos = {
+        "criar_tabuleiro": lambda: regras.criar_tabuleiro(tamanho),
+        "eh_casa_central": lambda: regras.eh_casa_central(l, c, tamanho),
+        "proximo_jogador": lambda: regras.proximo_jogador(jogador),
+        "eh_movimento_valido": lambda: regras.eh_movimento_valido(tabuleiro, lo, co, ld, cd, jogador),
+        "realizar_movimento": lambda: regras.realizar_movimento(copia(), lo, co, ld, cd),
+        "verificar_e_realizar_capturas": lambda: regras.verificar_e_realizar_capturas(copia(), ld, cd, jogador),
+        "verificar_vitoria": lambda: regras.verificar_vitoria(tabuleiro, jogador),
+        "existe_captura_possivel": lambda: regras.existe_captura_possivel(tabuleiro, jogador),
+        "pode_continuar_jogada_apos_captura": lambda: regras.pode_continuar_jogada_apos_captura(tabuleiro, l, c, jogador),
+        "existe_captura_com_movimento": lambda: regras.existe_captura_com_movimento(tabuleiro, jogador),
+        "jogador_esta_bloqueado": lambda: regras.jogador_esta_bloqueado(tabuleiro, jogador),
+        "peca_central_bloqueada": lambda: regras.peca_central_bloqueada(tabuleiro, jogador),
+        "peca_esta_bloqueada": lambda: regras.peca_esta_bloqueada(tabuleiro, l, c),
+        "movimentos_legais": lambda: regras.movimentos_legais(estado_regras, jogador),
+    }
+    return {nome: caso for nome, caso in casos.items() if hasattr(regras, nome)}
+
+def medir(regras, posicoes, repeticoes=5, chamadas=200):
+    """Retorna {fase: {função: nanossegundos por chamada}}, usando a melhor de `repeticoes` rodadas."""
+    resultados = {}
+    for fase, estados in posicoes.items():
+        casos_por_estado = [_casos(regras, estado) for estado in estados]
+        resultados[fase] = {}
+        for nome in casos_por_estado[0]:
+            funcoes = [casos[nome] for casos in casos_por_estado]
+
+            def rodada():
+                for funcao in funcoes:
+                    funcao()
+
+            melhor = min(timeit.repeat(rodada, number=max(1, chamadas // len(funcoes)), repeat=repeticoes))
+            resultados[fase][nome] = melhor / (max(1, chamadas // len(funcoes)) * len(funcoes)) * 1e9
+    return resultados
+
+def revisao_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--motor", choices=sorted(MOTORES), default="lista", help="Motor de regras a medir.")
+    parser.add_argument("--posicoes", type=int, default=20, help="Posições por fase de jogo.")
+    parser.add_argument("--tamanho", type=int, default=5, help="Lado do tabuleiro das posições (5, 7 ou 9).")
+    parser.add_argument("--saida", help="Arquivo JSON onde gravar os resultados.")
+    parser.add_argument("--comparar", help="Arquivo JSON de uma execução anterior para comparar.")
+    args = parser.parse_args()
+
+    regras = importlib.import_module(MOTORES[args.motor])
+    resultados = medir(regras, posicoes_representativas(args.posicoes, tamanho=args.tamanho))
+    anterior = None
+    if args.comparar:
+        with open(args.comparar) as arquivo:
+            dados = json.load(arquivo)
+        anterior = dados["resultados"]
+        if dados.get("tamanho", 5) != args.tamanho:
+            print(f"(comparando o tabuleiro {args.tamanho}x{args.tamanho} com o {dados.get('tamanho', 5)}x{dados.get('tamanho', 5)})")
+
+    for fase, funcoes in resultados.items():
+        print(f"\n== {fase} ==")
+        for nome, ns in funcoes.items():
+            linha = f"{nome:36} {ns:10.0f} ns"
+            if anterior and nome in anterior.get(fase, {}):
+                linha += f"   {anterior[fase][nome] / ns:6.2f}x vs anterior"
+            print(linha)
+
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump({"revisao": revisao_git(), "motor": args.motor, "tamanho": args.tamanho,
+                       "python": platform.python_version(), "resultados": resultados}, arquivo, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Escalonamento do gateway (gateway.py): jogadas por segundo com 1, 2, 4, ... processos do servidor.
+
+Para cada número de processos, sobe o gateway e roda os clientes simulados de carga.py contra ele pelo
+tempo pedido. Como referência, roda também os mesmos clientes direto contra um único server.py.
+
+Uso:
+    python benchmarks/bench_shards.py --processos 1 2 4 8 --clientes 64 --duracao 15 --saida shards.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from carga import _processo_clientes, esperar_servidor, percentil
+
+def rodar_clientes(url, args):
+    """Roda os clientes simulados por `args.duracao` segundos. Retorna (jogadas, requisições, latências, duração)."""
+    inicio = time.time()
+    ate = inicio + args.duracao
+    fila = multiprocessing.Queue()
+    por_processo = [args.clientes // args.geradores + (i < args.clientes % args.geradores) for i in range(args.geradores)]
+    processos = [multiprocessing.Process(target=_processo_clientes,
+                                         args=(url, n, args.semente + 1000 * i, args.intervalo_poll, ate, False, fila))
+                 for i, n in enumerate(por_processo) if n]
+    for processo in processos:
+        processo.start()
+    latencias, jogadas = [], 0
+    requisicoes = 0
+    for _ in processos:
+        parcial, _, jogadas_parcial = fila.get()
+        jogadas += jogadas_parcial
+        for valores in parcial.values():
+            latencias += valores
+            requisicoes += len(valores)
+    for processo in processos:
+        processo.join()
+    return jogadas, requisicoes, latencias, time.time() - inicio
+
+def medir(comando, url, args, nome):
+    servidor = subprocess.Popen(comando, stdout=subprocess.DEVNULL, cwd=RAIZ)
+    try:
+        esperar_servidor(url, limite=30.0)
+        jogadas, requisicoes, latencias, duracao = rodar_clientes(url, args)
+    finally:
+        servidor.terminate()
+        servidor.wait()
+    return {
+        "configuracao": nome,
+        "jogadas_por_segundo": jogadas / duracao,
+        "requisicoes_por_segundo": requisicoes / duracao,
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processos", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clientes", type=int, default=64)
+    parser.add_argument("--geradores", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Processos geradores de carga (os clientes são divididos entre eles).")
+    parser.add_argument("--duracao", type=float, default=15.0)
+    parser.add_argument("--intervalo-poll", type=float, default=0.05)
+    parser.add_argument("--porta", type=int, default=56855)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.porta}"
+    resultados = [medir([sys.executable, os.path.join(RAIZ, "server.py"), "--porta", str(args.porta),
+                         "--porta-binaria", "0", "--porta-admin", "0", "--taxa-por-cliente", "0",
+                         "--modo", "async", "--workers", "64"], url, args, "direto")]
+    for processos in args.processos:
+        resultados.append(medir([sys.executable, os.path.join(RAIZ, "gateway.py"), "--porta", str(args.porta),
+                                 "--porta-base", str(args.porta + 1), "--porta-admin", "0", "--taxa-por-cliente", "0",
+                                 "--processos", str(processos)],
+                                url, args, f"gateway {processos}"))
+
+    base = resultados[1]["jogadas_por_segundo"] if len(resultados) > 1 else None
+    print(f"{args.clientes} clientes, {args.duracao:.0f} s, {os.cpu_count()} núcleo(s)")
+    print(f"{'configuração':>12} {'jogadas/s':>10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'aceleração':>11}")
+    for dados in resultados:
+        aceleracao = dados["jogadas_por_segundo"] / base if base and dados["configuracao"] != "direto" else None
+        print(f"{dados['configuracao']:>12} {dados['jogadas_por_segundo']:10.1f} {dados['requisicoes_por_segundo']:8.0f} "
+              f"{dados['p50_ms']:8.2f} {dados['p99_ms']:8.2f} " + (f"{aceleracao:10.2f}x" if aceleracao else f"{'-':>11}"))
+
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump({"clientes": args.clientes, "nucleos": os.cpu_count(), "resultados": resultados}, arquivo, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Gerador de carga: sobe o server.py localmente e simula N clientes jogando de verdade.
+
+Cada cliente segue a sequência do cliente gráfico (register_player, get_state, place_piece,
+move_piece, remove_piece_when_blocked) escolhendo jogadas legais a partir do tabuleiro recebido.
+Relata requisições por segundo, latência p50/p95/p99 por método e CPU e memória do processo servidor.
+
+Com --seguir-dicas, os clientes se comportam como o cliente gráfico diante do controle de admissão: espaçam as
+consultas de estado pelo `proximo_poll_ms` sugerido e, quando recusados (429 ou 503), esperam o Retry-After.
+
+Uso:
+    python benchmarks/carga.py --clientes 64 --duracao 20 --modo threads --saida carga.json
+    python benchmarks/carga.py --clientes 256 --seguir-dicas -- --modo async --workers 16
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import xmlrpc.client
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from admissao import CABECALHO_CLIENTE
+import game_logic
+
+RECUSAS_DO_SERVIDOR = (429, 503)
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+class ClienteSimulado:
+    def __init__(self, url, rnd, intervalo_poll, latencias, ate, em_lote=False, seguir_dicas=False):
+        # Cada cliente simulado tem a sua identificação, como cada cliente gráfico, para o limite de taxa.
+        self.proxy = xmlrpc.client.ServerProxy(url, allow_none=True, headers=[(CABECALHO_CLIENTE, uuid.uuid4().hex)])
+        self.rnd = rnd
+        self.intervalo_poll = intervalo_poll
+        self.latencias = latencias
+        self.ate = ate
+        self.em_lote = em_lote
+        self.seguir_dicas = seguir_dicas
+        self.erros = 0
+        self.jogadas = 0
+
+    def _espera_pedida(self, erro):
+        """Com --seguir-dicas, os segundos do Retry-After de uma recusa do servidor (0 para os demais erros)."""
+        if self.seguir_dicas and isinstance(erro, xmlrpc.client.ProtocolError) and erro.errcode in RECUSAS_DO_SERVIDOR:
+            return float(erro.headers.get("Retry-After", 1))
+        return 0.0
+
+    def chamar(self, metodo, *args):
+        inicio = time.perf_counter()
+        resposta, espera = None, 0.0
+        try:
+            resposta = getattr(self.proxy, metodo)(*args)
+        except (xmlrpc.client.Fault, OSError, xmlrpc.client.ProtocolError) as e:
+            self.erros += 1
+            espera = self._espera_pedida(e)
+        self.latencias.setdefault(metodo, []).append(time.perf_counter() - inicio)
+        time.sleep(espera)
+        return resposta
+
+    def chamar_com_estado(self, jogada, match_id, player_id):
+        """Envia a jogada e o pedido de estado em uma única requisição (system.multicall)."""
+        multicall = xmlrpc.client.MultiCall(self.proxy)
+        getattr(multicall, jogada[0])(match_id, player_id, *jogada[1:])
+        multicall.get_state(match_id, player_id)
+        inicio = time.perf_counter()
+        resposta, espera = None, 0.0
+        try:
+            resposta = tuple(multicall())[1]
+        except (xmlrpc.client.Fault, OSError, xmlrpc.client.ProtocolError) as e:
+            self.erros += 1
+            espera = self._espera_pedida(e)
+        self.latencias.setdefault("system.multicall", []).append(time.perf_counter() - inicio)
+        time.sleep(espera)
+        return resposta
+
+    def escolher_jogada(self, estado, player_id):
+        tabuleiro = estado["tabuleiro"]
+        if estado["fase"] == "colocacao":
+            vazias = [(l, c) for l in range(5) for c in range(5)
+                      if tabuleiro[l][c] == 0 and not game_logic.eh_casa_central(l, c)]
+            if self.em_lote:
+                # Sempre se coloca em pares, então o turno começa sem peças colocadas.
+                return ("place_pieces", self.rnd.sample(vazias, 2)) if len(vazias) >= 2 else None
+            return ("place_piece",) + self.rnd.choice(vazias) if vazias else None
+        if estado["modo_remocao"]:
+            adversarias = [(l, c) for l in range(5) for c in range(5) if tabuleiro[l][c] == 3 - player_id]
+            return ("remove_piece_when_blocked",) + self.rnd.choice(adversarias) if adversarias else None
+        legais = game_logic.movimentos_legais({"tabuleiro": tabuleiro}, player_id)
+        if not legais["movimentos"]:
+            return ("move_piece", 0, 0, 0, 1)
+        return ("move_piece",) + self.rnd.choice(list(legais["movimentos"]))
+
+    def executar(self):
+        while time.time() < self.ate:
+            registro = self.chamar("register_player")
+            if not registro:
+                time.sleep(0.5)
+                continue
+            match_id, player_id = registro
+            estado = None
+            while time.time() < self.ate:
+                if estado is None:
+                    estado = self.chamar("get_state", match_id, player_id)
+                if estado is None or estado["vencedor"]:
+                    break
+                if estado["seu_turno"]:
+                    jogada = self.escolher_jogada(estado, player_id)
+                    self.jogadas += 1
+                    if jogada and self.em_lote:
+                        estado = self.chamar_com_estado(jogada, match_id, player_id)
+                        continue
+                    if jogada:
+                        self.chamar(jogada[0], match_id, player_id, *jogada[1:])
+                elif self.seguir_dicas:
+                    time.sleep(max(self.intervalo_poll, estado.get("proximo_poll_ms", 0) / 1000))
+                else:
+                    time.sleep(self.intervalo_poll)
+                estado = None
+
+def _processo_clientes(url, clientes, semente, intervalo_poll, ate, em_lote, fila, seguir_dicas=False):
+    """Roda um grupo de clientes em threads e devolve as latências pela fila."""
+    latencias_por_cliente = [{} for _ in range(clientes)]
+    simulados = [ClienteSimulado(url, random.Random(semente + i), intervalo_poll, latencias_por_cliente[i], ate, em_lote,
+                                 seguir_dicas)
+                 for i in range(clientes)]
+    threads = [threading.Thread(target=cliente.executar) for cliente in simulados]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    juntas = {}
+    for latencias in latencias_por_cliente:
+        for metodo, valores in latencias.items():
+            juntas.setdefault(metodo, []).extend(valores)
+    fila.put((juntas, sum(cliente.erros for cliente in simulados), sum(cliente.jogadas for cliente in simulados)))
+
+def uso_processo(pid):
+    """Tempo de CPU (s) e memória residente (MB) de um processo, lidos de /proc (Linux)."""
+    try:
+        with open(f"/proc/{pid}/stat") as arquivo:
+            campos = arquivo.read().rsplit(")", 1)[1].split()
+        cpu = (int(campos[11]) + int(campos[12])) / os.sysconf("SC_CLK_TCK")
+        with open(f"/proc/{pid}/status") as arquivo:
+            rss = next(int(linha.split()[1]) for linha in arquivo if linha.startswith("VmRSS:")) / 1024
+        return cpu, rss
+    except (OSError, StopIteration):
+        return None, None
+
+def esperar_servidor(url, limite=10.0):
+    proxy = xmlrpc.client.ServerProxy(url)
+    fim = time.time() + limite
+    while time.time() < fim:
+        try:
+            proxy.system.listMethods()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("O servidor não respondeu a tempo.")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clientes", type=int, default=32)
+    parser.add_argument("--processos", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Processos geradores de carga (os clientes são divididos entre eles).")
+    parser.add_argument("--duracao", type=float, default=15.0)
+    parser.add_argument("--porta", type=int, default=56555)
+    parser.add_argument("--intervalo-poll", type=float, default=0.05)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--em-lote", action="store_true",
+                        help="Clientes colocam as duas peças com place_pieces e recebem o estado na mesma requisição (multicall).")
+    parser.add_argument("--seguir-dicas", action="store_true",
+                        help="Clientes seguem o proximo_poll_ms do estado e o Retry-After das recusas (429/503).")
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados.")
+    parser.add_argument("argumentos_servidor", nargs=argparse.REMAINDER,
+                        help="Argumentos extras repassados ao server.py (ex.: -- --modo async --workers 64).")
+    args = parser.parse_args()
+    extras = [a for a in args.argumentos_servidor if a != "--"]
+
+    url = f"http://127.0.0.1:{args.porta}"
+    # Todos os clientes saem do mesmo endereço, então o limite de taxa fica desligado; para medi-lo, passe
+    # `-- --taxa-por-cliente 50` (os argumentos extras vêm depois e valem no lugar destes).
+    servidor = subprocess.Popen([sys.executable, os.path.join(RAIZ, "server.py"), "--porta", str(args.porta),
+                                 "--porta-binaria", str(args.porta + 1), "--porta-admin", "0",
+                                 "--taxa-por-cliente", "0"] + extras,
+                                stdout=subprocess.DEVNULL, cwd=RAIZ)
+    try:
+        esperar_servidor(url)
+        cpu_inicio, _ = uso_processo(servidor.pid)
+        inicio = time.time()
+        ate = inicio + args.duracao
+        fila = multiprocessing.Queue()
+        por_processo = [args.clientes // args.processos + (i < args.clientes % args.processos) for i in range(args.processos)]
+        processos = [multiprocessing.Process(target=_processo_clientes,
+                                             args=(url, n, args.semente + 1000 * i, args.intervalo_poll, ate, args.em_lote, fila,
+                                                   args.seguir_dicas))
+                     for i, n in enumerate(por_processo) if n]
+        for processo in processos:
+            processo.start()
+        latencias, erros, jogadas = {}, 0, 0
+        for _ in processos:
+            parcial, erros_parcial, jogadas_parcial = fila.get()
+            erros += erros_parcial
+            jogadas += jogadas_parcial
+            for metodo, valores in parcial.items():
+                latencias.setdefault(metodo, []).extend(valores)
+        for processo in processos:
+            processo.join()
+        duracao = time.time() - inicio
+        cpu_fim, rss = uso_processo(servidor.pid)
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+    total = sum(len(v) for v in latencias.values())
+    resultado = {
+        "clientes": args.clientes,
+        "duracao": duracao,
+        "argumentos_servidor": extras,
+        "requisicoes": total,
+        "requisicoes_por_segundo": total / duracao,
+        "erros": erros,
+        "jogadas": jogadas,
+        "requisicoes_por_jogada": total / jogadas if jogadas else None,
+        "cpu_servidor_s": (cpu_fim - cpu_inicio) if cpu_fim is not None and cpu_inicio is not None else None,
+        "memoria_servidor_mb": rss,
+        "metodos": {
+            metodo: {
+                "chamadas": len(valores),
+                "p50_ms": percentil(valores, 50) * 1000,
+                "p95_ms": percentil(valores, 95) * 1000,
+                "p99_ms": percentil(valores, 99) * 1000,
+            }
+            for metodo, valores in sorted(latencias.items())
+        },
+    }
+
+    print(f"{total} requisições em {duracao:.1f} s: {resultado['requisicoes_por_segundo']:.0f} req/s, {erros} erros")
+    if jogadas:
+        print(f"{jogadas} jogadas, {resultado['requisicoes_por_jogada']:.2f} requisições por jogada")
+    if resultado["cpu_servidor_s"] is not None:
+        print(f"servidor: {resultado['cpu_servidor_s']:.1f} s de CPU ({resultado['cpu_servidor_s'] / duracao:.0%}), "
+              f"{rss:.1f} MB residentes")
+    print(f"{'método':28} {'chamadas':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for metodo, dados in resultado["metodos"].items():
+        print(f"{metodo:28} {dados['chamadas']:9d} {dados['p50_ms']:8.2f} {dados['p95_ms']:8.2f} {dados['p99_ms']:8.2f}")
+
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump(resultado, arquivo, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Posições representativas de início, meio e fim de jogo, geradas de forma determinística por autojogo."""
+
+import contextlib
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_logic import TABULEIRO_TAMANHO, geometria
+from partida import Partida
+from simulacao import EstadoSeega, MOVER
+
+class Posicao:
+    """Posição em lista de listas com a mesma interface de `EstadoSeega` usada pelos benchmarks."""
+
+    __slots__ = ("_tabuleiro", "jogador", "jogador_centro", "turnos_centro")
+
+    def __init__(self, partida):
+        self._tabuleiro = [linha[:] for linha in partida.tabuleiro]
+        self.jogador = partida.jogador_atual
+        self.jogador_centro = partida.jogador_peca_central
+        self.turnos_centro = partida.turnos_peca_central
+
+    def tabuleiro(self):
+        return [linha[:] for linha in self._tabuleiro]
+
+def _gulosa(rnd, jogadas):
+    capturas = [j for j in jogadas if j[0] == MOVER and j[3]]
+    return rnd.choice(capturas or jogadas)
+
+def _faixas(tamanho):
+    """Número de peças de cada fase: início logo após a colocação, meio com 7/12 a 3/4 delas e fim com até 1/3."""
+    total = 2 * geometria(tamanho).pecas_por_jogador
+    return {"inicio": (total, total), "meio": (round(total * 7 / 12), round(total * 3 / 4)), "fim": (2, total // 3)}
+
+def _guardar(posicoes, faixas, pecas, rnd, quantidade, estado):
+    for nome, (minimo, maximo) in faixas.items():
+        if minimo <= pecas <= maximo and len(posicoes[nome]) < quantidade and rnd.random() < 0.3:
+            posicoes[nome].append(estado)
+            return
+
+def posicoes_representativas(quantidade=20, semente=0, tamanho=TABULEIRO_TAMANHO):
+    """Retorna {"inicio": [...], "meio": [...], "fim": [...]} com estados da fase de movimentação.
+
+    No 5x5 são `EstadoSeega` (início: 24 peças; meio: 14 a 18; fim: 8 ou menos); nos tabuleiros maiores,
+    `Posicao` jogadas sobre `Partida`, com as faixas proporcionais ao número de peças.
+    """
+    if tamanho != TABULEIRO_TAMANHO:
+        return _posicoes_partida(quantidade, semente, tamanho)
+    rnd = random.Random(semente)
+    faixas = _faixas(tamanho)
+    posicoes = {nome: [] for nome in faixas}
+    while any(len(lista) < quantidade for lista in posicoes.values()):
+        estado = EstadoSeega()
+        for _ in range(600):
+            if estado.vencedor is not None:
+                break
+            jogadas = estado.jogadas()
+            if not jogadas:
+                break
+            if estado.fase == "movimentacao":
+                _guardar(posicoes, faixas, bin(estado.b1).count("1") + bin(estado.b2).count("1"), rnd, quantidade, estado)
+            estado = estado.aplicar(_gulosa(rnd, jogadas))
+    return posicoes
+
+def _posicoes_partida(quantidade, semente, tamanho):
+    rnd = random.Random(semente)
+    faixas = _faixas(tamanho)
+    posicoes = {nome: [] for nome in faixas}
+    limite_acoes = 600 * tamanho * tamanho // 25
+    while any(len(lista) < quantidade for lista in posicoes.values()):
+        with contextlib.redirect_stdout(io.StringIO()):
+            partida = Partida(0, tamanho=tamanho)
+            partida.register_player()
+            partida.register_player()
+        for _ in range(limite_acoes):
+            if partida.vencedor is not None:
+                break
+            jogador = partida.jogador_atual
+            legais = partida.get_legal_moves(jogador)
+            if legais["colocacoes"]:
+                partida.place_piece(jogador, *rnd.choice(legais["colocacoes"]))
+                continue
+            _guardar(posicoes, faixas, sum(valor != 0 for linha in partida.tabuleiro for valor in linha),
+                     rnd, quantidade, Posicao(partida))
+            if legais["remocoes"]:
+                partida.remove_piece_when_blocked(jogador, *rnd.choice(legais["remocoes"]))
+            elif legais["movimentos"]:
+                capturas = [m for m in legais["movimentos"] if m[4]]
+                partida.move_piece(jogador, *rnd.choice(capturas or legais["movimentos"])[:4])
+            else:
+                break
+    return posicoes
@@ -0,0 +1,262 @@
+"""Motor de regras do Seega com bitboards.
+
+Cada jogador é representado por um inteiro de n*n bits (bit `linha * n + coluna`; 25 bits no tabuleiro 5x5).
+As funções com os mesmos nomes de `game_logic.py` aceitam o tabuleiro em lista de listas, de qualquer tamanho,
+e dão os mesmos resultados, o que serve para conferir e medir as versões `*_bits`; estas trabalham direto nos
+inteiros, com as máscaras `m` do tamanho do tabuleiro (5x5 se omitidas).
+"""
+
+from game_logic import TABULEIRO_TAMANHO, criar_tabuleiro, eh_casa_central
+
+DIRECOES = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+def bit(linha, coluna, n=TABULEIRO_TAMANHO):
+    return 1 << (linha * n + coluna)
+
+class Mascaras:
+    """Máscaras e tabelas de um tamanho de tabuleiro (bit `linha * n + coluna`), calculadas uma vez por tamanho."""
+
+    def __init__(self, n):
+        self.n = n
+        self.casas = n * n
+        self.cheio = (1 << self.casas) - 1
+        self.meio = n // 2
+        self.indice_centro = self.meio * n + self.meio
+        self.centro = 1 << self.indice_centro
+        self.sem_centro = self.cheio & ~self.centro
+        self.coluna_esquerda = sum(1 << (linha * n) for linha in range(n))
+        self.coluna_direita = self.coluna_esquerda << (n - 1)
+        self.vizinhos = self._gerar_vizinhos()
+        self.pares_captura = self._gerar_pares_captura()
+
+    def dentro(self, linha, coluna):
+        return 0 <= linha < self.n and 0 <= coluna < self.n
+
+    def _gerar_vizinhos(self):
+        vizinhos = []
+        for indice in range(self.casas):
+            linha, coluna = divmod(indice, self.n)
+            mascara = 0
+            for dl, dc in DIRECOES:
+                if self.dentro(linha + dl, coluna + dc):
+                    mascara |= bit(linha + dl, coluna + dc, self.n)
+            vizinhos.append(mascara)
+        return vizinhos
+
+    def _gerar_pares_captura(self):
+        """Para cada casa de chegada, os pares (casa adjacente, casa oposta) que formam um sanduíche.
+
+        A casa central nunca é capturada, então pares cuja casa adjacente é o centro são descartados.
+        """
+        pares = []
+        for indice in range(self.casas):
+            linha, coluna = divmod(indice, self.n)
+            da_casa = []
+            for dl, dc in DIRECOES:
+                l_adj, c_adj = linha + dl, coluna + dc
+                l_oposto, c_oposto = linha + 2 * dl, coluna + 2 * dc
+                if (self.dentro(l_adj, c_adj) and self.dentro(l_oposto, c_oposto) and
+                        not eh_casa_central(l_adj, c_adj, self.n)):
+                    da_casa.append((bit(l_adj, c_adj, self.n), bit(l_oposto, c_oposto, self.n)))
+            pares.append(tuple(da_casa))
+        return pares
+
+_MASCARAS = {}
+
+def mascaras(n):
+    """Máscaras do tamanho de tabuleiro, criadas na primeira vez que ele é usado."""
+    resultado = _MASCARAS.get(n)
+    if resultado is None:
+        resultado = _MASCARAS[n] = Mascaras(n)
+    return resultado
+
+# O tabuleiro padrão (5x5), usado pela simulação, pela IA e pela tablebase.
+PADRAO = mascaras(TABULEIRO_TAMANHO)
+N = PADRAO.n
+CASAS = PADRAO.casas
+CHEIO = PADRAO.cheio
+MEIO = PADRAO.meio
+INDICE_CENTRO = PADRAO.indice_centro
+CENTRO = PADRAO.centro
+SEM_CENTRO = PADRAO.sem_centro
+COLUNA_ESQUERDA = PADRAO.coluna_esquerda
+COLUNA_DIREITA = PADRAO.coluna_direita
+VIZINHOS = PADRAO.vizinhos
+PARES_CAPTURA = PADRAO.pares_captura
+
+def para_cima(b, m=PADRAO):
+    return b >> m.n
+
+def para_baixo(b, m=PADRAO):
+    return (b << m.n) & m.cheio
+
+def para_esquerda(b, m=PADRAO):
+    return (b & ~m.coluna_esquerda) >> 1
+
+def para_direita(b, m=PADRAO):
+    return (b & ~m.coluna_direita) << 1
+
+def dilatar(b, m=PADRAO):
+    """Casas ortogonalmente vizinhas de alguma casa de `b`."""
+    return para_cima(b, m) | para_baixo(b, m) | para_esquerda(b, m) | para_direita(b, m)
+
+def iterar_bits(b):
+    """Índices das casas ocupadas em `b`, do menor para o maior."""
+    while b:
+        menor = b & -b
+        yield menor.bit_length() - 1
+        b ^= menor
+
+def para_bitboards(tabuleiro):
+    """Converte o tabuleiro em lista de listas para o par (peças do jogador 1, peças do jogador 2)."""
+    b1 = b2 = 0
+    indice = 0
+    for linha in tabuleiro:
+        for valor in linha:
+            if valor == 1:
+                b1 |= 1 << indice
+            elif valor == 2:
+                b2 |= 1 << indice
+            indice += 1
+    return b1, b2
+
+def para_tabuleiro(b1, b2, m=PADRAO):
+    """Converte um par de bitboards de volta para lista de listas."""
+    tabuleiro = criar_tabuleiro(m.n)
+    for indice in iterar_bits(b1):
+        tabuleiro[indice // m.n][indice % m.n] = 1
+    for indice in iterar_bits(b2):
+        tabuleiro[indice // m.n][indice % m.n] = 2
+    return tabuleiro
+
+def _do_jogador(tabuleiro, jogador):
+    """Retorna (peças do jogador, peças do adversário, máscaras do tamanho do tabuleiro)."""
+    b1, b2 = para_bitboards(tabuleiro)
+    m = mascaras(len(tabuleiro))
+    return (b1, b2, m) if jogador == 1 else (b2, b1, m)
+
+def capturas_bits(destino, proprias, adversarias, m=PADRAO):
+    """Peças adversárias capturadas por uma peça que chega em `destino` (índice)."""
+    capturadas = 0
+    for adjacente, oposta in m.pares_captura[destino]:
+        if adversarias & adjacente and proprias & oposta:
+            capturadas |= adjacente
+    return capturadas
+
+def alvos_captura_bits(proprias, adversarias, m=PADRAO):
+    """Casas onde uma peça que chegue capturaria algo (sanduíche adversária + própria em alguma direção)."""
+    capturaveis = adversarias & m.sem_centro
+    return (
+        (para_baixo(capturaveis, m) & para_baixo(para_baixo(proprias, m), m)) |
+        (para_cima(capturaveis, m) & para_cima(para_cima(proprias, m), m)) |
+        (para_direita(capturaveis, m) & para_direita(para_direita(proprias, m), m)) |
+        (para_esquerda(capturaveis, m) & para_esquerda(para_esquerda(proprias, m), m))
+    )
+
+def existe_captura_bits(proprias, adversarias, m=PADRAO):
+    vazias = m.cheio & ~(proprias | adversarias)
+    return bool(vazias & dilatar(proprias, m) & alvos_captura_bits(proprias, adversarias, m))
+
+def pode_continuar_bits(origem, proprias, adversarias, m=PADRAO):
+    if not proprias >> origem & 1:
+        return False
+    vazias = m.cheio & ~(proprias | adversarias)
+    return bool(m.vizinhos[origem] & vazias & alvos_captura_bits(proprias, adversarias, m))
+
+def bloqueado_bits(proprias, adversarias, m=PADRAO):
+    vazias = m.cheio & ~(proprias | adversarias)
+    return not dilatar(proprias, m) & vazias
+
+def movimentos_bits(proprias, adversarias, m=PADRAO):
+    """Gera os movimentos simples (origem, destino) do jogador, em índices de casa."""
+    vazias = m.cheio & ~(proprias | adversarias)
+    vizinhos = m.vizinhos
+    for origem in iterar_bits(proprias & dilatar(vazias, m)):
+        for destino in iterar_bits(vizinhos[origem] & vazias):
+            yield origem, destino
+
+# Mesma interface de game_logic.py, sobre o tabuleiro em lista de listas (de qualquer tamanho).
+
+def eh_movimento_valido(tabuleiro, linha_origem, coluna_origem, linha_destino, coluna_destino, jogador_atual):
+    m = mascaras(len(tabuleiro))
+    if not (m.dentro(linha_origem, coluna_origem) and m.dentro(linha_destino, coluna_destino)):
+        return False
+    if tabuleiro[linha_origem][coluna_origem] != jogador_atual:
+        return False
+    if tabuleiro[linha_destino][coluna_destino] != 0:
+        return False
+    return bool(m.vizinhos[linha_origem * m.n + coluna_origem] & bit(linha_destino, coluna_destino, m.n))
+
+def verificar_e_realizar_capturas(tabuleiro, linha, coluna, jogador_atual):
+    proprias, adversarias, m = _do_jogador(tabuleiro, jogador_atual)
+    capturadas = capturas_bits(linha * m.n + coluna, proprias, adversarias, m)
+    for indice in iterar_bits(capturadas):
+        tabuleiro[indice // m.n][indice % m.n] = 0
+    return bool(capturadas)
+
+def verificar_vitoria(tabuleiro, jogador_atual):
+    _, adversarias, _ = _do_jogador(tabuleiro, jogador_atual)
+    return adversarias == 0
+
+def existe_captura_possivel(tabuleiro, jogador_atual):
+    return existe_captura_bits(*_do_jogador(tabuleiro, jogador_atual))
+
+def pode_continuar_jogada_apos_captura(tabuleiro, linha, coluna, jogador_atual):
+    proprias, adversarias, m = _do_jogador(tabuleiro, jogador_atual)
+    return pode_continuar_bits(linha * m.n + coluna, proprias, adversarias, m)
+
+def existe_captura_com_movimento(tabuleiro, jogador_id):
+    return existe_captura_bits(*_do_jogador(tabuleiro, jogador_id))
+
+def jogador_esta_bloqueado(tabuleiro, jogador_id):
+    return bloqueado_bits(*_do_jogador(tabuleiro, jogador_id))
+
+def peca_central_bloqueada(tabuleiro, jogador_id):
+    m = mascaras(len(tabuleiro))
+    if tabuleiro[m.meio][m.meio] != jogador_id:
+        return False
+    b1, b2 = para_bitboards(tabuleiro)
+    return not m.vizinhos[m.indice_centro] & ~(b1 | b2)
+
+def peca_esta_bloqueada(tabuleiro, linha, coluna):
+    """Verifica se uma peça específica em uma dada posição não tem movimentos legais."""
+    m = mascaras(len(tabuleiro))
+    b1, b2 = para_bitboards(tabuleiro)
+    return not m.vizinhos[linha * m.n + coluna] & ~(b1 | b2)
+
+def movimentos_legais_bits(proprias, adversarias, regra_central, m=PADRAO):
+    """Versão em bits de `movimentos_legais`: retorna (remocao, restricao, {(origem, destino): capturadas}).
+
+    `regra_central` indica se a regra dos 3 turnos está ativa para o jogador; casas são índices e capturas, máscaras.
+    """
+    movimentos = {}
+    ha_captura = False
+    for origem, destino in movimentos_bits(proprias, adversarias, m):
+        capturadas = capturas_bits(destino, proprias, adversarias, m)
+        movimentos[(origem, destino)] = capturadas
+        ha_captura = ha_captura or bool(capturadas)
+
+    if not movimentos:
+        return "bloqueado", None, {}
+    if regra_central:
+        do_centro = {mov: c for mov, c in movimentos.items() if mov[0] == m.indice_centro}
+        return (None if do_centro else "centro_bloqueado"), "centro", do_centro
+    if ha_captura:
+        return None, "captura", {mov: c for mov, c in movimentos.items() if c}
+    return None, None, movimentos
+
+def movimentos_legais(estado, jogador_id):
+    """Mesma interface de `game_logic.movimentos_legais`."""
+    proprias, adversarias, m = _do_jogador(estado["tabuleiro"], jogador_id)
+    regra_central = (proprias & m.centro and estado.get("jogador_peca_central") == jogador_id and
+                     estado.get("turnos_peca_central", 0) >= 3)
+    remocao, restricao, movimentos = movimentos_legais_bits(proprias, adversarias, regra_central, m)
+    return {
+        "remocao": remocao,
+        "remocoes": [divmod(indice, m.n) for indice in iterar_bits(adversarias)] if remocao else [],
+        "restricao": restricao,
+        "movimentos": {
+            divmod(origem, m.n) + divmod(destino, m.n): [divmod(indice, m.n) for indice in iterar_bits(capturadas)]
+            for (origem, destino), capturadas in movimentos.items()
+        },
+    }
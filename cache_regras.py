@@ -0,0 +1,234 @@
+"""Experimento de consultas de regras com cache: as consultas de captura e de bloqueio de `game_logic.py` passam
+por uma LRU de tamanho limitado, indexada pela forma canônica do tabuleiro sob as 8 simetrias do quadrado.
+
+As funções têm a mesma assinatura e os mesmos resultados das de `game_logic.py`, mas o módulo não é um motor
+completo e nada no jogo o usa (servidor, IAs, tablebase ou torneios): em partidas reais as posições pouco se
+repetem e o cache fica mais lento que as consultas diretas. Só `benchmarks/bench_cache_regras.py` o mede. O tabuleiro é visto do jogador consultado (1 = peças dele, 2 = do
+adversário), guardado em bytes (uma casa por byte) e levado à menor das suas 8 imagens, de modo que posições
+simétricas e as mesmas posições com as cores trocadas dividem a entrada. As casas dos resultados são guardadas
+na orientação canônica e voltam para a de quem chamou.
+
+Achar a forma canônica custa tanto quanto as consultas mais caras, então uma segunda LRU guarda a forma
+canônica (e a simetria usada) de cada tabuleiro exato já visto.
+"""
+
+from collections import OrderedDict
+from itertools import chain
+from operator import itemgetter
+import sys
+import threading
+
+import game_logic
+from game_logic import geometria
+
+CAPACIDADE_PADRAO = 100_000  # por LRU; cerca de 200 bytes por entrada
+
+# Consultas guardadas na LRU de resultados (primeiro item da chave).
+CAPTURA, BLOQUEADO, CONTINUA, CAPTURAS = range(4)
+
+# Tabuleiro visto do jogador consultado: as peças dele viram 1 e as do adversário, 2.
+_RELATIVO = {1: bytes(range(256)), 2: bytes.maketrans(b"\x01\x02", b"\x02\x01")}
+
+class LRU:
+    """Dicionário limitado a `capacidade` itens, que descarta o usado há mais tempo. Os valores nunca são None."""
+
+    def __init__(self, capacidade):
+        self.capacidade = capacidade
+        self.itens = OrderedDict()
+        self.lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.descartes = 0
+
+    def obter(self, chave):
+        with self.lock:
+            valor = self.itens.get(chave)
+            if valor is None:
+                self.faltas += 1
+            else:
+                self.itens.move_to_end(chave)
+                self.acertos += 1
+            return valor
+
+    def guardar(self, chave, valor):
+        with self.lock:
+            self.itens[chave] = valor
+            if len(self.itens) > self.capacidade:
+                self.itens.popitem(last=False)
+                self.descartes += 1
+
+    def limpar(self):
+        with self.lock:
+            self.itens.clear()
+            self.acertos = self.faltas = self.descartes = 0
+
+    def taxa_acerto(self):
+        consultas = self.acertos + self.faltas
+        return self.acertos / consultas if consultas else 0.0
+
+def _tamanho(objeto, vistos):
+    """Bytes de um objeto e das tuplas e bytes dentro dele, contando uma vez só os que aparecem mais de uma vez."""
+    if id(objeto) in vistos or isinstance(objeto, (bool, int)) and -5 <= objeto <= 256:
+        return 0  # inteiros pequenos e booleanos são compartilhados pelo interpretador
+    vistos.add(id(objeto))
+    total = sys.getsizeof(objeto)
+    if isinstance(objeto, tuple):
+        total += sum(_tamanho(item, vistos) for item in objeto)
+    return total
+
+class Simetrias:
+    """Para um tamanho de tabuleiro, as 8 imagens de um tabuleiro em bytes e a troca de índices entre as orientações.
+
+    A imagem pela simetria `s` tem na casa `i` o valor da casa `permutacoes[s][i]` do original.
+    """
+
+    def __init__(self, tamanho):
+        permutacoes = geometria(tamanho).simetrias
+        self.tamanho = tamanho
+        self.imagens = [itemgetter(*permutacao) for permutacao in permutacoes]
+        # da_canonica[s][i]: casa (linha, coluna) do original que foi para o índice i da imagem.
+        self.da_canonica = [tuple(divmod(indice, tamanho) for indice in permutacao) for permutacao in permutacoes]
+        # para_canonica[s][indice original]: índice na imagem.
+        self.para_canonica = []
+        for permutacao in permutacoes:
+            inversa = [0] * len(permutacao)
+            for i, indice in enumerate(permutacao):
+                inversa[indice] = i
+            self.para_canonica.append(tuple(inversa))
+
+_SIMETRIAS = {}
+
+def simetrias(tamanho):
+    tabelas = _SIMETRIAS.get(tamanho)
+    if tabelas is None:
+        tabelas = _SIMETRIAS[tamanho] = Simetrias(tamanho)
+    return tabelas
+
+class CacheRegras:
+    """As duas LRUs (formas canônicas e resultados) e as consultas que passam por elas."""
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO):
+        self.formas = LRU(capacidade)
+        self.resultados = LRU(capacidade)
+
+    def _forma(self, tabuleiro, jogador):
+        """(forma canônica em bytes, simetria que leva o tabuleiro a ela), ou None para um jogador que não é 1 nem 2."""
+        relativo = _RELATIVO.get(jogador)
+        if relativo is None:
+            return None
+        exata = bytes(chain.from_iterable(tabuleiro)).translate(relativo)
+        forma = self.formas.obter(exata)
+        if forma is None:
+            melhor, escolhida = exata, 0
+            imagens = simetrias(len(tabuleiro)).imagens
+            for simetria in range(1, 8):
+                imagem = bytes(imagens[simetria](exata))
+                if imagem < melhor:
+                    melhor, escolhida = imagem, simetria
+            forma = (melhor, escolhida)
+            self.formas.guardar(exata, forma)
+        return forma
+
+    def _booleana(self, consulta, calcular, tabuleiro, jogador):
+        forma = self._forma(tabuleiro, jogador)
+        if forma is None:
+            return calcular(tabuleiro, jogador)
+        chave = (consulta, forma[0])
+        resultado = self.resultados.obter(chave)
+        if resultado is None:
+            resultado = calcular(tabuleiro, jogador)
+            self.resultados.guardar(chave, resultado)
+        return resultado
+
+    def existe_captura(self, tabuleiro, jogador):
+        return self._booleana(CAPTURA, game_logic.existe_captura_possivel, tabuleiro, jogador)
+
+    def bloqueado(self, tabuleiro, jogador):
+        return self._booleana(BLOQUEADO, game_logic.jogador_esta_bloqueado, tabuleiro, jogador)
+
+    def continua(self, tabuleiro, linha, coluna, jogador):
+        forma = self._forma(tabuleiro, jogador)
+        if forma is None:
+            return game_logic.pode_continuar_jogada_apos_captura(tabuleiro, linha, coluna, jogador)
+        canonica, simetria = forma
+        chave = (CONTINUA, canonica, simetrias(len(tabuleiro)).para_canonica[simetria][linha * len(tabuleiro) + coluna])
+        resultado = self.resultados.obter(chave)
+        if resultado is None:
+            resultado = game_logic.pode_continuar_jogada_apos_captura(tabuleiro, linha, coluna, jogador)
+            self.resultados.guardar(chave, resultado)
+        return resultado
+
+    def capturas(self, tabuleiro, linha, coluna, jogador):
+        """Casas adversárias capturadas por uma peça do jogador que chega em (linha, coluna), na orientação de quem chamou."""
+        forma = self._forma(tabuleiro, jogador)
+        if forma is None:
+            return game_logic.capturas_do_movimento(tabuleiro, linha, coluna, linha, coluna, jogador)
+        canonica, simetria = forma
+        n = len(tabuleiro)
+        tabelas = simetrias(n)
+        para_canonica = tabelas.para_canonica[simetria]
+        chave = (CAPTURAS, canonica, para_canonica[linha * n + coluna])
+        resultado = self.resultados.obter(chave)
+        if resultado is None:
+            capturas = game_logic.capturas_do_movimento(tabuleiro, linha, coluna, linha, coluna, jogador)
+            self.resultados.guardar(chave, tuple(para_canonica[l * n + c] for l, c in capturas))
+            return capturas
+        da_canonica = tabelas.da_canonica[simetria]
+        return [da_canonica[indice] for indice in resultado]
+
+    def estatisticas(self):
+        """Taxa de acerto das duas LRUs, entradas, descartes e memória aproximada ocupada por elas."""
+        vistos = set()
+        memoria = 0
+        for lru in (self.formas, self.resultados):
+            with lru.lock:
+                itens = list(lru.itens.items())
+            memoria += sys.getsizeof(lru.itens) + sum(_tamanho(chave, vistos) + _tamanho(valor, vistos)
+                                                      for chave, valor in itens)
+        return {
+            "consultas": self.resultados.acertos + self.resultados.faltas,
+            "taxa_acerto": self.resultados.taxa_acerto(),
+            "taxa_acerto_formas": self.formas.taxa_acerto(),
+            "entradas": len(self.resultados.itens),
+            "formas": len(self.formas.itens),
+            "descartes": self.resultados.descartes + self.formas.descartes,
+            "capacidade": self.resultados.capacidade,
+            "memoria_bytes": memoria,
+        }
+
+    def limpar(self):
+        self.formas.limpar()
+        self.resultados.limpar()
+
+CACHE = CacheRegras()
+
+def configurar(capacidade):
+    """Troca o cache usado pelas funções do módulo por um vazio, com a capacidade dada."""
+    global CACHE
+    CACHE = CacheRegras(capacidade)
+
+def estatisticas():
+    return CACHE.estatisticas()
+
+def existe_captura_possivel(tabuleiro, jogador_atual):
+    return CACHE.existe_captura(tabuleiro, jogador_atual)
+
+def existe_captura_com_movimento(tabuleiro, jogador_id):
+    return CACHE.existe_captura(tabuleiro, jogador_id)
+
+def jogador_esta_bloqueado(tabuleiro, jogador_id):
+    return CACHE.bloqueado(tabuleiro, jogador_id)
+
+def pode_continuar_jogada_apos_captura(tabuleiro, linha, coluna, jogador_atual):
+    if tabuleiro[linha][coluna] != jogador_atual:
+        return False
+    return CACHE.continua(tabuleiro, linha, coluna, jogador_atual)
+
+def verificar_e_realizar_capturas(tabuleiro, linha, coluna, jogador_atual):
+    capturas = CACHE.capturas(tabuleiro, linha, coluna, jogador_atual)
+    for l_adj, c_adj in capturas:
+        tabuleiro[l_adj][c_adj] = 0
+    return bool(capturas)
+
+def capturas_do_movimento(tabuleiro, linha_origem, coluna_origem, linha_destino, coluna_destino, jogador_atual):
+    return sorted(CACHE.capturas(tabuleiro, linha_destino, coluna_destino, jogador_atual))
@@ -0,0 +1,247 @@
+"""Diário (journal) das partidas: cada ação aceita é gravada em um arquivo binário só de acréscimo, com
+fsync em lote, e de tempos em tempos o estado completo de todas as partidas vai para um snapshot.
+
+Ao reiniciar, o servidor carrega o último snapshot e reaplica os registros gravados depois dele.
+Os segmentos antigos não são apagados, então a história completa de qualquer partida pode ser
+reconstruída com `python diario.py reproduzir --dados DIR --partida ID`.
+
+Cada registro tem 16 bytes fixos (REGISTRO), seguidos do texto para o chat e para a entrada de uma IA:
+
+    id da partida | sequência do registro na partida | tipo | jogador | a | b | c | d | tamanho do texto
+
+A sequência por partida permite saber quais registros de um segmento já estão contidos no snapshot.
+No registro de criação, `a` é o tamanho do tabuleiro (0 nos diários antigos, que eram sempre 5x5).
+"""
+
+import argparse
+import glob
+import json
+import os
+import struct
+import threading
+import time
+
+from game_logic import TABULEIRO_TAMANHO
+
+MAGICO = b"SEEGA-DIARIO-1\n"
+REGISTRO = struct.Struct("<IIBBBBBBH")
+
+CRIAR, ENTRAR, COLOCAR, MOVER, REMOVER, DESISTIR, CHAT, IA, REMOVIDA = range(9)
+NOMES_TIPOS = ("criar", "entrar", "colocar", "mover", "remover", "desistir", "chat", "ia", "removida")
+
+ARQUIVO_SNAPSHOT = "snapshot.json"
+
+def _caminho_segmento(diretorio, numero):
+    return os.path.join(diretorio, f"diario-{numero:08d}.bin")
+
+def segmentos(diretorio):
+    """Números dos segmentos do diário existentes no diretório, em ordem."""
+    return sorted(int(os.path.basename(caminho)[7:15]) for caminho in glob.glob(os.path.join(diretorio, "diario-*.bin")))
+
+def ler_segmento(caminho):
+    """Gera (match_id, seq, tipo, jogador, (a, b, c, d), texto) de um segmento.
+
+    Um registro incompleto no fim do arquivo (queda no meio da gravação) é ignorado.
+    """
+    with open(caminho, "rb") as arquivo:
+        dados = arquivo.read()
+    if not dados.startswith(MAGICO):
+        raise ValueError(f"{caminho} não é um segmento do diário.")
+    pos = len(MAGICO)
+    while pos + REGISTRO.size <= len(dados):
+        match_id, seq, tipo, jogador, a, b, c, d, tamanho = REGISTRO.unpack_from(dados, pos)
+        pos += REGISTRO.size
+        if pos + tamanho > len(dados):
+            break
+        texto = dados[pos:pos + tamanho].decode("utf-8")
+        pos += tamanho
+        yield match_id, seq, tipo, jogador, (a, b, c, d), texto
+
+
+class Diario:
+    """Grava os registros em memória e os descarrega no disco em lote, com um fsync a cada `intervalo_fsync`.
+
+    Uma queda do processo perde no máximo os registros do último intervalo. `lock` protege só o buffer, para
+    que `registrar` nunca espere o disco; `lock_arquivo` serializa as gravações, a rotação e o fechamento.
+    """
+
+    def __init__(self, diretorio, intervalo_fsync=0.05):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.intervalo_fsync = intervalo_fsync
+        self.lock = threading.Lock()
+        self.lock_arquivo = threading.Lock()
+        self.buffer = bytearray()
+        self.registros = 0
+        self.bytes_gravados = 0
+        existentes = segmentos(diretorio)
+        self.segmento = (existentes[-1] + 1) if existentes else 1
+        self.arquivo = self._abrir(self.segmento)
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._gravar_periodicamente, daemon=True, name="diario")
+        self._thread.start()
+
+    def _abrir(self, numero):
+        arquivo = open(_caminho_segmento(self.diretorio, numero), "ab", buffering=0)
+        arquivo.write(MAGICO)
+        return arquivo
+
+    def registrar(self, match_id, seq, tipo, jogador=0, a=0, b=0, c=0, d=0, texto=""):
+        dados = texto.encode("utf-8") if texto else b""
+        with self.lock:
+            self.buffer += REGISTRO.pack(match_id, seq, tipo, jogador, a, b, c, d, len(dados))
+            self.buffer += dados
+            self.registros += 1
+
+    def _descarregar(self):
+        """Troca o buffer sob o lock e grava o antigo com fsync fora dele. Deve ser chamada com o lock_arquivo."""
+        with self.lock:
+            dados, self.buffer = self.buffer, bytearray()
+        if dados:
+            self.arquivo.write(dados)
+            self.bytes_gravados += len(dados)
+            os.fsync(self.arquivo.fileno())
+
+    def _gravar_periodicamente(self):
+        while not self._parar.wait(self.intervalo_fsync):
+            with self.lock_arquivo:
+                self._descarregar()
+
+    def rotacionar(self):
+        """Fecha o segmento atual e passa a gravar em um novo. Retorna o número do novo segmento.
+
+        Tudo o que foi registrado até a chamada fica no segmento antigo; o que chegar durante ela vai para o novo.
+        """
+        with self.lock_arquivo:
+            self._descarregar()
+            self.arquivo.close()
+            self.segmento += 1
+            self.arquivo = self._abrir(self.segmento)
+            return self.segmento
+
+    def fechar(self):
+        self._parar.set()
+        with self.lock_arquivo:
+            self._descarregar()
+            self.arquivo.close()
+
+
+def gravar_snapshot(diretorio, dados):
+    """Grava o snapshot de forma atômica: arquivo temporário, fsync e troca de nome."""
+    caminho = os.path.join(diretorio, ARQUIVO_SNAPSHOT)
+    temporario = caminho + ".tmp"
+    with open(temporario, "w") as arquivo:
+        json.dump(dados, arquivo, separators=(",", ":"))
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+
+def ler_snapshot(diretorio):
+    caminho = os.path.join(diretorio, ARQUIVO_SNAPSHOT)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho) as arquivo:
+        return json.load(arquivo)
+
+def aplicar(partida, tipo, jogador, campos, texto):
+    """Reaplica um registro de ação em uma partida."""
+    a, b, c, d = campos
+    if tipo == ENTRAR:
+        with partida.lock:
+            partida.conexoes[jogador] = True
+            partida._alterar()
+    elif tipo == COLOCAR:
+        partida.place_piece(jogador, a, b)
+    elif tipo == MOVER:
+        partida.move_piece(jogador, a, b, c, d)
+    elif tipo == REMOVER:
+        partida.remove_piece_when_blocked(jogador, a, b)
+    elif tipo == DESISTIR:
+        partida.surrender(jogador)
+    elif tipo == CHAT:
+        partida.send_chat_message(jogador, texto)
+
+def restaurar(diretorio, criar_partida, importar_partida):
+    """Reconstrói as partidas a partir do último snapshot e dos registros gravados depois dele.
+
+    `criar_partida(match_id, tamanho)` cria uma partida vazia e `importar_partida(match_id, dados)` recria uma a partir
+    do snapshot. Retorna (partidas, IAs {match_id: {jogador: tempo}}, maior id visto, registros reaplicados).
+    """
+    snapshot = ler_snapshot(diretorio)
+    partidas, ias, maior_id, inicio = {}, {}, 0, 1
+    if snapshot:
+        inicio = snapshot["segmento"]
+        maior_id = snapshot["maior_id"]
+        for dados in snapshot["partidas"]:
+            partidas[dados["match_id"]] = importar_partida(dados["match_id"], dados)
+        ias = {int(match_id): {int(j): tempo for j, tempo in por_jogador.items()}
+               for match_id, por_jogador in snapshot["ias"].items()}
+
+    reaplicados = 0
+    for numero in segmentos(diretorio):
+        if numero < inicio:
+            continue
+        for match_id, seq, tipo, jogador, campos, texto in ler_segmento(_caminho_segmento(diretorio, numero)):
+            maior_id = max(maior_id, match_id)
+            if tipo == CRIAR:
+                if match_id not in partidas:
+                    partidas[match_id] = criar_partida(match_id, campos[0] or TABULEIRO_TAMANHO)
+            elif tipo == REMOVIDA:
+                partidas.pop(match_id, None)
+                ias.pop(match_id, None)
+            elif tipo == IA:
+                ias.setdefault(match_id, {})[jogador] = float(texto)
+            else:
+                partida = partidas.get(match_id)
+                if partida is None or seq <= partida.seq_diario:
+                    continue
+                aplicar(partida, tipo, jogador, campos, texto)
+                partida.seq_diario = seq
+                reaplicados += 1
+    return partidas, ias, maior_id, reaplicados
+
+def reproduzir(diretorio, match_id, passo_a_passo=False):
+    """Reconstrói uma partida apenas a partir do diário (todos os segmentos, do início)."""
+    from partida import Partida
+
+    partida = None
+    acoes = 0
+    for numero in segmentos(diretorio):
+        for registro_id, seq, tipo, jogador, campos, texto in ler_segmento(_caminho_segmento(diretorio, numero)):
+            if registro_id != match_id:
+                continue
+            if tipo == CRIAR:
+                partida = Partida(match_id, tamanho=campos[0] or TABULEIRO_TAMANHO)
+                continue
+            if partida is None or tipo in (IA, REMOVIDA):
+                continue
+            aplicar(partida, tipo, jogador, campos, texto)
+            acoes += 1
+            if passo_a_passo:
+                print(f"{acoes:4d}. jogador {jogador} {NOMES_TIPOS[tipo]} {campos if tipo != CHAT else texto}")
+                for linha in partida.tabuleiro:
+                    print("      " + " ".join(".XO"[valor] for valor in linha))
+    return partida, acoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Ferramentas do diário de partidas.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    reproduzir_parser = subcomandos.add_parser("reproduzir", help="Reconstrói uma partida a partir do diário.")
+    reproduzir_parser.add_argument("--dados", required=True, help="Diretório do diário (o --dados do servidor).")
+    reproduzir_parser.add_argument("--partida", type=int, required=True)
+    reproduzir_parser.add_argument("--passo-a-passo", action="store_true", help="Mostra o tabuleiro após cada ação.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    partida, acoes = reproduzir(args.dados, args.partida, args.passo_a_passo)
+    duracao = time.perf_counter() - inicio
+    if partida is None:
+        print(f"❌ Partida {args.partida} não encontrada no diário.")
+        return
+    print(f"🔁 Partida {args.partida}: {acoes} ações reaplicadas em {duracao * 1000:.1f} ms.")
+    print(f"   Fase: {partida.fase} | Vez do jogador {partida.jogador_atual} | Vencedor: {partida.vencedor or '-'}")
+    for linha in partida.tabuleiro:
+        print("   " + " ".join(".XO"[valor] for valor in linha))
+
+if __name__ == "__main__":
+    main()
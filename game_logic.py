@@ -1,10 +1,64 @@
 TABULEIRO_TAMANHO = 5
-
-def criar_tabuleiro():
-    return [[0 for _ in range(TABULEIRO_TAMANHO)] for _ in range(TABULEIRO_TAMANHO)]
-
-def eh_casa_central(linha, coluna):
-    meio = TABULEIRO_TAMANHO // 2
+TAMANHOS_TABULEIRO = (5, 7, 9)
+DIRECOES = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+class Geometria:
+    """Tabelas de um tamanho de tabuleiro: vizinhos de cada casa, pares de captura, casa central e simetrias.
+
+    São calculadas uma única vez por tamanho (veja `geometria`); com elas as regras não testam limites do
+    tabuleiro nem percorrem direções fora dele, e o custo por jogada não cresce com o tamanho.
+    """
+
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self.centro = tamanho // 2
+        self.casas = [(l, c) for l in range(tamanho) for c in range(tamanho)]
+        self.pecas_por_jogador = (tamanho * tamanho - 1) // 2
+
+        def dentro(l, c):
+            return 0 <= l < tamanho and 0 <= c < tamanho
+
+        self.vizinhos = [[tuple((l + dl, c + dc) for dl, dc in DIRECOES if dentro(l + dl, c + dc))
+                          for c in range(tamanho)] for l in range(tamanho)]
+        # Para cada casa de chegada, os pares (casa adjacente, casa oposta) que formam um sanduíche.
+        # A casa central nunca é capturada, então pares cuja casa adjacente é o centro ficam de fora.
+        self.pares_captura = [[tuple(((l + dl, c + dc), (l + 2 * dl, c + 2 * dc)) for dl, dc in DIRECOES
+                                     if dentro(l + 2 * dl, c + 2 * dc) and (l + dl, c + dc) != (self.centro, self.centro))
+                               for c in range(tamanho)] for l in range(tamanho)]
+        self.simetrias = self._gerar_simetrias()
+
+    def _gerar_simetrias(self):
+        """As 8 simetrias do quadrado (transposição seguida de reflexões) como permutações dos índices das casas."""
+        n = self.tamanho
+        permutacoes = []
+        for transformacao in range(8):
+            permutacao = []
+            for indice in range(n * n):
+                linha, coluna = divmod(indice, n)
+                if transformacao & 4:
+                    linha, coluna = coluna, linha
+                if transformacao & 1:
+                    linha = n - 1 - linha
+                if transformacao & 2:
+                    coluna = n - 1 - coluna
+                permutacao.append(linha * n + coluna)
+            permutacoes.append(tuple(permutacao))
+        return tuple(permutacoes)
+
+_GEOMETRIAS = {}
+
+def geometria(tamanho):
+    """Tabelas do tamanho de tabuleiro, criadas na primeira vez que ele é usado."""
+    tabelas = _GEOMETRIAS.get(tamanho)
+    if tabelas is None:
+        tabelas = _GEOMETRIAS[tamanho] = Geometria(tamanho)
+    return tabelas
+
+def criar_tabuleiro(tamanho=TABULEIRO_TAMANHO):
+    return [[0 for _ in range(tamanho)] for _ in range(tamanho)]
+
+def eh_casa_central(linha, coluna, tamanho=TABULEIRO_TAMANHO):
+    meio = tamanho // 2
     return linha == meio and coluna == meio
 
 def proximo_jogador(jogador_atual):
@@ -26,23 +80,10 @@ def realizar_movimento(tabuleiro, linha_origem, coluna_origem, linha_destino, co
     tabuleiro[linha_origem][coluna_origem] = 0
 
 def verificar_e_realizar_capturas(tabuleiro, linha, coluna, jogador_atual):
-    capturou = False
-    for dl, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-        l_adj = linha + dl
-        c_adj = coluna + dc
-        l_oposto = linha + 2 * dl
-        c_oposto = coluna + 2 * dc
-        if 0 <= l_adj < TABULEIRO_TAMANHO and 0 <= c_adj < TABULEIRO_TAMANHO and \
-           0 <= l_oposto < TABULEIRO_TAMANHO and 0 <= c_oposto < TABULEIRO_TAMANHO:
-            if tabuleiro[l_adj][c_adj] != 0 and tabuleiro[l_adj][c_adj] != jogador_atual and \
-               tabuleiro[l_oposto][c_oposto] == jogador_atual:
-                
-                if eh_casa_central(l_adj, c_adj):
-                    continue
-
-                tabuleiro[l_adj][c_adj] = 0
-                capturou = True
-    return capturou
+    capturas = _capturas_na_chegada(tabuleiro, linha, coluna, jogador_atual)
+    for l_adj, c_adj in capturas:
+        tabuleiro[l_adj][c_adj] = 0
+    return bool(capturas)
 
 
 def verificar_vitoria(tabuleiro, jogador_atual):
@@ -52,86 +93,115 @@ def verificar_vitoria(tabuleiro, jogador_atual):
             return False
     return True
 
+def _captura_a_partir_de(tabuleiro, vizinhos, linha, coluna, jogador_atual):
+    """Se a peça em (linha, coluna) tem algum movimento simples que captura."""
+    for l_dest, c_dest in vizinhos[linha][coluna]:
+        if tabuleiro[l_dest][c_dest] == 0 and _capturas_na_chegada(tabuleiro, l_dest, c_dest, jogador_atual):
+            return True
+    return False
+
 def existe_captura_possivel(tabuleiro, jogador_atual):
-    for linha in range(TABULEIRO_TAMANHO):
-        for coluna in range(TABULEIRO_TAMANHO):
-            if tabuleiro[linha][coluna] == jogador_atual:
-                for dl, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                    l_dest = linha + dl
-                    c_dest = coluna + dc
-                    if 0 <= l_dest < TABULEIRO_TAMANHO and 0 <= c_dest < TABULEIRO_TAMANHO:
-                        if eh_movimento_valido(tabuleiro, linha, coluna, l_dest, c_dest, jogador_atual):
-                            copia = [r[:] for r in tabuleiro]
-                            realizar_movimento(copia, linha, coluna, l_dest, c_dest)
-                            
-                            temp = [r[:] for r in copia]
-                            verificar_e_realizar_capturas(copia, l_dest, c_dest, jogador_atual)
-                            if copia != temp:  
-                                return True
+    vizinhos = geometria(len(tabuleiro)).vizinhos
+    for linha, valores in enumerate(tabuleiro):
+        for coluna, valor in enumerate(valores):
+            if valor == jogador_atual and _captura_a_partir_de(tabuleiro, vizinhos, linha, coluna, jogador_atual):
+                return True
     return False
 
 def pode_continuar_jogada_apos_captura(tabuleiro, linha, coluna, jogador_atual):
-    for dl, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-        l_dest = linha + dl
-        c_dest = coluna + dc
-        if 0 <= l_dest < TABULEIRO_TAMANHO and 0 <= c_dest < TABULEIRO_TAMANHO:
-            if eh_movimento_valido(tabuleiro, linha, coluna, l_dest, c_dest, jogador_atual):
-                copia = [r[:] for r in tabuleiro]
-                realizar_movimento(copia, linha, coluna, l_dest, c_dest)
-                temp = [r[:] for r in copia]
-                verificar_e_realizar_capturas(copia, l_dest, c_dest, jogador_atual)
-                if copia != temp:
-                    return True
-    return False
+    if tabuleiro[linha][coluna] != jogador_atual:
+        return False
+    return _captura_a_partir_de(tabuleiro, geometria(len(tabuleiro)).vizinhos, linha, coluna, jogador_atual)
 
 def existe_captura_com_movimento(tabuleiro, jogador_id):
-    for i in range(TABULEIRO_TAMANHO):
-        for j in range(TABULEIRO_TAMANHO):
-            if tabuleiro[i][j] == jogador_id:
-                for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                    ni, nj = i + dx, j + dy
-                    if 0 <= ni < TABULEIRO_TAMANHO and 0 <= nj < TABULEIRO_TAMANHO:
-                        if eh_movimento_valido(tabuleiro, i, j, ni, nj, jogador_id):
-                            copia = [linha[:] for linha in tabuleiro]
-                            realizar_movimento(copia, i, j, ni, nj)
-                            temp = [linha[:] for linha in copia]
-                            if verificar_e_realizar_capturas(copia, ni, nj, jogador_id):
-                                return True
-    return False
+    return existe_captura_possivel(tabuleiro, jogador_id)
 
 def jogador_esta_bloqueado(tabuleiro, jogador_id):
-    for i in range(len(tabuleiro)):
-        for j in range(len(tabuleiro[i])):
-            if tabuleiro[i][j] == jogador_id:
-                for dl, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-                    ni, nj = i + dl, j + dc
-                    if 0 <= ni < 5 and 0 <= nj < 5:
-                        if tabuleiro[ni][nj] == 0:
-                            return False
+    vizinhos = geometria(len(tabuleiro)).vizinhos
+    for i, valores in enumerate(tabuleiro):
+        for j, valor in enumerate(valores):
+            if valor == jogador_id:
+                for ni, nj in vizinhos[i][j]:
+                    if tabuleiro[ni][nj] == 0:
+                        return False
     return True
 
 def peca_central_bloqueada(tabuleiro, jogador_id):
-    centro = TABULEIRO_TAMANHO // 2
+    centro = len(tabuleiro) // 2
     if tabuleiro[centro][centro] != jogador_id:
         return False
-    
-    
-    for dl, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-        novo_l = centro + dl
-        novo_c = centro + dc
-        if (0 <= novo_l < TABULEIRO_TAMANHO and 
-            0 <= novo_c < TABULEIRO_TAMANHO and 
-            tabuleiro[novo_l][novo_c] == 0):
-            return False  
-    return True  
+    return peca_esta_bloqueada(tabuleiro, centro, centro)
 
 def peca_esta_bloqueada(tabuleiro, linha, coluna):
     """Verifica se uma peça específica em uma dada posição não tem movimentos legais."""
-    
-    for dl, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-        nl, nc = linha + dl, coluna + dc
-        
-        if 0 <= nl < 5 and 0 <= nc < 5 and tabuleiro[nl][nc] == 0:
+    for nl, nc in geometria(len(tabuleiro)).vizinhos[linha][coluna]:
+        if tabuleiro[nl][nc] == 0:
             return False
-
     return True
+
+def _capturas_na_chegada(tabuleiro, linha, coluna, jogador_atual):
+    """Casas adversárias capturadas por uma peça do jogador que chega em (linha, coluna)."""
+    capturas = []
+    for (l_adj, c_adj), (l_oposto, c_oposto) in geometria(len(tabuleiro)).pares_captura[linha][coluna]:
+        adjacente = tabuleiro[l_adj][c_adj]
+        if adjacente != 0 and adjacente != jogador_atual and tabuleiro[l_oposto][c_oposto] == jogador_atual:
+            capturas.append((l_adj, c_adj))
+    return capturas
+
+def capturas_do_movimento(tabuleiro, linha_origem, coluna_origem, linha_destino, coluna_destino, jogador_atual):
+    """Lista as casas adversárias que seriam capturadas pelo movimento, sem alterar o tabuleiro.
+
+    A casa de origem fica a uma casa do destino, então esvaziá-la não muda nenhum sanduíche: basta olhar o tabuleiro atual.
+    """
+    return sorted(_capturas_na_chegada(tabuleiro, linha_destino, coluna_destino, jogador_atual))
+
+def regra_central_ativa(estado, jogador_id):
+    """A regra dos 3 turnos vale quando a peça central é do jogador há 3 turnos ou mais."""
+    centro = len(estado["tabuleiro"]) // 2
+    return (estado["tabuleiro"][centro][centro] == jogador_id and
+            estado.get("jogador_peca_central") == jogador_id and
+            estado.get("turnos_peca_central", 0) >= 3)
+
+def movimentos_legais(estado, jogador_id):
+    """Gera em uma única passada o conjunto de jogadas legais da fase de movimentação.
+
+    `estado` é um dicionário com "tabuleiro", "jogador_peca_central" e "turnos_peca_central".
+    Retorna um dicionário com:
+      - "remocao": motivo do modo de remoção ("bloqueado" ou "centro_bloqueado") ou None;
+      - "remocoes": casas adversárias que podem ser removidas no modo de remoção;
+      - "restricao": regra que filtrou os movimentos ("centro", "captura") ou None;
+      - "movimentos": {(l_origem, c_origem, l_destino, c_destino): [casas capturadas]}.
+    """
+    tabuleiro = estado["tabuleiro"]
+    tabelas = geometria(len(tabuleiro))
+    centro = tabelas.centro
+    vizinhos = tabelas.vizinhos
+    movimentos = {}
+    ha_captura = False
+    for i, valores in enumerate(tabuleiro):
+        for j, valor in enumerate(valores):
+            if valor == jogador_id:
+                for ni, nj in vizinhos[i][j]:
+                    if tabuleiro[ni][nj] == 0:
+                        capturas = capturas_do_movimento(tabuleiro, i, j, ni, nj, jogador_id)
+                        movimentos[(i, j, ni, nj)] = capturas
+                        ha_captura = ha_captura or bool(capturas)
+
+    resultado = {"remocao": None, "remocoes": [], "restricao": None, "movimentos": {}}
+    if not movimentos:
+        resultado["remocao"] = "bloqueado"
+    elif regra_central_ativa(estado, jogador_id):
+        resultado["restricao"] = "centro"
+        resultado["movimentos"] = {m: c for m, c in movimentos.items() if m[:2] == (centro, centro)}
+        if not resultado["movimentos"]:
+            resultado["remocao"] = "centro_bloqueado"
+    elif ha_captura:
+        resultado["restricao"] = "captura"
+        resultado["movimentos"] = {m: c for m, c in movimentos.items() if c}
+    else:
+        resultado["movimentos"] = movimentos
+
+    if resultado["remocao"]:
+        adversario = proximo_jogador(jogador_id)
+        resultado["remocoes"] = [(i, j) for i, j in tabelas.casas if tabuleiro[i][j] == adversario]
+    return resultado
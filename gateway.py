@@ -0,0 +1,494 @@
+"""Gateway de partidas: distribui as partidas entre N processos do server.py por hash consistente do id.
+
+Um processo Python usa um núcleo por vez por causa do GIL, então o gateway sobe vários `server.py --shard`
+(cada um com seu GameServer) e repassa cada chamada ao processo dono da partida. A requisição é lida uma
+vez só para descobrir o método e o id da partida; o XML original vai para o processo e a resposta volta
+sem ser decodificada.
+
+O gateway escolhe os ids das partidas. register_player, create_match e list_matches são atendidas por ele;
+as métricas (get_metrics) e o controle de admissão (limite de taxa por cliente e fila máxima) são os do
+próprio gateway; os processos não limitam a taxa, já que todas as chamadas deles vêm do gateway. Processos podem ser adicionados ou removidos com
+`add_shard()` e `remove_shard(nome)`, no endpoint de administração (só em 127.0.0.1): as partidas que mudam de
+dono são exportadas do processo antigo e importadas no novo, com as chamadas a elas retidas no gateway durante a troca.
+
+As chamadas internas (`shard.*`: criar, listar, exportar e importar partidas) vão para o endpoint de administração
+de cada processo, na porta seguinte à pública, e o gateway as recusa quando vêm de um cliente.
+
+Uso:
+    python gateway.py --processos 4 --porta 55555
+    python gateway.py --processos 4 --dados dados/ -- --intervalo-snapshot 30
+"""
+
+import argparse
+import bisect
+import hashlib
+import http.client
+import itertools
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import xmlrpc.client
+from collections import Counter
+from xmlrpc.server import SimpleXMLRPCDispatcher
+
+from admissao import ControleAdmissao
+from game_logic import TABULEIRO_TAMANHO
+from metricas import METRICAS, DespachoInstrumentado, registrar_funcoes, registrar_funcoes_admin
+from servidores import DespachoSeega, RecusaHTTP, ServidorXMLRPCAsync, criar_servidor_admin
+
+# Chamadas longas e a posição do timeout nos parâmetros. Não seguram a troca de dono da partida, porque o
+# processo antigo as acorda ao exportá-la.
+METODOS_DE_ESPERA = {"wait_state": 3, "watch_match": 2}
+
+# Chamadas entre o gateway e os processos, atendidas só no endpoint de administração de cada processo.
+PREFIXO_INTERNO = "shard."
+
+def eh_interno(metodo):
+    return isinstance(metodo, str) and metodo.startswith(PREFIXO_INTERNO)
+
+def _hash(texto):
+    return int.from_bytes(hashlib.blake2b(texto.encode(), digest_size=8).digest(), "big")
+
+class AnelConsistente:
+    """Anel de hash consistente com `replicas` pontos por nó: ao adicionar ou remover um nó, só as chaves
+    dos arcos afetados mudam de dono (cerca de 1/N delas)."""
+
+    def __init__(self, nos=(), replicas=64):
+        self.replicas = replicas
+        self.pontos = []
+        self.donos = []
+        for no in nos:
+            self.adicionar(no)
+
+    def nos(self):
+        return sorted(set(self.donos))
+
+    def adicionar(self, no):
+        for replica in range(self.replicas):
+            ponto = _hash(f"{no}#{replica}")
+            posicao = bisect.bisect(self.pontos, ponto)
+            self.pontos.insert(posicao, ponto)
+            self.donos.insert(posicao, no)
+
+    def remover(self, no):
+        mantidos = [(ponto, dono) for ponto, dono in zip(self.pontos, self.donos) if dono != no]
+        self.pontos = [ponto for ponto, _ in mantidos]
+        self.donos = [dono for _, dono in mantidos]
+
+    def copiar(self):
+        anel = AnelConsistente(replicas=self.replicas)
+        anel.pontos, anel.donos = list(self.pontos), list(self.donos)
+        return anel
+
+    def dono(self, chave):
+        if not self.pontos:
+            raise ValueError("Nenhum processo disponível.")
+        posicao = bisect.bisect(self.pontos, _hash(str(chave))) % len(self.pontos)
+        return self.donos[posicao]
+
+class Gateway:
+    def __init__(self, porta_base=56000, argumentos_servidor=(), dados=None, replicas=64, workers=64):
+        """Gateway com `workers` threads de encaminhamento.
+
+        Cada processo sobe em modo async com o mesmo número de workers, para aguentar todas as chamadas que o
+        gateway pode repassar ao mesmo tempo; no máximo metade das threads fica presa em chamadas longas.
+        """
+        self.porta_base = porta_base
+        self.workers = workers
+        self.vagas_espera = threading.BoundedSemaphore(max(1, workers // 2))
+        self.argumentos_servidor = list(argumentos_servidor)
+        self.dados = dados
+        self.enderecos = {}
+        self.enderecos_internos = {}
+        self.processos = {}
+        self.nomes = itertools.count()
+        self.anel = AnelConsistente(replicas=replicas)
+        self.conexoes = threading.local()
+        # Protege o anel, as partidas em troca de dono e as chamadas em andamento por partida.
+        self.rotas = threading.Condition()
+        self.migrando = set()
+        self.geracao = 0  # muda quando partidas começam a trocar de dono e quando o anel é trocado
+        self.em_andamento = Counter()
+        self.rebalanceando = False
+        self.lock_registro = threading.Lock()
+        self.partidas_abertas = {}  # tamanho do tabuleiro -> partida aberta pelo register_player
+        self.ids_partidas = None
+
+    # --- processos ---
+
+    def _subir_processo(self, nome):
+        """Sobe o processo na porta pública `porta_base + 2i` e no endpoint de administração na seguinte."""
+        porta = self.porta_base + 2 * int(nome[1:])
+        comando = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+                   "--porta", str(porta), "--porta-binaria", "0", "--porta-admin", str(porta + 1), "--shard",
+                   "--taxa-por-cliente", "0",
+                   # Cada thread do gateway mantém uma conexão com cada processo.
+                   "--modo", "async", "--workers", str(self.workers), "--max-conexoes", str(2 * self.workers)]
+        comando += self.argumentos_servidor
+        if self.dados:
+            comando += ["--dados", os.path.join(self.dados, nome)]
+        self.processos[nome] = subprocess.Popen(comando, stdout=subprocess.DEVNULL)
+        self.enderecos_internos[nome] = ("127.0.0.1", porta + 1)
+        return ("127.0.0.1", porta)
+
+    def _esperar_processo(self, nome, limite=15.0):
+        fim = time.monotonic() + limite
+        while True:
+            try:
+                return self._chamar_no(nome, "shard.list_ids")
+            except OSError:
+                if time.monotonic() > fim:
+                    raise RuntimeError(f"O processo {nome} não respondeu a tempo.")
+                time.sleep(0.1)
+
+    def iniciar(self, processos):
+        """Sobe os processos iniciais e continua a numeração das partidas depois do maior id existente."""
+        nomes = [f"w{next(self.nomes)}" for _ in range(processos)]
+        for nome in nomes:
+            self.enderecos[nome] = self._subir_processo(nome)
+        maior_id = 0
+        for nome in nomes:
+            maior_id = max([maior_id] + self._esperar_processo(nome))
+            self.anel.adicionar(nome)
+        self.ids_partidas = itertools.count(maior_id + 1)
+        # Com --dados, as partidas restauradas podem estar em processos que não são mais os donos.
+        self._rebalancear(self.anel.copiar(), nomes)
+
+    def encerrar(self):
+        for processo in self.processos.values():
+            processo.terminate()
+        for processo in self.processos.values():
+            processo.wait()
+
+    # --- encaminhamento ---
+
+    def _conexao(self, nome, interno=False):
+        """Conexão HTTP persistente com o processo (ou com o seu endpoint de administração), uma por thread do gateway."""
+        conexoes = getattr(self.conexoes, "por_no", None)
+        if conexoes is None:
+            conexoes = self.conexoes.por_no = {}
+        conexao = conexoes.get((nome, interno))
+        if conexao is None:
+            endereco = self.enderecos_internos[nome] if interno else self.enderecos[nome]
+            conexao = conexoes[(nome, interno)] = http.client.HTTPConnection(*endereco)
+        return conexao
+
+    def _enviar(self, nome, corpo, interno=False):
+        """Envia o corpo XML ao processo e devolve o corpo da resposta, sem decodificar.
+
+        Com `interno`, vai para o endpoint de administração do processo, o único que atende as chamadas `shard.*`.
+        """
+        for tentativa in range(2):
+            conexao = self._conexao(nome, interno)
+            try:
+                conexao.request("POST", "/RPC2", corpo, {"Content-Type": "text/xml"})
+                resposta = conexao.getresponse()
+                dados = resposta.read()
+                if resposta.status in (429, 503):
+                    # Processo sobrecarregado: a recusa chega ao cliente como veio, com o Retry-After.
+                    raise RecusaHTTP(f"{resposta.status} {resposta.reason}", float(resposta.getheader("Retry-After", 1)))
+                if resposta.status != 200:
+                    raise RuntimeError(f"O processo {nome} respondeu {resposta.status} {resposta.reason}.")
+                return dados
+            except RecusaHTTP:
+                raise
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # O processo fecha conexões ociosas; a requisição não chegou a ser lida, então é reenviada.
+                conexao.close()
+                if tentativa:
+                    raise
+            except Exception:
+                conexao.close()
+                raise
+
+    def _chamar_no(self, nome, metodo, *argumentos):
+        corpo = xmlrpc.client.dumps(argumentos, metodo, allow_none=True).encode()
+        return xmlrpc.client.loads(self._enviar(nome, corpo, eh_interno(metodo)))[0][0]
+
+    def encaminhar(self, match_id, metodo, corpo):
+        """Envia a requisição ao dono da partida, esperando se ela estiver mudando de processo.
+
+        As chamadas longas não seguram a troca; se uma delas volta com erro e a partida mudou de dono no meio
+        do caminho, ela é repetida no dono novo.
+        """
+        conta = metodo not in METODOS_DE_ESPERA
+        while True:
+            with self.rotas:
+                while match_id in self.migrando:
+                    self.rotas.wait()
+                nome = self.anel.dono(match_id)
+                geracao = self.geracao
+                if conta:
+                    self.em_andamento[match_id] += 1
+            try:
+                dados = self._enviar(nome, corpo, eh_interno(metodo))
+            finally:
+                if conta:
+                    with self.rotas:
+                        self.em_andamento[match_id] -= 1
+                        if not self.em_andamento[match_id]:
+                            del self.em_andamento[match_id]
+                            if match_id in self.migrando:
+                                self.rotas.notify_all()
+            if conta or b"<fault>" not in dados:
+                return dados
+            with self.rotas:
+                if self.geracao == geracao and match_id not in self.migrando:
+                    return dados
+
+    def encaminhar_espera(self, metodo, params, corpo):
+        """Encaminha uma chamada longa.
+
+        Com as vagas de espera ocupadas, ela vai com timeout 0 e responde na hora, para as esperas não tomarem
+        todas as threads do gateway.
+        """
+        if not self.vagas_espera.acquire(blocking=False):
+            params = list(params)
+            if len(params) > METODOS_DE_ESPERA[metodo]:
+                params[METODOS_DE_ESPERA[metodo]] = 0
+            return self.encaminhar(params[0], metodo, xmlrpc.client.dumps(tuple(params), metodo, allow_none=True).encode())
+        try:
+            return self.encaminhar(params[0], metodo, corpo)
+        finally:
+            self.vagas_espera.release()
+
+    def chamar(self, match_id, metodo, *argumentos):
+        corpo = xmlrpc.client.dumps(argumentos, metodo, allow_none=True).encode()
+        return xmlrpc.client.loads(self.encaminhar(match_id, metodo, corpo))[0][0]
+
+    # --- chamadas atendidas pelo gateway ---
+
+    def create_match(self, tamanho=TABULEIRO_TAMANHO):
+        """Cria uma partida no processo dono do próximo id."""
+        with self.rotas:
+            while self.rebalanceando:
+                self.rotas.wait()
+            match_id = next(self.ids_partidas)
+        return self.chamar(match_id, "shard.create_match", match_id, tamanho)
+
+    def register_player(self, tamanho=TABULEIRO_TAMANHO):
+        """Coloca o jogador na partida aberta pelo gateway para o tamanho de tabuleiro, criando outra quando ela enche.
+
+        Retorna [match_id, player_id].
+        """
+        with self.lock_registro:
+            while True:
+                if tamanho not in self.partidas_abertas:
+                    self.partidas_abertas[tamanho] = self.create_match(tamanho)
+                match_id = self.partidas_abertas[tamanho]
+                try:
+                    player_id = self.chamar(match_id, "join_match", match_id)
+                except xmlrpc.client.Fault:
+                    player_id = 0
+                if player_id != 1:
+                    del self.partidas_abertas[tamanho]
+                if player_id != 0:
+                    return [match_id, player_id]
+
+    def list_matches(self, apenas_abertas=False):
+        """Junta as listas de partidas de todos os processos."""
+        partidas = []
+        for nome in self.anel.nos():
+            partidas += self._chamar_no(nome, "list_matches", apenas_abertas)
+        return sorted(partidas, key=lambda partida: partida["match_id"])
+
+    def list_shards(self):
+        """Processos do gateway: nome, endereço e número de partidas de cada um."""
+        return [{"nome": nome, "endereco": "%s:%d" % self.enderecos[nome],
+                 "partidas": len(self._chamar_no(nome, "shard.list_ids"))} for nome in self.anel.nos()]
+
+    def add_shard(self):
+        """Sobe mais um processo e passa para ele as partidas que agora são suas. Retorna o nome do processo."""
+        nome = f"w{next(self.nomes)}"
+        self.enderecos[nome] = self._subir_processo(nome)
+        self._esperar_processo(nome)
+        novo = self.anel.copiar()
+        novo.adicionar(nome)
+        movidas = self._rebalancear(novo, self.anel.nos())
+        print(f"[+] Processo {nome} adicionado; {movidas} partida(s) movida(s) para ele.")
+        return nome
+
+    def remove_shard(self, nome):
+        """Move as partidas do processo para os demais e o encerra. Retorna o número de partidas movidas."""
+        if nome not in self.anel.nos() or len(self.anel.nos()) == 1:
+            raise ValueError(f"Não é possível remover o processo {nome}.")
+        novo = self.anel.copiar()
+        novo.remover(nome)
+        movidas = self._rebalancear(novo, [nome])
+        processo = self.processos.pop(nome, None)
+        if processo:
+            processo.terminate()
+            processo.wait()
+        print(f"[-] Processo {nome} removido; {movidas} partida(s) movida(s).")
+        return movidas
+
+    def _rebalancear(self, novo_anel, nos_origem):
+        """Troca o anel, movendo as partidas dos `nos_origem` cujo dono mudou.
+
+        Novas partidas esperam o fim da troca; chamadas às partidas movidas esperam só que elas cheguem ao novo
+        dono. Antes de exportar uma partida, o gateway espera as chamadas em andamento a ela terminarem.
+        """
+        with self.rotas:
+            self.rebalanceando = True
+        try:
+            movimentos = [(match_id, origem, novo_anel.dono(match_id))
+                          for origem in nos_origem for match_id in self._chamar_no(origem, "shard.list_ids")
+                          if novo_anel.dono(match_id) != origem]
+            with self.rotas:
+                self.migrando.update(match_id for match_id, _, _ in movimentos)
+                self.geracao += 1
+                self.rotas.wait_for(lambda: not any(self.em_andamento[m] for m in self.migrando))
+            for match_id, origem, destino in movimentos:
+                self._chamar_no(destino, "shard.import_match", self._chamar_no(origem, "shard.export_match", match_id))
+            with self.rotas:
+                self.anel = novo_anel
+                self.geracao += 1
+                for tamanho, match_id in list(self.partidas_abertas.items()):
+                    if match_id in self.migrando:
+                        del self.partidas_abertas[tamanho]
+                self.migrando.clear()
+        finally:
+            with self.rotas:
+                self.rebalanceando = False
+                self.rotas.notify_all()
+        return len(movimentos)
+
+
+def _recusa_interna(metodo):
+    return xmlrpc.client.Fault(1, f"Método {metodo} não disponível.")
+
+class _Roteamento(DespachoSeega, SimpleXMLRPCDispatcher):
+    """Despacho do gateway: chamadas de uma partida seguem cruas para o dono; as demais são atendidas aqui."""
+
+    def __init__(self, gateway):
+        super().__init__(allow_none=True, encoding=None)
+        self.gateway = gateway
+        for nome in ("create_match", "register_player", "list_matches"):
+            self.register_function(getattr(gateway, nome), nome)
+        self.register_introspection_functions()
+        self.register_multicall_functions()
+
+    def _marshaled_dispatch(self, data, dispatch_method=None, path=None):
+        try:
+            params, metodo = xmlrpc.client.loads(data)
+        except Exception:
+            return super()._marshaled_dispatch(data, dispatch_method, path)
+        if metodo == "system.multicall" and params:
+            return self._multicall(data, params[0])
+        if eh_interno(metodo):
+            self.metricas.registrar_erro()
+            return xmlrpc.client.dumps(_recusa_interna(metodo), allow_none=True).encode()
+        if metodo in self.funcs or not params or not isinstance(params[0], int):
+            return super()._marshaled_dispatch(data, dispatch_method, path)
+        self.metricas.definir_metodo(metodo)
+        try:
+            if metodo in METODOS_DE_ESPERA:
+                return self.gateway.encaminhar_espera(metodo, params, data)
+            return self.gateway.encaminhar(params[0], metodo, data)
+        except RecusaHTTP:
+            raise
+        except Exception as e:
+            self.metricas.registrar_erro()
+            return xmlrpc.client.dumps(xmlrpc.client.Fault(1, f"{type(e).__name__}: {e}"), allow_none=True).encode()
+
+    def _multicall(self, data, chamadas):
+        """Um multicall com chamadas de uma só partida vai inteiro para o dono; os demais são divididos aqui."""
+        self.metricas.definir_metodo("system.multicall")
+        if any(eh_interno(chamada.get("methodName")) for chamada in chamadas):
+            return self._multicall_dividido(chamadas)
+        ids = {chamada["params"][0] if chamada.get("params") and isinstance(chamada["params"][0], int) else None
+               for chamada in chamadas if chamada.get("methodName") not in self.funcs}
+        locais = any(chamada.get("methodName") in self.funcs for chamada in chamadas)
+        if len(ids) == 1 and None not in ids and not locais:
+            return self.gateway.encaminhar(ids.pop(), "system.multicall", data)
+        return self._multicall_dividido(chamadas)
+
+    def _multicall_dividido(self, chamadas):
+        """Atende o multicall chamada por chamada, cada uma no seu processo ou aqui."""
+        resultados = []
+        for chamada in chamadas:
+            metodo, params = chamada.get("methodName"), tuple(chamada.get("params", ()))
+            try:
+                if eh_interno(metodo):
+                    raise _recusa_interna(metodo)
+                if metodo in self.funcs or not params or not isinstance(params[0], int):
+                    resultados.append([self._dispatch(metodo, params)])
+                else:
+                    resultados.append([self.gateway.chamar(params[0], metodo, *params)])
+            except xmlrpc.client.Fault as e:
+                resultados.append({"faultCode": e.faultCode, "faultString": e.faultString})
+            except Exception as e:
+                resultados.append({"faultCode": 1, "faultString": f"{type(e).__name__}: {e}"})
+        return xmlrpc.client.dumps((resultados,), methodresponse=True, allow_none=True).encode()
+
+class DespachoGateway(DespachoInstrumentado, _Roteamento):
+    metricas = METRICAS
+
+def registrar_funcoes_admin_gateway(servidor, gateway):
+    """Registra no endpoint de administração as chamadas que sobem, retiram ou listam os processos."""
+    for nome in ("list_shards", "add_shard", "remove_shard"):
+        servidor.register_function(getattr(gateway, nome), nome)
+    registrar_funcoes_admin(servidor)
+
+
+def _interromper(*_):
+    """SIGTERM encerra o gateway como um Ctrl+C, derrubando também os processos do servidor."""
+    raise KeyboardInterrupt
+
+def main():
+    parser = argparse.ArgumentParser(description="Gateway que distribui as partidas entre vários processos do servidor.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=55555)
+    parser.add_argument("--processos", type=int, default=os.cpu_count(), help="Processos do server.py iniciados.")
+    parser.add_argument("--porta-base", type=int, default=56000, help="Porta do primeiro processo; cada processo usa duas portas seguidas "
+                                                                  "(a pública e a de administração).")
+    parser.add_argument("--porta-admin", type=int, default=55557,
+                        help="Porta do endpoint de administração (set_profiler e list_shards, add_shard e "
+                             "remove_shard), só em 127.0.0.1; 0 desativa.")
+    parser.add_argument("--workers", type=int, default=64, help="Threads do gateway que encaminham as chamadas.")
+    parser.add_argument("--dados", help="Diretório de dados: cada processo grava o seu diário em DIR/<nome>.")
+    parser.add_argument("--fila-maxima", type=int, help="Chamadas à espera de uma thread antes de recusar com 503 "
+                                                        "(padrão: igual a --workers).")
+    parser.add_argument("--taxa-por-cliente", type=float, default=50.0,
+                        help="Requisições por segundo de cada cliente (endereço IP e cabeçalho X-Seega-Cliente) "
+                             "antes de recusar com 429; 0 desativa.")
+    parser.add_argument("--taxa-por-endereco", type=float,
+                        help="Requisições por segundo de cada endereço IP, somando todos os seus clientes "
+                             "(padrão: 10x a taxa por cliente).")
+    parser.add_argument("--rajada-por-cliente", type=int, default=0,
+                        help="Requisições seguidas aceitas de um cliente acima da taxa (padrão: 2x a taxa).")
+    parser.add_argument("argumentos_servidor", nargs=argparse.REMAINDER,
+                        help="Argumentos repassados a cada server.py, depois dos que o gateway já passa "
+                             "(--modo async e --workers igual ao do gateway; ex.: -- --intervalo-snapshot 30).")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, _interromper)
+    gateway = Gateway(args.porta_base, [a for a in args.argumentos_servidor if a != "--"], args.dados,
+                      workers=args.workers)
+    try:
+        gateway.iniciar(args.processos)
+        admissao = ControleAdmissao(args.workers, args.workers if args.fila_maxima is None else args.fila_maxima,
+                                    args.taxa_por_cliente, args.rajada_por_cliente, args.taxa_por_endereco)
+        despacho = DespachoGateway(gateway)
+        registrar_funcoes(despacho)
+        despacho.register_function(admissao.estatisticas, "get_admission_stats")
+        servidor = ServidorXMLRPCAsync((args.host, args.porta), workers=args.workers, dispatcher=despacho,
+                                       admissao=admissao)
+        if args.porta_admin:
+            servidor_admin = criar_servidor_admin(args.porta_admin)
+            registrar_funcoes_admin_gateway(servidor_admin, gateway)
+            threading.Thread(target=servidor_admin.serve_forever, daemon=True).start()
+            print(f"🔧 Administração em http://127.0.0.1:{args.porta_admin}")
+        print(f"🌐 Gateway em http://{args.host}:{args.porta} com {args.processos} processo(s) "
+              f"(portas {args.porta_base}-{args.porta_base + 2 * args.processos - 1})")
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.encerrar()
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,122 @@
 import xmlrpc.client
+from collections import deque
+import functools
+import http.client
+import queue
+import threading
 import time 
+import uuid
 import pygame
 import sys
 from pygame.locals import *
 
-try:
-    proxy = xmlrpc.client.ServerProxy('http://127.0.0.1:55555', allow_none=True)
-except ConnectionRefusedError:
-    print("❌ Erro: Não foi possível conectar ao servidor. Verifique se o servidor está rodando.")
-    sys.exit()
+from admissao import CABECALHO_CLIENTE
+from protocolo_binario import ClienteBinario
+
+ENDERECO_SERVIDOR = 'http://127.0.0.1:55555'
+ENDERECO_BINARIO = ('127.0.0.1', 55556)
+USAR_BINARIO = "--binario" in sys.argv[1:]
+# Com --assistir ID, o cliente acompanha a partida ID como espectador, sem jogar.
+PARTIDA_ASSISTIDA = int(sys.argv[sys.argv.index("--assistir") + 1]) if "--assistir" in sys.argv[1:] else None
+# Com --tamanho N, o jogador entra em uma partida de tabuleiro N x N (5, 7 ou 9).
+TAMANHO_PEDIDO = int(sys.argv[sys.argv.index("--tamanho") + 1]) if "--tamanho" in sys.argv[1:] else 5
+TIMEOUT_ESPERA_ESTADO = 10
+LINHAS_CHAT_VISIVEIS = 21
+ATRASO_MINIMO_RECONEXAO = 0.5
+ATRASO_MAXIMO_RECONEXAO = 8.0
+TEMPO_TELA_VITORIA = 5.0
+ATRASO_ESPECTADOR_OCUPADO = 1.0
+# Identifica as duas conexões deste cliente no limite de taxa do servidor.
+ID_CLIENTE = uuid.uuid4().hex
+
+ERROS_DE_REDE = (OSError, http.client.HTTPException, xmlrpc.client.ProtocolError)
+# Recusas do controle de admissão (taxa excedida e servidor sobrecarregado): a chamada não foi executada.
+RECUSAS_DO_SERVIDOR = (429, 503)
+
+def conectar():
+    """Abre uma conexão com o servidor: XML-RPC ou, com --binario, o protocolo binário compacto."""
+    if USAR_BINARIO:
+        return ClienteBinario(ENDERECO_BINARIO)
+    return xmlrpc.client.ServerProxy(ENDERECO_SERVIDOR, allow_none=True, headers=[(CABECALHO_CLIENTE, ID_CLIENTE)])
+
+class ConexaoServidor:
+    """Conexão de uma thread de rede com o servidor. Após uma falha, reconecta com espera exponencial.
+
+    Quando o servidor recusa a chamada (429 ou 503), espera o tempo pedido no Retry-After e a repete.
+    """
+
+    def __init__(self):
+        self.proxy = None
+        self.atraso = ATRASO_MINIMO_RECONEXAO
+        self.com_falha = False
+
+    def _descartar(self):
+        if isinstance(self.proxy, ClienteBinario):
+            self.proxy.close()
+        self.proxy = None
 
+    def _executar(self, funcao, repetir):
+        while True:
+            try:
+                if self.proxy is None:
+                    self.proxy = conectar()
+                resposta = funcao(self.proxy)
+            except ERROS_DE_REDE as e:
+                if isinstance(e, xmlrpc.client.ProtocolError) and e.errcode in RECUSAS_DO_SERVIDOR:
+                    # Repetida mesmo sem `repetir`: uma chamada recusada não chegou a ser executada.
+                    publicar_estado(error="Servidor ocupado. Tentando novamente...")
+                    self.com_falha = True
+                    time.sleep(float(e.headers.get("Retry-After", ATRASO_MINIMO_RECONEXAO)))
+                    continue
+                print(f"❌ Erro de comunicação com o servidor: {e}")
+                publicar_estado(error="Perda de conexão com o servidor. Reconectando...")
+                self._descartar()
+                self.com_falha = True
+                if not repetir:
+                    return None
+                time.sleep(self.atraso)
+                self.atraso = min(self.atraso * 2, ATRASO_MAXIMO_RECONEXAO)
+                continue
+            if self.com_falha:
+                self.com_falha = False
+                self.atraso = ATRASO_MINIMO_RECONEXAO
+                publicar_estado(error=None)
+            return resposta
+
+    def chamar(self, metodo, *argumentos, repetir=True):
+        """Faz a chamada RPC. Com `repetir`, tenta de novo até conseguir; sem, retorna None se a rede falhar.
+
+        Erros do próprio servidor (xmlrpc.client.Fault) são repassados a quem chamou.
+        """
+        return self._executar(lambda proxy: getattr(proxy, metodo)(*argumentos), repetir)
+
+    def chamar_com_estado(self, metodo, *argumentos):
+        """Envia a ação e pede o estado atualizado na mesma ida e volta ao servidor.
+
+        No XML-RPC usa system.multicall; no protocolo binário, as duas requisições seguem juntas (pipelining).
+        Retorna (resultado da ação, estado) ou None se a rede falhar; a ação não é repetida.
+        """
+        def enviar(proxy):
+            if isinstance(proxy, ClienteBinario):
+                acao = proxy.chamar_assincrono(metodo, *argumentos)
+                estado = proxy.chamar_assincrono("get_state", minha_partida, meu_id)
+                return acao.result(), estado.result()
+            multicall = xmlrpc.client.MultiCall(proxy)
+            getattr(multicall, metodo)(*argumentos)
+            multicall.get_state(minha_partida, meu_id)
+            return tuple(multicall())
+        return self._executar(enviar, repetir=False)
+
+# Caixa com o estado mais recente: as threads de rede trocam o dicionário inteiro (sob lock_estado) e o laço
+# de desenho só lê a referência, sem nunca esperar pela rede.
 game_state = {}
+lock_estado = threading.Lock()
+fila_acoes = queue.Queue()
+acao_enviada = threading.Event()  # encerra antes da hora o intervalo entre consultas de estado
 meu_id = None
+minha_partida = None
+chat_recente = deque(maxlen=LINHAS_CHAT_VISIVEIS)
+ultimo_seq_chat = 0
 
 ultima_selecao = None
 texto_digitado = ""
@@ -21,7 +126,7 @@ chat_scroll_x = 0
 
 LARGURA = 900
 ALTURA = 600
-TAMANHO_CASA = 100
+LADO_TABULEIRO = 500  # as casas dividem esse espaço: 100 px no 5x5, 71 px no 7x7, 55 px no 9x9
 MARGEM = 50
 CORES = {
     'fundo': (20, 20, 20),
@@ -39,6 +144,22 @@ CORES = {
     'campo_chat_ativo': (100, 100, 100),
 }
 
+QUADROS_POR_SEGUNDO = 30
+ESPERA_OCIOSA_MS = 250
+EVENTO_ESTADO = USEREVENT + 1
+MEDIR = "--medir" in sys.argv[1:]
+
+BOTAO_DESISTIR = pygame.Rect(600, 20, 120, 40)
+BOTAO_ENVIAR = pygame.Rect(810, 540, 70, 30)
+CAMPO_CHAT = pygame.Rect(600, 540, 200, 30)
+
+# Regiões da tela redesenhadas de forma independente: cabeçalho (status e "Desistir"), tabuleiro, chat e
+# rodapé (campo de texto, "Enviar" e avisos). Cada uma é repintada só quando o que ela mostra muda.
+REGIAO_CABECALHO = [pygame.Rect(0, 0, LARGURA, MARGEM), BOTAO_DESISTIR]
+REGIAO_TABULEIRO = [pygame.Rect(MARGEM, MARGEM, LADO_TABULEIRO, LADO_TABULEIRO)]
+REGIAO_CHAT = [pygame.Rect(600, 80, LARGURA - 600, 440)]
+REGIAO_RODAPE = [pygame.Rect(600, 540, LARGURA - 600, 10), pygame.Rect(0, 550, LARGURA, ALTURA - 550)]
+
 pygame.init()
 tela = pygame.display.set_mode((LARGURA, ALTURA))
 pygame.display.set_caption('Seega (XML-RPC)')
@@ -47,17 +168,40 @@ fonte_chat = pygame.font.SysFont('Arial', 18)
 fonte_botao = pygame.font.SysFont('Arial', 20)
 clock = pygame.time.Clock()
 
-def desenhar_tabuleiro():
-    """Desenha todos os elementos do tabuleiro: fundo, grid, casa central e peças."""
-    tabuleiro_atual = game_state.get("tabuleiro", [])
+def tamanho_tabuleiro():
+    """Lado do tabuleiro da partida: o do último estado recebido ou, antes dele, o pedido com --tamanho."""
+    return len(game_state.get("tabuleiro") or ()) or TAMANHO_PEDIDO
+
+@functools.lru_cache(maxsize=None)
+def criar_fundo_estatico(tamanho):
+    """Desenha uma vez por tamanho de tabuleiro tudo o que nunca muda: fundo, tabuleiro vazio com o grid e a
+    casa central, painel do chat."""
+    casa = LADO_TABULEIRO // tamanho
+    fundo = pygame.Surface((LARGURA, ALTURA)).convert()
+    fundo.fill(CORES['fundo'])
+    pygame.draw.rect(fundo, CORES['tabuleiro'], (MARGEM, MARGEM, casa * tamanho, casa * tamanho))
+
+    for i in range(tamanho + 1):
+        pygame.draw.line(fundo, CORES['linha'], (MARGEM, MARGEM + i * casa), (MARGEM + tamanho * casa, MARGEM + i * casa), 2)
+        pygame.draw.line(fundo, CORES['linha'], (MARGEM + i * casa, MARGEM), (MARGEM + i * casa, MARGEM + tamanho * casa), 2)
+    centro = tamanho // 2
+    pygame.draw.rect(fundo, CORES['central'], (MARGEM + centro * casa, MARGEM + centro * casa, casa, casa))
+
+    pygame.draw.rect(fundo, (40, 40, 40), (600, 80, 280, 440))
+    return fundo
 
-    pygame.draw.rect(tela, CORES['tabuleiro'], (MARGEM, MARGEM, TAMANHO_CASA * 5, TAMANHO_CASA * 5))
+fundo_estatico = criar_fundo_estatico(TAMANHO_PEDIDO)
+assinaturas_regioes = {}
 
-    for i in range(6):
-        pygame.draw.line(tela, CORES['linha'], (MARGEM, MARGEM + i * TAMANHO_CASA), (MARGEM + 5 * TAMANHO_CASA, MARGEM + i * TAMANHO_CASA), 2)
-        pygame.draw.line(tela, CORES['linha'], (MARGEM + i * TAMANHO_CASA, MARGEM), (MARGEM + i * TAMANHO_CASA, MARGEM + 5 * TAMANHO_CASA), 2)
-    centro = 2
-    pygame.draw.rect(tela, CORES['central'], (MARGEM + centro * TAMANHO_CASA, MARGEM + centro * TAMANHO_CASA, TAMANHO_CASA, TAMANHO_CASA))
+@functools.lru_cache(maxsize=256)
+def texto_renderizado(fonte_texto, texto, cor):
+    """Superfície de um texto, renderizada só na primeira vez que aparece."""
+    return fonte_texto.render(texto, True, cor)
+
+def desenhar_tabuleiro(estado):
+    """Desenha as peças e a seleção sobre o tabuleiro pré-renderizado."""
+    tabuleiro_atual = estado.get("tabuleiro", [])
+    casa = LADO_TABULEIRO // tamanho_tabuleiro()
 
     if tabuleiro_atual:
         for l, linha in enumerate(tabuleiro_atual):
@@ -68,11 +212,11 @@ def desenhar_tabuleiro():
                     cor = CORES['jogador2']
                 else:
                     continue
-                pygame.draw.circle(tela, cor, (MARGEM + c * TAMANHO_CASA + TAMANHO_CASA // 2, MARGEM + l * TAMANHO_CASA + TAMANHO_CASA // 2), TAMANHO_CASA // 2 - 10)
+                pygame.draw.circle(tela, cor, (MARGEM + c * casa + casa // 2, MARGEM + l * casa + casa // 2), casa // 2 - casa // 10)
 
     if ultima_selecao:
         l, c = ultima_selecao
-        pygame.draw.rect(tela, CORES['selecao'], (MARGEM + c * TAMANHO_CASA + 2, MARGEM + l * TAMANHO_CASA + 2, TAMANHO_CASA - 4, TAMANHO_CASA - 4), 3)
+        pygame.draw.rect(tela, CORES['selecao'], (MARGEM + c * casa + 2, MARGEM + l * casa + 2, casa - 4, casa - 4), 3)
 
 def desenhar_botao(texto, rect, cor_normal, cor_hover):
     mouse = pygame.mouse.get_pos()
@@ -80,48 +224,49 @@ def desenhar_botao(texto, rect, cor_normal, cor_hover):
     hover = rect.collidepoint(mouse)
     cor = cor_hover if hover else cor_normal
     pygame.draw.rect(tela, cor, rect)
-    texto_surf = fonte_botao.render(texto, True, CORES['botao_texto'])
+    texto_surf = texto_renderizado(fonte_botao, texto, CORES['botao_texto'])
     texto_rect = texto_surf.get_rect(center=rect.center)
     tela.blit(texto_surf, texto_rect)
     return clique[0] and hover
 
+def _repintar(nome, rects, assinatura, desenhar, sujos):
+    """Repinta a região se o que ela mostra mudou desde o último quadro, acumulando os retângulos alterados."""
+    if assinaturas_regioes.get(nome) == assinatura:
+        return
+    assinaturas_regioes[nome] = assinatura
+    for rect in rects:
+        tela.blit(fundo_estatico, rect, rect)
+    desenhar()
+    sujos.extend(rects)
+
 def desenhar_interface():
-    """Desenha a UI completa, incluindo status, chat e mensagens de erro."""
-    global texto_digitado, scroll_offset, chat_scroll_x
-    tela.fill(CORES['fundo'])
-    desenhar_tabuleiro()
-
-    fase = game_state.get('fase', 'Aguardando...')
-    jogador_atual = game_state.get('jogador_atual', '?')
-    seu_turno = game_state.get('seu_turno', False)
-    chat_log = game_state.get("chat_log", [])
-    error_msg = game_state.get('error')
-    vencedor = game_state.get('vencedor')
-    modo_remocao = game_state.get('modo_remocao', False)
-
-    status_text = f"Jogador: {meu_id or '?'} | Turno: {jogador_atual} | Fase: {fase}"
+    """Desenha a UI, incluindo status, chat e mensagens de erro, repintando apenas as regiões que mudaram.
+
+    Retorna a lista de retângulos atualizados na tela (vazia se nada mudou).
+    """
+    global fundo_estatico
+    estado = game_state
+    fundo = criar_fundo_estatico(tamanho_tabuleiro())
+    if fundo is not fundo_estatico:
+        # A partida tem outro tamanho de tabuleiro: troca o fundo e repinta a tela inteira.
+        fundo_estatico = fundo
+        assinaturas_regioes.clear()
+    fase = estado.get('fase', 'Aguardando...')
+    jogador_atual = estado.get('jogador_atual', '?')
+    seu_turno = estado.get('seu_turno', False)
+    chat_log = tuple(chat_recente)
+    error_msg = estado.get('error')
+    vencedor = estado.get('vencedor')
+    modo_remocao = estado.get('modo_remocao', False)
+    mouse = pygame.mouse.get_pos()
+
+    if PARTIDA_ASSISTIDA is not None:
+        status_text = f"Espectador da partida {PARTIDA_ASSISTIDA} | Turno: {jogador_atual} | Fase: {fase}"
+    else:
+        status_text = f"Jogador: {meu_id or '?'} | Turno: {jogador_atual} | Fase: {fase}"
     if seu_turno and not vencedor:
         status_text += " (Sua vez!)"
-    texto = fonte.render(status_text, True, CORES['texto'])
-    tela.blit(texto, (20, 10))
-
-    botao_desistir_rect = pygame.Rect(600, 20, 120, 40)
-    desenhar_botao("Desistir", botao_desistir_rect, CORES['botao'], CORES['botao_hover'])
-    botao_enviar_rect = pygame.Rect(810, 540, 70, 30)
-    desenhar_botao("Enviar", botao_enviar_rect, CORES['botao'], CORES['botao_hover'])
-
-    pygame.draw.rect(tela, (40, 40, 40), (600, 80, 280, 440))
-    y_pos = 90
-    for msg in chat_log[-21:]:
-        texto_chat = fonte_chat.render(msg, True, CORES['texto'])
-        tela.blit(texto_chat, (610, y_pos))
-        y_pos += 20
-
-    cor_input = CORES['campo_chat_ativo'] if campo_chat_ativo else CORES['campo_chat']
-    pygame.draw.rect(tela, cor_input, (600, 540, 200, 30))
-    texto_surface = fonte_chat.render(texto_digitado, True, CORES['texto'])
-    tela.blit(texto_surface, (610, 545))
-    
+
     if vencedor:
         aviso_txt = f"🏆 Jogador {vencedor} venceu!"
         aviso_cor = (255, 215, 0)
@@ -134,59 +279,210 @@ def desenhar_interface():
     else:
         aviso_txt = None
 
-    if aviso_txt:
-        aviso = fonte.render(aviso_txt, True, aviso_cor)
-        tela.blit(aviso, (MARGEM, ALTURA - 40))
+    def cabecalho():
+        tela.blit(texto_renderizado(fonte, status_text, CORES['texto']), (20, 10))
+        desenhar_botao("Desistir", BOTAO_DESISTIR, CORES['botao'], CORES['botao_hover'])
+
+    def chat():
+        y_pos = 90
+        for msg in chat_log:
+            tela.blit(texto_renderizado(fonte_chat, msg, CORES['texto']), (610, y_pos))
+            y_pos += 20
+
+    def rodape():
+        desenhar_botao("Enviar", BOTAO_ENVIAR, CORES['botao'], CORES['botao_hover'])
+        cor_input = CORES['campo_chat_ativo'] if campo_chat_ativo else CORES['campo_chat']
+        pygame.draw.rect(tela, cor_input, CAMPO_CHAT)
+        tela.blit(texto_renderizado(fonte_chat, texto_digitado, CORES['texto']), (610, 545))
+        if aviso_txt:
+            tela.blit(texto_renderizado(fonte, aviso_txt, aviso_cor), (MARGEM, ALTURA - 40))
 
-    pygame.display.flip()
-    return botao_desistir_rect, botao_enviar_rect
+    sujos = []
+    if not assinaturas_regioes:
+        # Primeiro quadro (ou janela reexposta): pinta a tela inteira a partir do fundo pré-renderizado.
+        tela.blit(fundo_estatico, (0, 0))
+        sujos.append(tela.get_rect())
+    _repintar("cabecalho", REGIAO_CABECALHO, (status_text, BOTAO_DESISTIR.collidepoint(mouse)), cabecalho, sujos)
+    tabuleiro = tuple(map(tuple, estado.get("tabuleiro", ())))
+    _repintar("tabuleiro", REGIAO_TABULEIRO, (tabuleiro, ultima_selecao), lambda: desenhar_tabuleiro(estado), sujos)
+    _repintar("chat", REGIAO_CHAT, chat_log, chat, sujos)
+    _repintar("rodape", REGIAO_RODAPE, (texto_digitado, campo_chat_ativo, BOTAO_ENVIAR.collidepoint(mouse), aviso_txt),
+              rodape, sujos)
+    if sujos:
+        pygame.display.update(sujos)
+    return sujos
 
-def update_game_state():
-    """Pede ao servidor o estado completo do jogo e atualiza o cliente."""
-    global game_state, meu_id
+class MedidorQuadros:
+    """Com --medir, imprime periodicamente o tempo médio de trabalho por quadro e o uso de CPU do processo."""
+
+    def __init__(self, intervalo=5.0):
+        self.intervalo = intervalo
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.inicio = time.perf_counter()
+        self.cpu_inicio = time.process_time()
+        self.quadros = 0
+        self.repintados = 0
+        self.tempo_total = 0.0
+        self.tempo_maximo = 0.0
+
+    def registrar(self, duracao, repintou):
+        self.quadros += 1
+        self.repintados += repintou
+        self.tempo_total += duracao
+        self.tempo_maximo = max(self.tempo_maximo, duracao)
+        decorrido = time.perf_counter() - self.inicio
+        if decorrido >= self.intervalo:
+            cpu = (time.process_time() - self.cpu_inicio) / decorrido
+            print(f"[*] {self.quadros} quadros ({self.repintados} repintados) em {decorrido:.1f} s | "
+                  f"tempo por quadro: média {self.tempo_total / self.quadros * 1000:.2f} ms, "
+                  f"máximo {self.tempo_maximo * 1000:.2f} ms | CPU {cpu:.1%}")
+            self._reiniciar()
+
+
+
+def publicar_estado(novo=None, **campos):
+    """Troca o estado visto pela interface: pelo novo estado do servidor e/ou com campos alterados.
+
+    O estado pode chegar pelas duas threads de rede; um estado mais antigo que o atual é ignorado e, na mesma
+    versão, a mensagem de erro já recebida é mantida (o servidor a entrega a apenas uma das respostas).
+    """
+    global game_state
+    with lock_estado:
+        if novo is not None:
+            versao_atual = game_state.get("versao", -1)
+            if novo["versao"] < versao_atual:
+                return
+            if novo["versao"] == versao_atual and not novo.get("error"):
+                novo = dict(novo, error=game_state.get("error"))
+        game_state = dict(novo if novo is not None else game_state, **campos)
+    # Acorda o laço da interface, que fica parado esperando eventos enquanto nada muda.
     try:
+        pygame.event.post(pygame.event.Event(EVENTO_ESTADO))
+    except pygame.error:
+        pass
+
+def update_game_state(conexao, versao):
+    """Espera no servidor (long-poll) até o estado mudar e atualiza o cliente.
+
+    Retorna a versão conhecida e o intervalo sugerido pelo servidor (s) até a próxima consulta.
+    """
+    global meu_id, minha_partida
+    try:
+        if PARTIDA_ASSISTIDA is not None:
+            minha_partida = PARTIDA_ASSISTIDA
+            resposta = conexao.chamar("watch_match", minha_partida, versao, TIMEOUT_ESPERA_ESTADO)
+            if resposta.get("ocupado"):
+                time.sleep(ATRASO_ESPECTADOR_OCUPADO)
+        else:
+            if meu_id is None:
+                minha_partida, player_id = conexao.chamar("register_player", TAMANHO_PEDIDO)
+                if player_id == 0:
+                    print("Servidor cheio. Tentando novamente...")
+                    time.sleep(conexao.atraso)
+                    conexao.atraso = min(conexao.atraso * 2, ATRASO_MAXIMO_RECONEXAO)
+                    return versao, 0.0
+                meu_id = player_id
+                print(f"✅ Conectado como Jogador {meu_id} na partida {minha_partida}")
+            resposta = conexao.chamar("wait_state", minha_partida, meu_id, versao, TIMEOUT_ESPERA_ESTADO)
+        if resposta.get("alterado"):
+            if resposta["chat_seq"] > ultimo_seq_chat:
+                atualizar_chat(conexao, resposta["chat_seq"])
+            publicar_estado(resposta)
+        return resposta["versao"], resposta.get("proximo_poll_ms", 0) / 1000
+    except xmlrpc.client.Fault as e:
+        print(f"❌ Erro do servidor: {e.faultString}")
+        publicar_estado(error=e.faultString)
+        time.sleep(ATRASO_MAXIMO_RECONEXAO)
+    return versao, 0.0
+
+def atualizar_chat(conexao, chat_seq):
+    """Busca apenas as mensagens ainda não vistas (no máximo as que cabem na tela)."""
+    global ultimo_seq_chat
+    desde = max(ultimo_seq_chat, chat_seq - LINHAS_CHAT_VISIVEIS)
+    resposta = conexao.chamar("get_chat", minha_partida, meu_id or 0, desde, LINHAS_CHAT_VISIVEIS)
+    for seq, texto in resposta["mensagens"]:
+        chat_recente.append(texto)
+        ultimo_seq_chat = seq
+
+def thread_atualizacao():
+    """Mantém o estado do jogo atualizado em segundo plano, com uma conexão própria ao servidor.
+
+    Entre o início de uma consulta e o da próxima passa pelo menos o intervalo sugerido pelo servidor; uma espera
+    longa no servidor já o cumpre, então só as respostas rápidas (estado mudando seguido) são espaçadas. Uma
+    jogada enviada encerra o intervalo, porque depois dela a vez passa ao adversário.
+    """
+    conexao = ConexaoServidor()
+    versao = -1
+    while True:
+        inicio = time.monotonic()
+        versao, intervalo = update_game_state(conexao, versao)
+        acao_enviada.wait(max(0.0, intervalo - (time.monotonic() - inicio)))
+        acao_enviada.clear()
+
+def thread_acoes():
+    """Envia em segundo plano as jogadas e mensagens enfileiradas pela interface, na ordem em que foram feitas,
+    cada uma junto com o pedido do estado atualizado.
+
+    Uma ação que falha por erro de rede é descartada (não é repetida, para não ser aplicada duas vezes);
+    o estado seguinte recebido do servidor mostra se ela chegou ou não.
+    """
+    conexao = ConexaoServidor()
+    while True:
+        metodo, argumentos = fila_acoes.get()
         if meu_id is None:
-            meu_id = proxy.register_player()
-            if meu_id == 0:
-                print("Servidor cheio. Tentando novamente...")
-                meu_id = None
-                time.sleep(2)
-                return
-            elif meu_id in [1, 2]:
-                print(f"✅ Conectado como Jogador {meu_id}")
-
-        if meu_id:
-            game_state = proxy.get_state(meu_id)
-            if game_state.get("vencedor"):
-                desenhar_interface()
-                pygame.time.delay(5000)
-                pygame.quit()
-                sys.exit()
-    except Exception as e:
-        print(f"❌ Erro de comunicação com o servidor: {e}")
-        game_state['error'] = "Perda de conexão com o servidor."
+            continue
+        try:
+            resposta = conexao.chamar_com_estado(metodo, minha_partida, meu_id, *argumentos)
+        except xmlrpc.client.Fault as e:
+            publicar_estado(error=e.faultString)
+            continue
+        if resposta is not None:
+            publicar_estado(resposta[1])
+        acao_enviada.set()
+
+def enviar_acao(metodo, *argumentos):
+    """Enfileira uma chamada RPC da partida para a thread de ações; retorna imediatamente."""
+    fila_acoes.put((metodo, argumentos))
 
 def main_loop():
     global texto_digitado, campo_chat_ativo, ultima_selecao, scroll_offset, chat_scroll_x
-    
-    last_update_time = 0
-    update_interval = 0.5
 
+    threading.Thread(target=thread_atualizacao, daemon=True).start()
+    threading.Thread(target=thread_acoes, daemon=True).start()
+
+    medidor = MedidorQuadros() if MEDIR else None
+    fim_em = None
     running = True
     while running:
-        if time.time() - last_update_time > update_interval:
-            update_game_state()
-            last_update_time = time.time()
-        
-        botao_desistir_rect, botao_enviar_rect = desenhar_interface()
-        
-        for event in pygame.event.get():
+        inicio_quadro = time.perf_counter()
+        sujos = desenhar_interface()
+
+        if game_state.get("vencedor"):
+            # Mantém a tela de vitória por alguns segundos sem travar o laço de eventos.
+            if fim_em is None:
+                fim_em = time.monotonic() + TEMPO_TELA_VITORIA
+            elif time.monotonic() >= fim_em:
+                break
+
+        eventos = pygame.event.get()
+        if medidor:
+            medidor.registrar(time.perf_counter() - inicio_quadro, bool(sujos))
+        if not eventos and not sujos:
+            # Nada mudou: dorme até chegar um evento (entrada do usuário ou novo estado da rede).
+            eventos = [pygame.event.wait(ESPERA_OCIOSA_MS)]
+
+        for event in eventos:
             if event.type == QUIT:
                 running = False
+
+            if event.type in (VIDEOEXPOSE, WINDOWEXPOSED):
+                assinaturas_regioes.clear()
             
             if event.type == KEYDOWN and campo_chat_ativo:
                 if event.key == K_RETURN and texto_digitado.strip():
-                    proxy.send_chat_message(meu_id, texto_digitado)
+                    enviar_acao("send_chat_message", texto_digitado)
                     texto_digitado = ""
                 elif event.key == K_BACKSPACE:
                     texto_digitado = texto_digitado[:-1]
@@ -196,46 +492,59 @@ def main_loop():
             elif event.type == MOUSEBUTTONDOWN:
                 x, y = event.pos
                 
-                if botao_desistir_rect.collidepoint(event.pos) and game_state.get('seu_turno'):
-                    proxy.surrender(meu_id)
+                if BOTAO_DESISTIR.collidepoint(event.pos) and game_state.get('seu_turno'):
+                    enviar_acao("surrender")
                 
-                elif botao_enviar_rect.collidepoint(event.pos) and texto_digitado.strip():
-                    proxy.send_chat_message(meu_id, texto_digitado)
+                elif BOTAO_ENVIAR.collidepoint(event.pos) and texto_digitado.strip():
+                    enviar_acao("send_chat_message", texto_digitado)
                     texto_digitado = ""
                 
-                elif pygame.Rect(600, 540, 200, 30).collidepoint(x, y):
+                elif CAMPO_CHAT.collidepoint(x, y):
                     campo_chat_ativo = True
                 else:
                     campo_chat_ativo = False
                 
-                if (MARGEM <= x < MARGEM + 5 * TAMANHO_CASA and
-                    MARGEM <= y < MARGEM + 5 * TAMANHO_CASA):
-                    coluna = (x - MARGEM) // TAMANHO_CASA
-                    linha = (y - MARGEM) // TAMANHO_CASA
+                tamanho = tamanho_tabuleiro()
+                casa = LADO_TABULEIRO // tamanho
+                if (MARGEM <= x < MARGEM + tamanho * casa and
+                    MARGEM <= y < MARGEM + tamanho * casa):
+                    coluna = (x - MARGEM) // casa
+                    linha = (y - MARGEM) // casa
                     handle_board_click(linha, coluna)
 
-        clock.tick(30)
+        clock.tick(QUADROS_POR_SEGUNDO)
 
     pygame.quit()
     sys.exit()
 
 def handle_board_click(linha, coluna):
-    """Função chamada quando há um clique no tabuleiro. Ela faz a chamada RPC apropriada."""
+    """Função chamada quando há um clique no tabuleiro. Ela enfileira a chamada RPC apropriada."""
     global ultima_selecao
-    
-    if not game_state.get('seu_turno') or game_state.get('vencedor'):
+    estado = game_state
+
+    if not estado.get('seu_turno') or estado.get('vencedor'):
         return
 
-    fase = game_state.get('fase')
-    tabuleiro = game_state.get('tabuleiro', [])
-    modo_remocao = game_state.get('modo_remocao', False)
+    fase = estado.get('fase')
+    tabuleiro = estado.get('tabuleiro', [])
+    modo_remocao = estado.get('modo_remocao', False)
 
     if modo_remocao:
-        proxy.remove_piece_when_blocked(meu_id, linha, coluna)
+        enviar_acao("remove_piece_when_blocked", linha, coluna)
         return
 
     if fase == "colocacao":
-        proxy.place_piece(meu_id, linha, coluna)
+        # As duas peças do turno vão juntas num único place_pieces: a primeira fica marcada até a segunda.
+        if not tabuleiro or tabuleiro[linha][coluna] != 0:
+            return
+        if ultima_selecao == (linha, coluna):
+            ultima_selecao = None
+        elif ultima_selecao is None and estado.get('pecas_no_turno', 0) == 0:
+            ultima_selecao = (linha, coluna)
+        else:
+            casas = [[linha, coluna]] if ultima_selecao is None else [list(ultima_selecao), [linha, coluna]]
+            enviar_acao("place_pieces", casas)
+            ultima_selecao = None
     
     elif fase == "movimentacao":
         if ultima_selecao is None:
@@ -244,7 +553,7 @@ def handle_board_click(linha, coluna):
         else:
             orig_l, orig_c = ultima_selecao
 
-            proxy.move_piece(meu_id, orig_l, orig_c, linha, coluna)
+            enviar_acao("move_piece", orig_l, orig_c, linha, coluna)
             ultima_selecao = None
 
 if __name__ == "__main__":
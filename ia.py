@@ -0,0 +1,309 @@
+"""Jogador computador para o Seega: aprofundamento iterativo com poda alfa-beta e tabela de transposição Zobrist."""
+
+import random
+import threading
+import time
+
+from bitboard import CASAS, CENTRO, INDICE_CENTRO, VIZINHOS, bloqueado_bits, dilatar, existe_captura_bits
+from simulacao import EstadoSeega, MOVER, descrever_jogada
+
+INFINITO = 1_000_000
+VITORIA = 100_000
+LIMIAR_VITORIA = VITORIA - 1000  # acima disso o valor é uma vitória forçada a VITORIA - valor jogadas da raiz
+
+EXATO = 0
+LIMITE_INFERIOR = 1
+LIMITE_SUPERIOR = 2
+
+class _TempoEsgotado(Exception):
+    pass
+
+class Zobrist:
+    """Chaves aleatórias de 64 bits por casa e jogador, agrupadas por byte para calcular o hash com 8 consultas."""
+
+    def __init__(self, semente=0x5EE6A):
+        rnd = random.Random(semente)
+        chaves = [[rnd.getrandbits(64) for _ in range(CASAS)] for _ in range(2)]
+        self.tabelas = []
+        for jogador in range(2):
+            for deslocamento in range(0, CASAS, 8):
+                tabela = []
+                for byte in range(256):
+                    h = 0
+                    for i in range(8):
+                        if byte >> i & 1 and deslocamento + i < CASAS:
+                            h ^= chaves[jogador][deslocamento + i]
+                    tabela.append(h)
+                self.tabelas.append((jogador, deslocamento, tabela))
+        self.lado = [0, rnd.getrandbits(64), rnd.getrandbits(64)]
+        self.fase = rnd.getrandbits(64)
+        self.no_turno = rnd.getrandbits(64)
+        self.centro = {(j, t): rnd.getrandbits(64) for j in (None, 1, 2) for t in range(4)}
+
+    def hash(self, estado):
+        pecas = (estado.b1, estado.b2)
+        h = self.lado[estado.jogador] ^ self.centro[(estado.jogador_centro, min(estado.turnos_centro, 3))]
+        if estado.fase == "movimentacao":
+            h ^= self.fase
+        if estado.no_turno:
+            h ^= self.no_turno
+        for jogador, deslocamento, tabela in self.tabelas:
+            h ^= tabela[pecas[jogador] >> deslocamento & 0xFF]
+        return h
+
+class TabelaTransposicao:
+    """Tabela de tamanho fixo com baldes de duas entradas: uma preferida por profundidade e outra sempre substituída."""
+
+    def __init__(self, entradas=1 << 18):
+        self.baldes = max(entradas // 2, 1)
+        self.tabela = [None] * (self.baldes * 2)
+        self.consultas = 0
+        self.acertos = 0
+
+    def buscar(self, chave):
+        self.consultas += 1
+        posicao = (chave % self.baldes) * 2
+        for entrada in (self.tabela[posicao], self.tabela[posicao + 1]):
+            if entrada is not None and entrada[0] == chave:
+                self.acertos += 1
+                return entrada
+        return None
+
+    def guardar(self, chave, profundidade, valor, tipo, melhor):
+        posicao = (chave % self.baldes) * 2
+        preferida = self.tabela[posicao]
+        entrada = (chave, profundidade, valor, tipo, melhor)
+        if preferida is None or preferida[0] == chave or profundidade >= preferida[1]:
+            self.tabela[posicao] = entrada
+        else:
+            self.tabela[posicao + 1] = entrada
+
+    def taxa_acerto(self):
+        return self.acertos / self.consultas if self.consultas else 0.0
+
+def avaliar(estado, jogador):
+    """Avaliação estática do ponto de vista de `jogador`: material, mobilidade e ameaças de captura."""
+    proprias, adversarias = estado.pecas(jogador)
+    vazias = ~(proprias | adversarias)
+    valor = 100 * (bin(proprias).count("1") - bin(adversarias).count("1"))
+    if estado.fase == "movimentacao":
+        valor += 4 * (bin(dilatar(proprias) & vazias).count("1") - bin(dilatar(adversarias) & vazias).count("1"))
+        if existe_captura_bits(proprias, adversarias):
+            valor += 30 if estado.jogador == jogador else 10
+        if existe_captura_bits(adversarias, proprias):
+            valor -= 30 if estado.jogador != jogador else 10
+        if bloqueado_bits(adversarias, proprias):
+            valor += 40
+    else:
+        valor += 3 * (bin(proprias & VIZINHOS[INDICE_CENTRO]).count("1") - bin(adversarias & VIZINHOS[INDICE_CENTRO]).count("1"))
+    if proprias & CENTRO:
+        valor += 5
+    return valor
+
+def _ordenar(jogadas, melhor):
+    """Coloca a melhor jogada da tabela primeiro e em seguida as capturas, das maiores para as menores."""
+    def chave(jogada):
+        if jogada == melhor:
+            return -100
+        if jogada[0] == MOVER:
+            return -bin(jogada[3]).count("1")
+        return 0
+    return sorted(jogadas, key=chave)
+
+def _valor_para_tabela(valor, ply):
+    """Guarda vitórias forçadas como distância a partir do nó, que não depende do caminho até ele."""
+    if valor >= LIMIAR_VITORIA:
+        return valor + ply
+    if valor <= -LIMIAR_VITORIA:
+        return valor - ply
+    return valor
+
+def _valor_da_tabela(valor, ply):
+    """Inverso de `_valor_para_tabela`: volta a contar a distância a partir da raiz."""
+    if valor >= LIMIAR_VITORIA:
+        return valor - ply
+    if valor <= -LIMIAR_VITORIA:
+        return valor + ply
+    return valor
+
+class BuscaAlfaBeta:
+    def __init__(self, tempo_por_jogada=1.0, profundidade_maxima=32, entradas_tabela=1 << 18, tablebase=None):
+        """`tablebase` (tablebase.Tablebase) dá o valor exato dos finais com poucas peças, sem busca."""
+        self.tempo_por_jogada = tempo_por_jogada
+        self.profundidade_maxima = profundidade_maxima
+        self.tablebase = tablebase
+        self.zobrist = Zobrist()
+        self.tabela = TabelaTransposicao(entradas_tabela)
+        self.estatisticas = {}
+
+    def escolher(self, estado, excluir=()):
+        """Escolhe uma jogada para o jogador da vez, respeitando estritamente o tempo por jogada.
+
+        As jogadas em `excluir` (por exemplo, recusadas pelo servidor) não são consideradas.
+        """
+        jogadas = [jogada for jogada in estado.jogadas() if jogada not in excluir]
+        if not jogadas:
+            return None
+        if not excluir and self.tablebase is not None and self.tablebase.consultar(estado) is not None:
+            inicio = time.perf_counter()
+            jogada = self.tablebase.melhor_jogada(estado)
+            self.estatisticas = {"profundidade": 0, "valor": None, "nos": 0, "tempo": time.perf_counter() - inicio,
+                                 "nos_por_segundo": 0.0, "acertos_tabela": 0.0, "tablebase": True}
+            return jogada
+        self.inicio = time.perf_counter()
+        self.limite = self.inicio + self.tempo_por_jogada
+        self.nos = 0
+        self.raiz = estado.jogador
+        consultas_antes, acertos_antes = self.tabela.consultas, self.tabela.acertos
+
+        melhor, valor, profundidade_completa = jogadas[0], None, 0
+        for profundidade in range(1, self.profundidade_maxima + 1):
+            try:
+                valor_iteracao, jogada = self._raiz(estado, jogadas, profundidade)
+            except _TempoEsgotado:
+                break
+            melhor, valor, profundidade_completa = jogada, valor_iteracao, profundidade
+            if abs(valor) >= LIMIAR_VITORIA:
+                break
+
+        duracao = time.perf_counter() - self.inicio
+        consultas = self.tabela.consultas - consultas_antes
+        self.estatisticas = {
+            "profundidade": profundidade_completa,
+            "valor": valor,
+            "nos": self.nos,
+            "tempo": duracao,
+            "nos_por_segundo": self.nos / duracao if duracao > 0 else 0.0,
+            "acertos_tabela": (self.tabela.acertos - acertos_antes) / consultas if consultas else 0.0,
+            "tablebase": False,
+        }
+        return melhor
+
+    def _raiz(self, estado, jogadas, profundidade):
+        entrada = self.tabela.buscar(self.zobrist.hash(estado))
+        jogadas = _ordenar(jogadas, entrada[4] if entrada else None)
+        melhor_valor, melhor = -INFINITO, jogadas[0]
+        alfa, beta = -INFINITO, INFINITO
+        for jogada in jogadas:
+            valor = self._alfabeta(estado.aplicar(jogada), profundidade - 1, alfa, beta, 1)
+            if valor > melhor_valor:
+                melhor_valor, melhor = valor, jogada
+            alfa = max(alfa, valor)
+        self.tabela.guardar(self.zobrist.hash(estado), profundidade, melhor_valor, EXATO, melhor)
+        return melhor_valor, melhor
+
+    def _alfabeta(self, estado, profundidade, alfa, beta, ply):
+        """Minimax com poda alfa-beta; valores sempre do ponto de vista do jogador da raiz.
+
+        Não é negamax porque o mesmo jogador pode jogar duas vezes seguidas (colocação, capturas em cadeia, remoções).
+        """
+        self.nos += 1
+        if self.nos & 1023 == 0 and time.perf_counter() > self.limite:
+            raise _TempoEsgotado()
+
+        if estado.vencedor is not None:
+            return VITORIA - ply if estado.vencedor == self.raiz else -(VITORIA - ply)
+        if self.tablebase is not None:
+            consulta = self.tablebase.consultar(estado)
+            if consulta is not None:
+                resultado, distancia = consulta
+                valor = resultado * (VITORIA - ply - distancia)
+                return valor if estado.jogador == self.raiz else -valor
+        if profundidade <= 0:
+            return avaliar(estado, self.raiz)
+
+        alfa_original, beta_original = alfa, beta
+        chave = self.zobrist.hash(estado)
+        entrada = self.tabela.buscar(chave)
+        melhor_tabela = None
+        if entrada is not None:
+            melhor_tabela = entrada[4]
+            if entrada[1] >= profundidade:
+                _, _, valor, tipo, _ = entrada
+                valor = _valor_da_tabela(valor, ply)
+                if tipo == EXATO:
+                    return valor
+                if tipo == LIMITE_INFERIOR:
+                    alfa = max(alfa, valor)
+                elif tipo == LIMITE_SUPERIOR:
+                    beta = min(beta, valor)
+                if alfa >= beta:
+                    return valor
+
+        jogadas = estado.jogadas()
+        if not jogadas:
+            return avaliar(estado, self.raiz)
+
+        maximizando = estado.jogador == self.raiz
+        melhor_valor = -INFINITO if maximizando else INFINITO
+        melhor = None
+        for jogada in _ordenar(jogadas, melhor_tabela):
+            valor = self._alfabeta(estado.aplicar(jogada), profundidade - 1, alfa, beta, ply + 1)
+            if maximizando:
+                if valor > melhor_valor:
+                    melhor_valor, melhor = valor, jogada
+                alfa = max(alfa, valor)
+            else:
+                if valor < melhor_valor:
+                    melhor_valor, melhor = valor, jogada
+                beta = min(beta, valor)
+            if alfa >= beta:
+                break
+
+        if melhor_valor <= alfa_original:
+            tipo = LIMITE_SUPERIOR
+        elif melhor_valor >= beta_original:
+            tipo = LIMITE_INFERIOR
+        else:
+            tipo = EXATO
+        self.tabela.guardar(chave, profundidade, _valor_para_tabela(melhor_valor, ply), tipo, melhor)
+        return melhor_valor
+
+class JogadorIA:
+    """Joga uma partida do servidor como jogador 1 ou 2, em uma thread própria.
+
+    O estado é copiado com o lock da partida e a busca roda sem o lock, então o tempo de busca nunca bloqueia a partida.
+    """
+
+    def __init__(self, partida, player_id, tempo_por_jogada=1.0, ativa=lambda: True, tablebase=None):
+        self.partida = partida
+        self.player_id = player_id
+        self.busca = BuscaAlfaBeta(tempo_por_jogada, tablebase=tablebase)
+        self.ativa = ativa
+        self.thread = threading.Thread(target=self._jogar, daemon=True,
+                                       name=f"ia-{partida.match_id}-{player_id}")
+
+    def iniciar(self):
+        self.thread.start()
+
+    def _jogar(self):
+        versao = -1
+        esperar = True
+        recusadas, posicao = set(), None  # jogadas recusadas pelo servidor na posição `posicao`
+        while self.ativa():
+            with self.partida.mudou:
+                if esperar:
+                    self.partida.mudou.wait_for(lambda: self.partida.versao != versao, 5.0)
+                esperar = True
+                versao = self.partida.versao
+                if self.partida.vencedor is not None:
+                    return
+                if self.partida.jogador_atual != self.player_id or not all(self.partida.conexoes.values()):
+                    continue
+                estado = EstadoSeega.de_partida(self.partida)
+
+            chave = self.busca.zobrist.hash(estado)
+            if chave != posicao:
+                recusadas, posicao = set(), chave
+            jogada = self.busca.escolher(estado, excluir=recusadas)
+            if jogada is None:
+                if recusadas:
+                    print(f"[-] IA da partida {self.partida.match_id}: o servidor recusou todas as jogadas; a IA parou.")
+                    return
+                continue
+            metodo, argumentos = descrever_jogada(jogada)
+            if not getattr(self.partida, metodo)(self.player_id, *argumentos):
+                print(f"[-] IA da partida {self.partida.match_id}: jogada recusada {metodo}{argumentos}.")
+                # tenta outra jogada na mesma posição, sem esperar a versão mudar
+                recusadas.add(jogada)
+                esperar = False
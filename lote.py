@@ -0,0 +1,149 @@
+"""Avaliação em lote de muitas posições de Seega com NumPy.
+
+Todas as funções recebem um array (N, n, n) de int8 (0 vazio, 1 e 2 jogadores) e operam sobre as N
+posições de uma vez, sem laço Python por tabuleiro. O lado n vem do próprio array (5, 7 ou 9). Os
+resultados coincidem com as funções de `game_logic.py` aplicadas a cada tabuleiro.
+"""
+
+import numpy as np
+
+from game_logic import TABULEIRO_TAMANHO
+
+N = TABULEIRO_TAMANHO
+BORDA = 2
+DIRECOES = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)])
+
+_CENTROS = {}
+
+def _centro(n):
+    """Máscara (n, n) da casa central, criada uma vez por tamanho."""
+    centro = _CENTROS.get(n)
+    if centro is None:
+        centro = _CENTROS[n] = np.zeros((n, n), dtype=bool)
+        centro[n // 2, n // 2] = True
+    return centro
+
+def _como_lote(tabuleiros):
+    tabuleiros = np.asarray(tabuleiros, dtype=np.int8)
+    if tabuleiros.ndim == 2:
+        tabuleiros = tabuleiros[None]
+    return tabuleiros
+
+def _jogadores(jogador, quantidade):
+    """Aceita um jogador para todo o lote ou um array (N,) com o jogador de cada tabuleiro."""
+    return np.broadcast_to(np.asarray(jogador, dtype=np.int8), (quantidade,)).reshape(-1, 1, 1)
+
+def _com_borda(mascara, valor=False):
+    return np.pad(mascara, ((0, 0), (BORDA, BORDA), (BORDA, BORDA)), constant_values=valor)
+
+def _vizinho(com_borda, dl, dc, passos=1):
+    """Para cada casa (l, c), o valor da casa (l + passos*dl, c + passos*dc) no array com borda."""
+    n = com_borda.shape[1] - 2 * BORDA
+    l0 = BORDA + passos * dl
+    c0 = BORDA + passos * dc
+    return com_borda[:, l0:l0 + n, c0:c0 + n]
+
+def _mascaras(tabuleiros, jogador):
+    tabuleiros = _como_lote(tabuleiros)
+    j = _jogadores(jogador, len(tabuleiros))
+    proprias = tabuleiros == j
+    adversarias = (tabuleiros != 0) & ~proprias
+    vazias = tabuleiros == 0
+    return tabuleiros, proprias, adversarias, vazias
+
+def _capturas_por_chegada(proprias, adversarias):
+    """(N, n, n, 4): se uma peça que chega na casa captura na direção d (nunca a casa central)."""
+    adversarias_borda = _com_borda(adversarias & ~_centro(adversarias.shape[1]))
+    proprias_borda = _com_borda(proprias)
+    return np.stack([
+        _vizinho(adversarias_borda, dl, dc) & _vizinho(proprias_borda, dl, dc, 2)
+        for dl, dc in DIRECOES
+    ], axis=-1)
+
+def _movimentos_simples(proprias, vazias):
+    """(N, n, n, 4): se a peça da casa pode andar uma casa na direção d."""
+    vazias_borda = _com_borda(vazias)
+    return np.stack([proprias & _vizinho(vazias_borda, dl, dc) for dl, dc in DIRECOES], axis=-1)
+
+def _captura_ao_mover(captura_chegada):
+    """(N, n, n, 4): se mover a peça da casa na direção d captura algo, a partir das capturas por casa de chegada."""
+    alguma = _com_borda(captura_chegada.any(axis=-1))
+    return np.stack([_vizinho(alguma, dl, dc) for dl, dc in DIRECOES], axis=-1)
+
+def vitorias(tabuleiros, jogador):
+    """Equivalente a `verificar_vitoria` para cada tabuleiro: (N,) bool."""
+    _, _, adversarias, _ = _mascaras(tabuleiros, jogador)
+    return ~adversarias.any(axis=(1, 2))
+
+def bloqueados(tabuleiros, jogador):
+    """Equivalente a `jogador_esta_bloqueado` para cada tabuleiro: (N,) bool."""
+    _, proprias, _, vazias = _mascaras(tabuleiros, jogador)
+    return ~_movimentos_simples(proprias, vazias).any(axis=(1, 2, 3))
+
+def existe_captura(tabuleiros, jogador):
+    """Equivalente a `existe_captura_com_movimento` para cada tabuleiro: (N,) bool."""
+    _, proprias, adversarias, vazias = _mascaras(tabuleiros, jogador)
+    movimentos = _movimentos_simples(proprias, vazias)
+    capturas = _captura_ao_mover(_capturas_por_chegada(proprias, adversarias))
+    return (movimentos & capturas).any(axis=(1, 2, 3))
+
+def mascaras_movimentos(tabuleiros, jogador, jogador_peca_central=None, turnos_peca_central=None):
+    """Máscaras (N, n, n, 4) das jogadas legais: casa de origem e direção (cima, baixo, esquerda, direita).
+
+    Aplica a captura obrigatória e, se os arrays (N,) do estado da peça central forem informados, a regra dos
+    3 turnos, como `movimentos_legais`. Tabuleiros em modo de remoção ficam com a máscara toda falsa.
+    """
+    tabuleiros, proprias, adversarias, vazias = _mascaras(tabuleiros, jogador)
+    movimentos = _movimentos_simples(proprias, vazias)
+    capturas = movimentos & _captura_ao_mover(_capturas_por_chegada(proprias, adversarias))
+    ha_captura = capturas.any(axis=(1, 2, 3))
+
+    meio = tabuleiros.shape[1] // 2
+    if jogador_peca_central is not None:
+        jogadores = _jogadores(jogador, len(tabuleiros))[:, 0, 0]
+        regra_central = ((tabuleiros[:, meio, meio] == jogadores) &
+                         (np.asarray(jogador_peca_central) == jogadores) &
+                         (np.asarray(turnos_peca_central) >= 3))
+    else:
+        regra_central = np.zeros(len(tabuleiros), dtype=bool)
+
+    do_centro = movimentos & _centro(tabuleiros.shape[1])[None, :, :, None]
+    return np.where(regra_central[:, None, None, None], do_centro,
+                    np.where(ha_captura[:, None, None, None], capturas, movimentos))
+
+def realizar_movimentos_com_captura(tabuleiros, jogador, movimentos):
+    """Aplica um movimento por tabuleiro e resolve as capturas, como `realizar_movimento` seguido de
+    `verificar_e_realizar_capturas`.
+
+    `movimentos` é um array (N, 4) de (linha_origem, coluna_origem, linha_destino, coluna_destino).
+    Retorna (novos tabuleiros, máscara (N, n, n) das peças capturadas, capturou (N,) bool).
+    """
+    tabuleiros = _como_lote(tabuleiros)
+    movimentos = np.asarray(movimentos, dtype=np.intp)
+    indices = np.arange(len(tabuleiros))
+    lo, co, ld, cd = movimentos.T
+
+    novos = tabuleiros.copy()
+    pecas = novos[indices, lo, co]
+    novos[indices, ld, cd] = pecas
+    novos[indices, lo, co] = 0
+
+    _, proprias, adversarias, _ = _mascaras(novos, jogador)
+    adversarias_borda = _com_borda(adversarias & ~_centro(novos.shape[1]))
+    proprias_borda = _com_borda(proprias)
+    capturadas = np.zeros(tabuleiros.shape, dtype=bool)
+    for dl, dc in DIRECOES:
+        l_adj, c_adj = ld + dl, cd + dc
+        captura = (adversarias_borda[indices, l_adj + BORDA, c_adj + BORDA] &
+                   proprias_borda[indices, ld + 2 * dl + BORDA, cd + 2 * dc + BORDA])
+        alvo = indices[captura]
+        capturadas[alvo, l_adj[captura], c_adj[captura]] = True
+
+    novos[capturadas] = 0
+    return novos, capturadas, capturadas.any(axis=(1, 2))
+
+def tabuleiros_aleatorios(quantidade, densidade=0.7, semente=0, tamanho=N):
+    """Gera tabuleiros aleatórios (N, tamanho, tamanho), úteis para testes e benchmarks."""
+    rng = np.random.default_rng(semente)
+    ocupadas = rng.random((quantidade, tamanho, tamanho)) < densidade
+    return np.where(ocupadas, rng.integers(1, 3, (quantidade, tamanho, tamanho)), 0).astype(np.int8)
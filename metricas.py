@@ -0,0 +1,303 @@
+"""Instrumentação do servidor: latência por método RPC, espera e posse de locks, bytes trafegados e um
+perfilador por amostragem opcional.
+
+Os contadores ficam em estruturas por thread e só são somados na leitura, então o caminho das requisições
+não disputa nenhum lock para registrar métricas.
+"""
+
+from collections import Counter
+import sys
+import threading
+import time
+
+BALDES = 26  # histograma em potências de 2 de microssegundos: 1 us até ~33 s
+
+def _balde(segundos):
+    return min(int(segundos * 1e6).bit_length(), BALDES - 1)
+
+def _limite_balde(indice):
+    """Limite superior do balde em milissegundos."""
+    return (1 << indice) / 1000.0
+
+def _para_rpc(valor):
+    """Inteiros do XML-RPC têm 32 bits; contadores maiores seguem como float."""
+    return valor if valor < 2 ** 31 else float(valor)
+
+class _Metodo:
+    __slots__ = ("chamadas", "erros", "latencia", "hist_latencia", "espera", "hist_espera", "posse",
+                 "bytes_entrada", "bytes_saida")
+
+    def __init__(self):
+        self.chamadas = 0
+        self.erros = 0
+        self.latencia = 0.0
+        self.hist_latencia = [0] * BALDES
+        self.espera = 0.0
+        self.hist_espera = [0] * BALDES
+        self.posse = 0.0
+        self.bytes_entrada = 0
+        self.bytes_saida = 0
+
+    def somar(self, outro):
+        self.chamadas += outro.chamadas
+        self.erros += outro.erros
+        self.latencia += outro.latencia
+        self.espera += outro.espera
+        self.posse += outro.posse
+        self.bytes_entrada += outro.bytes_entrada
+        self.bytes_saida += outro.bytes_saida
+        for i in range(BALDES):
+            self.hist_latencia[i] += outro.hist_latencia[i]
+            self.hist_espera[i] += outro.hist_espera[i]
+
+def _percentil(histograma, p):
+    total = sum(histograma)
+    if not total:
+        return 0.0
+    alvo = total * p / 100.0
+    acumulado = 0
+    for indice, quantidade in enumerate(histograma):
+        acumulado += quantidade
+        if acumulado >= alvo:
+            return _limite_balde(indice)
+    return _limite_balde(BALDES - 1)
+
+class Metricas:
+    def __init__(self):
+        self._local = threading.local()
+        self._registro = threading.Lock()
+        self._por_thread = []
+        self.metodo_por_thread = {}
+        self.inicio = time.time()
+        self._perfilador = None
+
+    def _contadores(self):
+        contadores = getattr(self._local, "contadores", None)
+        if contadores is None:
+            contadores = self._local.contadores = {}
+            with self._registro:
+                self._por_thread.append(contadores)
+        return contadores
+
+    # Ciclo de uma requisição: iniciar -> definir_metodo -> (locks) -> finalizar.
+
+    def iniciar(self):
+        local = self._local
+        local.metodo = None
+        local.espera = 0.0
+        local.esperas = 0
+        local.posse = 0.0
+        local.inicio = time.perf_counter()
+
+    def definir_metodo(self, metodo):
+        if getattr(self._local, "metodo", 1) is None:
+            self._local.metodo = metodo
+            self.metodo_por_thread[threading.get_ident()] = metodo
+
+    def registrar_erro(self):
+        self._local.erro = True
+
+    def finalizar(self, bytes_entrada, bytes_saida):
+        local = self._local
+        duracao = time.perf_counter() - local.inicio
+        metodo = local.metodo or "(inválido)"
+        local.metodo = None
+        self.metodo_por_thread.pop(threading.get_ident(), None)
+        contadores = self._contadores()
+        dados = contadores.get(metodo)
+        if dados is None:
+            dados = contadores[metodo] = _Metodo()
+        dados.chamadas += 1
+        if getattr(local, "erro", False):
+            dados.erros += 1
+            local.erro = False
+        dados.latencia += duracao
+        dados.hist_latencia[_balde(duracao)] += 1
+        dados.espera += local.espera
+        if local.esperas:
+            dados.hist_espera[_balde(local.espera)] += 1
+        dados.posse += local.posse
+        dados.bytes_entrada += bytes_entrada
+        dados.bytes_saida += bytes_saida
+
+    def registrar_lock(self, espera, posse):
+        """Chamado pelos locks instrumentados; só conta dentro de uma requisição RPC."""
+        local = self._local
+        if getattr(local, "metodo", None) is not None:
+            local.espera += espera
+            local.esperas += 1
+            local.posse += posse
+
+    def _somar(self):
+        with self._registro:
+            tabelas = list(self._por_thread)
+        total = {}
+        for contadores in tabelas:
+            for metodo, dados in list(contadores.items()):
+                total.setdefault(metodo, _Metodo()).somar(dados)
+        return total
+
+    def obter(self):
+        """Resumo por método: chamadas, erros, latência (média e percentis), espera/posse de lock e bytes."""
+        resumo = {}
+        for metodo, dados in sorted(self._somar().items()):
+            chamadas = dados.chamadas or 1
+            resumo[metodo] = {
+                "chamadas": _para_rpc(dados.chamadas),
+                "erros": _para_rpc(dados.erros),
+                "latencia_media_ms": dados.latencia / chamadas * 1000,
+                "latencia_p50_ms": _percentil(dados.hist_latencia, 50),
+                "latencia_p95_ms": _percentil(dados.hist_latencia, 95),
+                "latencia_p99_ms": _percentil(dados.hist_latencia, 99),
+                "espera_lock_media_ms": dados.espera / chamadas * 1000,
+                "espera_lock_p99_ms": _percentil(dados.hist_espera, 99),
+                "posse_lock_media_ms": dados.posse / chamadas * 1000,
+                "bytes_entrada": _para_rpc(dados.bytes_entrada),
+                "bytes_saida": _para_rpc(dados.bytes_saida),
+            }
+        return {"desde": self.inicio, "metodos": resumo}
+
+    def exportar_texto(self):
+        """Exporta as métricas em texto, no formato de exposição do Prometheus."""
+        linhas = []
+        for metodo, dados in sorted(self._somar().items()):
+            rotulo = f'{{metodo="{metodo}"}}'
+            linhas.append(f"seega_rpc_chamadas_total{rotulo} {dados.chamadas}")
+            linhas.append(f"seega_rpc_erros_total{rotulo} {dados.erros}")
+            linhas.append(f"seega_rpc_latencia_segundos_soma{rotulo} {dados.latencia:.6f}")
+            acumulado = 0
+            for indice, quantidade in enumerate(dados.hist_latencia):
+                acumulado += quantidade
+                if quantidade:
+                    limite = _limite_balde(indice) / 1000.0
+                    linhas.append(f'seega_rpc_latencia_segundos_bucket{{metodo="{metodo}",le="{limite:g}"}} {acumulado}')
+            linhas.append(f'seega_rpc_latencia_segundos_bucket{{metodo="{metodo}",le="+Inf"}} {dados.chamadas}')
+            linhas.append(f"seega_lock_espera_segundos_soma{rotulo} {dados.espera:.6f}")
+            linhas.append(f"seega_lock_posse_segundos_soma{rotulo} {dados.posse:.6f}")
+            linhas.append(f"seega_rpc_bytes_entrada_total{rotulo} {dados.bytes_entrada}")
+            linhas.append(f"seega_rpc_bytes_saida_total{rotulo} {dados.bytes_saida}")
+        return "\n".join(linhas) + "\n"
+
+    def definir_perfilador(self, ativo, intervalo_ms=5, metodo="move_piece"):
+        """Liga ou desliga o perfilador por amostragem das threads que estão atendendo `metodo`."""
+        if self._perfilador is not None:
+            self._perfilador.parar()
+            self._perfilador = None
+        if ativo:
+            self._perfilador = PerfiladorAmostragem(self, intervalo_ms / 1000.0, metodo)
+            self._perfilador.iniciar()
+        return True
+
+    def obter_perfil(self, limite=20):
+        """As pilhas mais amostradas (da chamada mais interna para fora) e quantas vezes apareceram."""
+        perfilador = self._perfilador
+        if perfilador is None:
+            return {"ativo": False, "amostras": 0, "pilhas": []}
+        return {
+            "ativo": True,
+            "amostras": perfilador.amostras,
+            "pilhas": [[pilha, contagem] for pilha, contagem in perfilador.contagens.most_common(limite)],
+        }
+
+class PerfiladorAmostragem:
+    def __init__(self, metricas, intervalo, metodo, profundidade=12):
+        self.metricas = metricas
+        self.intervalo = intervalo
+        self.metodo = metodo
+        self.profundidade = profundidade
+        self.contagens = Counter()
+        self.amostras = 0
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._amostrar, daemon=True, name="perfilador")
+
+    def iniciar(self):
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            quadros = sys._current_frames()
+            for ident, metodo in list(self.metricas.metodo_por_thread.items()):
+                quadro = quadros.get(ident)
+                if metodo != self.metodo or quadro is None:
+                    continue
+                pilha = []
+                while quadro is not None and len(pilha) < self.profundidade:
+                    codigo = quadro.f_code
+                    pilha.append(f"{codigo.co_filename.rsplit('/', 1)[-1]}:{quadro.f_lineno} {codigo.co_name}")
+                    quadro = quadro.f_back
+                self.contagens[" <- ".join(pilha)] += 1
+                self.amostras += 1
+
+class LockInstrumentado:
+    """Lock com a mesma interface de threading.Lock que mede o tempo de espera e de posse."""
+
+    __slots__ = ("_lock", "_metricas", "_adquirido_em", "_espera")
+
+    def __init__(self, metricas):
+        self._lock = threading.Lock()
+        self._metricas = metricas
+        self._adquirido_em = 0.0
+        self._espera = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        inicio = time.perf_counter()
+        adquirido = self._lock.acquire(blocking, timeout)
+        if adquirido:
+            self._adquirido_em = time.perf_counter()
+            self._espera = self._adquirido_em - inicio
+        return adquirido
+
+    def release(self):
+        posse = time.perf_counter() - self._adquirido_em
+        espera = self._espera
+        self._lock.release()
+        self._metricas.registrar_lock(espera, posse)
+
+    def locked(self):
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+
+class DespachoInstrumentado:
+    """Mixin para SimpleXMLRPCDispatcher que registra cada requisição nas métricas."""
+
+    metricas = None
+
+    def _marshaled_dispatch(self, data, dispatch_method=None, path=None):
+        self.metricas.iniciar()
+        resposta = b""
+        try:
+            resposta = super()._marshaled_dispatch(data, dispatch_method, path)
+            return resposta
+        finally:
+            self.metricas.finalizar(len(data), len(resposta))
+
+    def _dispatch(self, method, params):
+        self.metricas.definir_metodo(method)
+        try:
+            return super()._dispatch(method, params)
+        except Exception:
+            self.metricas.registrar_erro()
+            raise
+
+METRICAS = Metricas()
+
+def novo_lock():
+    """Lock usado pelo servidor e pelas partidas, instrumentado com as métricas globais."""
+    return LockInstrumentado(METRICAS)
+
+def registrar_funcoes(servidor, metricas=METRICAS):
+    """Registra get_metrics, get_metrics_text e get_profile no servidor RPC."""
+    servidor.register_function(metricas.obter, "get_metrics")
+    servidor.register_function(metricas.exportar_texto, "get_metrics_text")
+    servidor.register_function(metricas.obter_perfil, "get_profile")
+
+def registrar_funcoes_admin(servidor, metricas=METRICAS):
+    """Registra set_profiler, que muda o comportamento do servidor, no endpoint de administração."""
+    servidor.register_function(metricas.definir_perfilador, "set_profiler")
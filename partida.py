@@ -0,0 +1,529 @@
+from collections import deque
+import threading
+import time
+
+from diario import CHAT, COLOCAR, DESISTIR, ENTRAR, MOVER, REMOVER
+import game_logic
+from metricas import novo_lock
+
+TIMEOUT_MAXIMO_ESPERA = 25.0
+CAPACIDADE_CHAT = 200
+LIMITE_CHAT_POR_CONSULTA = 100
+TAMANHO_MAXIMO_MENSAGEM = 500  # caracteres; em UTF-8 cabe folgado no tamanho u16 do texto no diário
+# Intervalo sugerido (ms) entre o início de uma consulta de estado e o da próxima, com o servidor folgado. Cada
+# nível de carga (admissao.ControleAdmissao.nivel_carga) dobra o intervalo, até INTERVALO_POLL_MAXIMO_MS.
+INTERVALO_POLL_MS = {"encerrada": 5000, "aguardando": 1000, "seu_turno": 1000, "colocacao": 100, "movimentacao": 250}
+INTERVALO_POLL_MAXIMO_MS = 10000
+
+def proximo_poll_ms(dados, seu_turno, nivel_carga=0):
+    """Intervalo sugerido ao jogador até a próxima consulta de estado.
+
+    Na vez do adversário o estado muda logo; na vez do próprio jogador, só muda quando ele joga (e a jogada já
+    devolve o estado novo); partidas encerradas ou à espera do segundo jogador quase não mudam.
+    """
+    if dados["vencedor"] is not None:
+        situacao = "encerrada"
+    elif dados["jogadores"] < 2:
+        situacao = "aguardando"
+    elif seu_turno:
+        situacao = "seu_turno"
+    else:
+        situacao = dados["fase"]
+    return min(INTERVALO_POLL_MS[situacao] << nivel_carga, INTERVALO_POLL_MAXIMO_MS)
+
+class EstadoPublico:
+    """Estado de uma versão da partida, publicado a cada mudança. Nunca muda depois de criado.
+
+    `dados` é o que os espectadores veem; `do_jogador` deriva dele a resposta de cada jogador. Cada protocolo
+    codifica um estado uma única vez (`codificado`) e entrega os mesmos bytes a todos que o pedem.
+    """
+
+    __slots__ = ("versao", "dados", "codificacoes", "modo_remocao", "jogadores")
+
+    def __init__(self, versao, dados, modo_remocao=(False, False)):
+        self.versao = versao
+        self.dados = dados
+        self.codificacoes = {}
+        self.modo_remocao = modo_remocao
+        self.jogadores = {}
+
+    def codificado(self, formato, codificar):
+        """Bytes do estado no `formato`, gerados por `codificar(dados)` apenas na primeira vez."""
+        resultado = self.codificacoes.get(formato)
+        if resultado is None:
+            # Duas threads podem codificar ao mesmo tempo; os resultados são iguais, então tanto faz qual fica.
+            resultado = self.codificacoes[formato] = codificar(self.dados)
+        return resultado
+
+    def do_jogador(self, player_id, erro=None, nivel_carga=0):
+        """Estado visto pelo jogador, com o intervalo sugerido até a próxima consulta ajustado ao `nivel_carga`.
+
+        Sem mensagem de erro, o EstadoPublico fica guardado (por jogador e nível de carga) para os próximos pedidos;
+        com ela, é um novo a cada chamada, já que a mensagem é entregue uma vez só.
+        """
+        chave = (player_id, nivel_carga)
+        if erro is None:
+            estado = self.jogadores.get(chave)
+            if estado is not None:
+                return estado
+        dados = dict(self.dados)
+        dados["seu_turno"] = self.dados["jogador_atual"] == player_id
+        dados["error"] = erro
+        dados["modo_remocao"] = player_id in (1, 2) and self.modo_remocao[player_id - 1]
+        dados["proximo_poll_ms"] = proximo_poll_ms(self.dados, dados["seu_turno"], nivel_carga)
+        estado = EstadoPublico(self.versao, dados)
+        if erro is None and player_id in (1, 2):
+            self.jogadores[chave] = estado
+        return estado
+
+class Partida:
+    def __init__(self, match_id, tamanho=game_logic.TABULEIRO_TAMANHO):
+        """Cria uma partida independente, com seu próprio lock e estado.
+
+        `tamanho` é o lado do tabuleiro (5, 7 ou 9); cada jogador coloca (tamanho² - 1) / 2 peças.
+        """
+        self.match_id = match_id
+        self.tamanho = tamanho
+        self.centro = tamanho // 2
+        self.pecas_por_jogador = game_logic.geometria(tamanho).pecas_por_jogador
+        self.lock = novo_lock()
+        self.mudou = threading.Condition(self.lock)
+        self.versao = 0
+        self.publico = None
+        self._lock_ouvintes = threading.Lock()
+        self._ouvintes = set()
+        self.diario = None
+        self.seq_diario = 0
+        self.reset_game()
+
+    def reset_game(self):
+        """Reseta todas as variáveis de estado para iniciar uma nova partida."""
+        with self.lock:
+            self.tabuleiro = game_logic.criar_tabuleiro(self.tamanho)
+            self.jogador_atual = 1
+            self.fase = "colocacao"
+            self.pecas_colocadas = {1: 0, 2: 0}
+            self.pecas_turno_atual = {1: 0, 2: 0}
+            self.ultimo_jogador_colocou = None
+            self.vencedor = None
+            self.chat_log = deque(maxlen=CAPACIDADE_CHAT)
+            self.chat_publico = ()
+            self.chat_seq = 0
+            self.conexoes = {1: False, 2: False}
+            self.mensagens_erro = {}
+            self.modo_remocao = {1: False, 2: False}
+            self.turnos_peca_central = 0
+            self.jogador_peca_central = None
+            self.ultima_atividade = time.monotonic()
+            self.finalizada_em = None
+            self._alterar()
+
+    def _alterar(self):
+        """Avança a versão do estado, publica o novo EstadoPublico e acorda quem espera. Deve ser chamada com o lock.
+
+        Os leitores (get_state, wait_state, watch_match, get_chat, resumo) só leem o estado publicado, sem o lock.
+        """
+        self.versao += 1
+        self.publico = EstadoPublico(self.versao, {
+            "versao": self.versao,
+            "alterado": True,
+            "tabuleiro": [linha[:] for linha in self.tabuleiro],
+            "jogador_atual": self.jogador_atual,
+            "fase": self.fase,
+            "pecas_no_turno": self.pecas_turno_atual[self.jogador_atual],
+            "vencedor": self.vencedor,
+            "chat_seq": self.chat_seq,
+            "jogadores": self.conexoes[1] + self.conexoes[2],
+        }, (self.modo_remocao[1], self.modo_remocao[2]))
+        # Os leitores esperam pelos ouvintes, e não pela Condition, para nunca tomarem o lock da partida.
+        with self._lock_ouvintes:
+            ouvintes, self._ouvintes = self._ouvintes, set()
+        for avisar in ouvintes:
+            avisar()
+        self.mudou.notify_all()
+
+    def inscrever(self, since_version, avisar):
+        """Pede que `avisar()` seja chamada uma vez, quando a versão publicada passar de `since_version`.
+
+        Retorna False, sem inscrever, se ela já passou. `avisar` roda na thread que altera a partida, com o lock
+        dela, então só deve acordar quem espera. Com isso um servidor assíncrono espera sem uma thread parada.
+        """
+        with self._lock_ouvintes:
+            if self.publico.versao != since_version:
+                return False
+            self._ouvintes.add(avisar)
+            return True
+
+    def desinscrever(self, avisar):
+        """Cancela um `inscrever` cujo tempo de espera acabou."""
+        with self._lock_ouvintes:
+            self._ouvintes.discard(avisar)
+
+    def _erro(self, player_id, mensagem):
+        """Guarda uma mensagem de erro para o jogador.
+
+        A mensagem fica fora do estado publicado e não muda a versão, para uma jogada recusada não acordar o
+        adversário e os espectadores: é entregue uma única vez, na próxima leitura do próprio jogador.
+        """
+        self.mensagens_erro[player_id] = mensagem
+
+    def _entrar_em_modo_remocao(self, player_id):
+        """Marca o jogador como bloqueado, publicando a mudança só na primeira vez. Deve ser chamada com o lock."""
+        if not self.modo_remocao[player_id]:
+            self.modo_remocao[player_id] = True
+            self._alterar()
+
+    def _adicionar_chat(self, texto):
+        """Guarda uma mensagem no buffer circular do chat com o próximo número de sequência."""
+        self.chat_seq += 1
+        self.chat_log.append((self.chat_seq, texto))
+        self.chat_publico = tuple(self.chat_log)
+        self._alterar()
+
+    def _registrar(self, tipo, player_id, a=0, b=0, c=0, d=0, texto=""):
+        """Grava a ação aceita no diário, se houver um. Deve ser chamada com o lock, para manter a ordem das ações."""
+        if self.diario is not None:
+            self.seq_diario += 1
+            self.diario.registrar(self.match_id, self.seq_diario, tipo, player_id, a, b, c, d, texto)
+
+    def _finalizar(self, vencedor):
+        """Registra o vencedor e o instante do fim, usado pela coleta de partidas encerradas."""
+        self.vencedor = vencedor
+        self.finalizada_em = time.monotonic()
+
+    def exportar(self):
+        """Estado completo da partida em tipos simples (JSON), para snapshots e para mover a partida de processo."""
+        with self.lock:
+            return {
+                "match_id": self.match_id,
+                "tamanho": self.tamanho,
+                "versao": self.versao,
+                "seq_diario": self.seq_diario,
+                "tabuleiro": [linha[:] for linha in self.tabuleiro],
+                "jogador_atual": self.jogador_atual,
+                "fase": self.fase,
+                "pecas_colocadas": [self.pecas_colocadas[1], self.pecas_colocadas[2]],
+                "pecas_turno_atual": [self.pecas_turno_atual[1], self.pecas_turno_atual[2]],
+                "ultimo_jogador_colocou": self.ultimo_jogador_colocou,
+                "vencedor": self.vencedor,
+                "chat": [list(item) for item in self.chat_log],
+                "chat_seq": self.chat_seq,
+                "conexoes": [self.conexoes[1], self.conexoes[2]],
+                "modo_remocao": [self.modo_remocao[1], self.modo_remocao[2]],
+                "turnos_peca_central": self.turnos_peca_central,
+                "jogador_peca_central": self.jogador_peca_central,
+            }
+
+    @classmethod
+    def importar(cls, dados):
+        """Recria uma partida a partir do resultado de `exportar`."""
+        partida = cls(dados["match_id"], dados.get("tamanho", game_logic.TABULEIRO_TAMANHO))
+        with partida.lock:
+            partida.versao = dados["versao"]
+            partida.seq_diario = dados["seq_diario"]
+            partida.tabuleiro = game_logic.criar_tabuleiro(partida.tamanho)
+            for l, linha in enumerate(dados["tabuleiro"]):
+                for c, valor in enumerate(linha):
+                    partida.tabuleiro[l][c] = valor
+            partida.jogador_atual = dados["jogador_atual"]
+            partida.fase = dados["fase"]
+            partida.pecas_colocadas = {1: dados["pecas_colocadas"][0], 2: dados["pecas_colocadas"][1]}
+            partida.pecas_turno_atual = {1: dados["pecas_turno_atual"][0], 2: dados["pecas_turno_atual"][1]}
+            partida.ultimo_jogador_colocou = dados["ultimo_jogador_colocou"]
+            partida.chat_log.extend(tuple(item) for item in dados["chat"])
+            partida.chat_publico = tuple(partida.chat_log)
+            partida.chat_seq = dados["chat_seq"]
+            partida.conexoes = {1: dados["conexoes"][0], 2: dados["conexoes"][1]}
+            partida.modo_remocao = {1: dados["modo_remocao"][0], 2: dados["modo_remocao"][1]}
+            partida.turnos_peca_central = dados["turnos_peca_central"]
+            partida.jogador_peca_central = dados["jogador_peca_central"]
+            if dados["vencedor"] is not None:
+                partida._finalizar(dados["vencedor"])
+            partida._alterar()
+        return partida
+
+    def esta_cheia(self):
+        return self.conexoes[1] and self.conexoes[2]
+
+    def resumo(self):
+        """Informações públicas da partida, usadas na listagem do servidor."""
+        dados = self.publico.dados
+        return {
+            "match_id": self.match_id,
+            "tamanho": self.tamanho,
+            "jogadores": dados["jogadores"],
+            "fase": dados["fase"],
+            "vencedor": dados["vencedor"],
+        }
+
+    def register_player(self):
+        """Registra um novo jogador, atribuindo ID 1 ou 2. Retorna 0 se a partida estiver cheia."""
+        with self.lock:
+            self.ultima_atividade = time.monotonic()
+            if self.vencedor is not None:
+                return 0
+            if not self.conexoes[1]:
+                self.conexoes[1] = True; self._registrar(ENTRAR, 1); self._alterar(); print(f"[+] Partida {self.match_id}: Jogador 1 conectado."); return 1
+            elif not self.conexoes[2]:
+                self.conexoes[2] = True; self._registrar(ENTRAR, 2); self._alterar(); print(f"[+] Partida {self.match_id}: Jogador 2 conectado."); return 2
+            else:
+                print(f"[-] Partida {self.match_id}: tentativa de conexão recusada, partida cheia."); return 0
+
+    def _estado_jogador(self, player_id, publico, nivel_carga):
+        """Resposta de estado para um jogador a partir do estado publicado, consumindo sua mensagem de erro."""
+        self.ultima_atividade = time.monotonic()
+        # pop é atômico: se duas leituras do mesmo jogador correrem juntas, só uma recebe a mensagem.
+        return publico.do_jogador(player_id, self.mensagens_erro.pop(player_id, None), nivel_carga)
+
+    def get_state(self, player_id, nivel_carga=0):
+        """Método que o cliente chama para "puxar" o estado atual do jogo. Lê o estado publicado, sem o lock.
+
+        `proximo_poll_ms` na resposta é o intervalo sugerido até a próxima consulta; `nivel_carga` (0 a 3) é a
+        carga atual do servidor, que alonga esse intervalo.
+        """
+        return self._estado_jogador(player_id, self.publico, nivel_carga)
+
+    def wait_state(self, player_id, since_version, timeout, nivel_carga=0):
+        """Bloqueia até a versão do estado passar de `since_version` ou o tempo acabar, sem tomar o lock.
+
+        Sem mudança, retorna apenas {"alterado": False, "versao": ..., "proximo_poll_ms": ...}; caso contrário, o
+        estado completo. Nos dois casos, um EstadoPublico.
+        """
+        timeout = min(max(float(timeout), 0.0), TIMEOUT_MAXIMO_ESPERA)
+        self.ultima_atividade = time.monotonic()
+        publico = self._esperar_publico(since_version, timeout)
+        if publico.versao == since_version:
+            return EstadoPublico(publico.versao, {
+                "alterado": False, "versao": publico.versao,
+                "proximo_poll_ms": publico.do_jogador(player_id, None, nivel_carga).dados["proximo_poll_ms"]})
+        return self._estado_jogador(player_id, publico, nivel_carga)
+
+    def _esperar_publico(self, since_version, timeout):
+        """Estado publicado mais recente, esperando até `timeout` segundos se ele ainda for `since_version`."""
+        if timeout > 0:
+            aviso = threading.Event()
+            if self.inscrever(since_version, aviso.set) and not aviso.wait(timeout):
+                self.desinscrever(aviso.set)
+        return self.publico
+
+    def watch_match(self, since_version, timeout, ocupado=False):
+        """Estado público para espectadores, lido sem o lock da partida.
+
+        Espera até a versão passar de `since_version` ou o tempo acabar; sem mudança, retorna apenas
+        {"alterado": False, "versao": ...}, com "ocupado": True se `ocupado`. O estado é sempre um EstadoPublico,
+        que os servidores enviam já codificado.
+        """
+        timeout = min(max(float(timeout), 0.0), TIMEOUT_MAXIMO_ESPERA)
+        publico = self._esperar_publico(since_version, timeout)
+        if publico.versao == since_version:
+            dados = {"alterado": False, "versao": publico.versao}
+            if ocupado:
+                dados["ocupado"] = True
+            return EstadoPublico(publico.versao, dados)
+        return publico
+
+    def get_chat(self, player_id, after_seq, limit):
+        """Retorna até `limit` mensagens com sequência maior que `after_seq`, em ordem.
+
+        Mensagens mais antigas que a capacidade do buffer já foram descartadas; `primeiro_seq` indica a mais antiga disponível.
+        """
+        limit = min(max(int(limit), 0), LIMITE_CHAT_POR_CONSULTA)
+        chat = self.chat_publico
+        ultimo_seq = chat[-1][0] if chat else self.publico.dados["chat_seq"]
+        primeiro_seq = chat[0][0] if chat else ultimo_seq + 1
+        inicio = max(after_seq + 1 - primeiro_seq, 0)
+        return {
+            "mensagens": [list(item) for item in chat[inicio:inicio + limit]],
+            "primeiro_seq": primeiro_seq,
+            "ultimo_seq": ultimo_seq,
+        }
+
+    def send_chat_message(self, player_id, message):
+        """Adiciona uma mensagem ao log de chat da partida."""
+        with self.lock:
+            if not isinstance(message, str) or not message or len(message) > TAMANHO_MAXIMO_MENSAGEM:
+                self._erro(player_id, f"A mensagem deve ter de 1 a {TAMANHO_MAXIMO_MENSAGEM} caracteres.")
+                return False
+            self._registrar(CHAT, player_id, texto=message)
+            self._adicionar_chat(f"[Jogador {player_id}] {message}")
+        return True
+
+    def _validar_colocacao(self, player_id, linha, coluna):
+        """Retorna a mensagem de erro da colocação, ou None se ela for válida. Deve ser chamada com o lock."""
+        if self.fase != "colocacao" or player_id != self.jogador_atual:
+            return "Não é seu turno."
+        if not (0 <= linha < self.tamanho and 0 <= coluna < self.tamanho):
+            return "Posição fora do tabuleiro."
+        if game_logic.eh_casa_central(linha, coluna, self.tamanho) or self.tabuleiro[linha][coluna] != 0:
+            return "Posição inválida."
+        return None
+
+    def _colocar(self, player_id, linha, coluna):
+        """Coloca uma peça já validada e passa o turno após a segunda peça. Deve ser chamada com o lock."""
+        self._registrar(COLOCAR, player_id, linha, coluna)
+        self.tabuleiro[linha][coluna] = player_id
+        self.pecas_colocadas[player_id] = self.pecas_colocadas.get(player_id, 0) + 1
+        self.pecas_turno_atual[player_id] = self.pecas_turno_atual.get(player_id, 0) + 1
+        self.ultimo_jogador_colocou = player_id
+
+        if self.pecas_turno_atual[player_id] == 2:
+            self.pecas_turno_atual[player_id] = 0
+            if (self.pecas_colocadas.get(1, 0) >= self.pecas_por_jogador and
+                    self.pecas_colocadas.get(2, 0) >= self.pecas_por_jogador):
+                self.fase = "movimentacao"
+                self.jogador_atual = self.ultimo_jogador_colocou
+            else:
+                self.jogador_atual = game_logic.proximo_jogador(self.jogador_atual)
+
+    def place_piece(self, player_id, linha, coluna):
+        """Lida com a lógica de colocação de peças."""
+        with self.lock:
+            self.ultima_atividade = time.monotonic()
+            erro = self._validar_colocacao(player_id, linha, coluna)
+            if erro:
+                self._erro(player_id, erro)
+                return False
+            self._colocar(player_id, linha, coluna)
+            self._alterar()
+            return True
+
+    def place_pieces(self, player_id, casas):
+        """Coloca várias peças do turno de uma vez, sob uma única aquisição do lock: ou todas ou nenhuma.
+
+        `casas` é uma lista de [linha, coluna] com de uma até as peças que faltam no turno (duas no início dele).
+        """
+        with self.lock:
+            self.ultima_atividade = time.monotonic()
+            if not casas or len(casas) > 2:
+                self._erro(player_id, "Número de peças inválido para o turno.")
+                return False
+            casas = [tuple(casa) for casa in casas]
+            if self.fase == "colocacao" and player_id == self.jogador_atual:
+                if len(casas) > 2 - self.pecas_turno_atual.get(player_id, 0) or len(set(casas)) != len(casas):
+                    self._erro(player_id, "Número de peças inválido para o turno.")
+                    return False
+            for linha, coluna in casas:
+                erro = self._validar_colocacao(player_id, linha, coluna)
+                if erro:
+                    self._erro(player_id, erro)
+                    return False
+            for linha, coluna in casas:
+                self._colocar(player_id, linha, coluna)
+            self._alterar()
+            return True
+
+    def _estado_regras(self):
+        """Estado mínimo que as funções de regras precisam para gerar as jogadas legais."""
+        return {
+            "tabuleiro": self.tabuleiro,
+            "jogador_peca_central": self.jogador_peca_central,
+            "turnos_peca_central": self.turnos_peca_central,
+        }
+
+    def get_legal_moves(self, player_id):
+        """Retorna as jogadas legais do jogador no turno atual, para o cliente destacar os destinos possíveis."""
+        with self.lock:
+            resultado = {"fase": self.fase, "colocacoes": [], "movimentos": [], "remocoes": [], "restricao": None}
+            if player_id != self.jogador_atual or self.vencedor is not None:
+                return resultado
+            if self.fase == "colocacao":
+                resultado["colocacoes"] = [[l, c] for l in range(self.tamanho) for c in range(self.tamanho)
+                                           if self.tabuleiro[l][c] == 0 and not game_logic.eh_casa_central(l, c, self.tamanho)]
+                return resultado
+            legais = game_logic.movimentos_legais(self._estado_regras(), player_id)
+            resultado["restricao"] = legais["restricao"]
+            resultado["remocoes"] = [list(casa) for casa in legais["remocoes"]]
+            resultado["movimentos"] = [list(movimento) + [[list(casa) for casa in capturas]]
+                                       for movimento, capturas in legais["movimentos"].items()]
+            return resultado
+
+    def move_piece(self, player_id, linha_origem, coluna_origem, linha_destino, coluna_destino):
+        """Lida com a lógica de movimento de peças, agora com todas as regras complexas."""
+        with self.lock:
+            self.ultima_atividade = time.monotonic()
+            if self.fase != "movimentacao" or player_id != self.jogador_atual or self.vencedor is not None:
+                self._erro(player_id, "Aguarde seu turno.")
+                return False
+
+            legais = game_logic.movimentos_legais(self._estado_regras(), player_id)
+            if legais["remocao"] == "bloqueado":
+                self._entrar_em_modo_remocao(player_id)
+                self._erro(player_id, "Você está bloqueado! Remova uma peça adversária.")
+                return False
+            if legais["remocao"] == "centro_bloqueado":
+                self._entrar_em_modo_remocao(player_id)
+                self._erro(player_id, "Peça central bloqueada! Remova uma peça adversária adjacente.")
+                return False
+
+            capturas = legais["movimentos"].get((linha_origem, coluna_origem, linha_destino, coluna_destino))
+            if capturas is None:
+                if legais["restricao"] == "centro" and (linha_origem, coluna_origem) != (self.centro, self.centro):
+                    self._erro(player_id, "Regra dos 3 turnos: Você DEVE mover a peça central.")
+                elif legais["restricao"] == "captura":
+                    if game_logic.eh_movimento_valido(self.tabuleiro, linha_origem, coluna_origem, linha_destino, coluna_destino, player_id):
+                        self._erro(player_id, "Movimento inválido. Existe uma captura obrigatória a ser feita.")
+                    else:
+                        self._erro(player_id, "Movimento inválido. Lembre-se que há uma captura obrigatória.")
+                else:
+                    self._erro(player_id, "Movimento inválido.")
+                return False
+
+            self._registrar(MOVER, player_id, linha_origem, coluna_origem, linha_destino, coluna_destino)
+            game_logic.realizar_movimento(self.tabuleiro, linha_origem, coluna_origem, linha_destino, coluna_destino)
+            for linha, coluna in capturas:
+                self.tabuleiro[linha][coluna] = 0
+            capturou = bool(capturas)
+
+            if game_logic.verificar_vitoria(self.tabuleiro, player_id):
+                self._finalizar(player_id); self._alterar(); return True
+
+            jogador_troca = True
+            if capturou and game_logic.pode_continuar_jogada_apos_captura(self.tabuleiro, linha_destino, coluna_destino, player_id):
+                jogador_troca = False
+
+            if jogador_troca:
+                self.jogador_atual = game_logic.proximo_jogador(self.jogador_atual)
+
+                peca_final_centro = self.tabuleiro[self.centro][self.centro]
+                if peca_final_centro != 0 and peca_final_centro == self.jogador_peca_central:
+                    self.turnos_peca_central += 1
+                elif peca_final_centro != 0 and peca_final_centro != self.jogador_peca_central:
+                    self.jogador_peca_central = peca_final_centro
+                    self.turnos_peca_central = 1
+                else:
+                    self.jogador_peca_central = None
+                    self.turnos_peca_central = 0
+            self._alterar()
+            return True
+
+    def remove_piece_when_blocked(self, player_id, linha, coluna):
+        """Permite que um jogador bloqueado remova uma peça adversária."""
+        with self.lock:
+            self.ultima_atividade = time.monotonic()
+            if not self.modo_remocao.get(player_id):
+                bloqueado = (self.fase == "movimentacao" and player_id == self.jogador_atual and self.vencedor is None and
+                             game_logic.movimentos_legais(self._estado_regras(), player_id)["remocao"])
+                if not bloqueado:
+                    self._erro(player_id, "Não está em modo de remoção."); return False
+            if not (0 <= linha < self.tamanho and 0 <= coluna < self.tamanho):
+                self._erro(player_id, "Posição fora do tabuleiro."); return False
+            adversario = game_logic.proximo_jogador(player_id)
+            if self.tabuleiro[linha][coluna] == adversario:
+                self._registrar(REMOVER, player_id, linha, coluna)
+                self.tabuleiro[linha][coluna] = 0; self.modo_remocao[player_id] = False
+                if game_logic.verificar_vitoria(self.tabuleiro, player_id):
+                    self._finalizar(player_id)
+                self._alterar(); return True
+            else:
+                self._erro(player_id, "Selecione uma peça do adversário."); return False
+
+    def surrender(self, player_id):
+        """Registra a desistência de um jogador."""
+        with self.lock:
+            if self.vencedor is not None:
+                return False
+            self._registrar(DESISTIR, player_id)
+            self._finalizar(game_logic.proximo_jogador(player_id))
+            self._adicionar_chat(f"Jogador {player_id} desistiu.")
+            print(f"[*] Partida {self.match_id}: fim de jogo. Jogador {self.vencedor} venceu por desistência.")
+        return True
@@ -0,0 +1,473 @@
+"""Protocolo binário compacto para a mesma API do GameServer, como alternativa ao XML-RPC.
+
+Cada mensagem é um quadro com prefixo de tamanho sobre uma conexão TCP persistente:
+
+    tamanho (u32) | id da requisição (u32) | código (u8) | valor codificado
+
+Na requisição, o código é o índice do método em METODOS (ou NOME_LIVRE seguido do nome) e o valor é a
+lista de argumentos; na resposta, o código é OK ou ERRO e o valor é o resultado ou a mensagem de erro.
+Uma requisição recusada pelo controle de admissão, sem ser executada, recebe RECUSA com [status HTTP
+equivalente (429 ou 503), segundos até tentar de novo].
+Como cada resposta leva o id da requisição, o cliente pode enviar várias requisições sem esperar
+(pipelining) e o servidor responde conforme cada uma termina.
+
+Os valores têm uma etiqueta de um byte. Inteiros de 0 a 127 cabem na própria etiqueta, as chaves
+conhecidas dos dicionários viram um byte e o tabuleiro é empacotado com 2 bits por casa (7 bytes no 5x5).
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
+from http import HTTPStatus
+import heapq
+import itertools
+import socket
+import socketserver
+import struct
+import threading
+import time
+import xmlrpc.client
+
+from admissao import segundos_retry_after
+from metricas import METRICAS
+from partida import EstadoPublico
+
+CABECALHO = struct.Struct("<IIB")  # tamanho do restante, id da requisição, código
+TAMANHO_MAXIMO_QUADRO = 1 << 20
+
+METODOS = (
+    "register_player", "get_state", "wait_state", "get_chat", "send_chat_message", "place_piece",
+    "get_legal_moves", "move_piece", "remove_piece_when_blocked", "surrender", "create_match",
+    "join_match", "list_matches", "add_bot", "get_bot_stats", "get_metrics", "place_pieces",
+    "watch_match",
+)
+INDICE_METODO = {nome: i for i, nome in enumerate(METODOS)}
+NOME_LIVRE = 0xFF
+OK, ERRO, RECUSA = 0, 1, 2
+
+CHAVES = (
+    "versao", "tabuleiro", "jogador_atual", "fase", "vencedor", "chat_seq", "seu_turno", "error",
+    "modo_remocao", "alterado", "mensagens", "primeiro_seq", "ultimo_seq", "colocacoes", "movimentos",
+    "remocoes", "restricao", "match_id", "jogadores", "proximo_poll_ms",
+)
+INDICE_CHAVE = {nome: i for i, nome in enumerate(CHAVES)}
+CHAVE_LIVRE = 0xFF
+CAMPOS_TABULEIRO = frozenset({"tabuleiro"})
+
+# Etiquetas dos valores. De PEQUENO em diante, a etiqueta é o próprio inteiro (0 a 127) somado a PEQUENO.
+NENHUM, FALSO, VERDADEIRO, INT32, INT64, REAL, TEXTO, LISTA, DICIONARIO, TABULEIRO = range(10)
+PEQUENO = 0x80
+
+_INT32 = struct.Struct("<i")
+_INT64 = struct.Struct("<q")
+_REAL = struct.Struct("<d")
+_U16 = struct.Struct("<H")
+
+def _codificar_tabuleiro(tabuleiro, saida):
+    """Empacota o tabuleiro (lista de linhas com 0, 1 ou 2) com 2 bits por casa."""
+    n = len(tabuleiro)
+    bits = 0
+    deslocamento = 0
+    for linha in tabuleiro:
+        for valor in linha:
+            bits |= valor << deslocamento
+            deslocamento += 2
+    saida.append(TABULEIRO)
+    saida.append(n)
+    saida += bits.to_bytes((2 * n * n + 7) // 8, "little")
+
+def _codificar(valor, saida):
+    if valor is None:
+        saida.append(NENHUM)
+    elif valor is True:
+        saida.append(VERDADEIRO)
+    elif valor is False:
+        saida.append(FALSO)
+    elif isinstance(valor, int):
+        if 0 <= valor < 128:
+            saida.append(PEQUENO + valor)
+        elif -2 ** 31 <= valor < 2 ** 31:
+            saida.append(INT32)
+            saida += _INT32.pack(valor)
+        else:
+            saida.append(INT64)
+            saida += _INT64.pack(valor)
+    elif isinstance(valor, float):
+        saida.append(REAL)
+        saida += _REAL.pack(valor)
+    elif isinstance(valor, str):
+        dados = valor.encode("utf-8")
+        saida.append(TEXTO)
+        saida += _U16.pack(len(dados))
+        saida += dados
+    elif isinstance(valor, (list, tuple)):
+        saida.append(LISTA)
+        saida += _U16.pack(len(valor))
+        for item in valor:
+            _codificar(item, saida)
+    elif isinstance(valor, dict):
+        saida.append(DICIONARIO)
+        saida += _U16.pack(len(valor))
+        for chave, item in valor.items():
+            indice = INDICE_CHAVE.get(chave)
+            if indice is None:
+                dados = str(chave).encode("utf-8")
+                saida.append(CHAVE_LIVRE)
+                saida.append(len(dados))
+                saida += dados
+            else:
+                saida.append(indice)
+            if chave in CAMPOS_TABULEIRO and item:
+                _codificar_tabuleiro(item, saida)
+            else:
+                _codificar(item, saida)
+    else:
+        raise TypeError(f"Tipo não suportado pelo protocolo binário: {type(valor).__name__}")
+
+def codificar(valor):
+    """Codifica um valor (None, bool, int, float, str, lista, dicionário) em bytes."""
+    saida = bytearray()
+    _codificar(valor, saida)
+    return saida
+
+def _decodificar(dados, pos):
+    etiqueta = dados[pos]
+    pos += 1
+    if etiqueta >= PEQUENO:
+        return etiqueta - PEQUENO, pos
+    if etiqueta == NENHUM:
+        return None, pos
+    if etiqueta == FALSO:
+        return False, pos
+    if etiqueta == VERDADEIRO:
+        return True, pos
+    if etiqueta == INT32:
+        return _INT32.unpack_from(dados, pos)[0], pos + 4
+    if etiqueta == INT64:
+        return _INT64.unpack_from(dados, pos)[0], pos + 8
+    if etiqueta == REAL:
+        return _REAL.unpack_from(dados, pos)[0], pos + 8
+    if etiqueta == TEXTO:
+        tamanho = _U16.unpack_from(dados, pos)[0]
+        pos += 2
+        return bytes(dados[pos:pos + tamanho]).decode("utf-8"), pos + tamanho
+    if etiqueta == LISTA:
+        quantidade = _U16.unpack_from(dados, pos)[0]
+        pos += 2
+        lista = []
+        for _ in range(quantidade):
+            item, pos = _decodificar(dados, pos)
+            lista.append(item)
+        return lista, pos
+    if etiqueta == DICIONARIO:
+        quantidade = _U16.unpack_from(dados, pos)[0]
+        pos += 2
+        dicionario = {}
+        for _ in range(quantidade):
+            indice = dados[pos]
+            pos += 1
+            if indice == CHAVE_LIVRE:
+                tamanho = dados[pos]
+                chave = bytes(dados[pos + 1:pos + 1 + tamanho]).decode("utf-8")
+                pos += 1 + tamanho
+            else:
+                chave = CHAVES[indice]
+            dicionario[chave], pos = _decodificar(dados, pos)
+        return dicionario, pos
+    if etiqueta == TABULEIRO:
+        n = dados[pos]
+        tamanho = (2 * n * n + 7) // 8
+        bits = int.from_bytes(dados[pos + 1:pos + 1 + tamanho], "little")
+        tabuleiro = [[(bits >> (2 * (l * n + c))) & 3 for c in range(n)] for l in range(n)]
+        return tabuleiro, pos + 1 + tamanho
+    raise ValueError(f"Etiqueta desconhecida no protocolo binário: {etiqueta}")
+
+def decodificar(dados):
+    valor, _ = _decodificar(dados, 0)
+    return valor
+
+def montar_quadro(id_requisicao, codigo, corpo):
+    return CABECALHO.pack(CABECALHO.size - 4 + len(corpo), id_requisicao, codigo) + corpo
+
+def ler_quadro(arquivo):
+    """Lê um quadro de um arquivo binário com buffer. Retorna (id, código, corpo) ou None no fim da conexão."""
+    cabecalho = arquivo.read(CABECALHO.size)
+    if len(cabecalho) < CABECALHO.size:
+        return None
+    tamanho, id_requisicao, codigo = CABECALHO.unpack(cabecalho)
+    if tamanho > TAMANHO_MAXIMO_QUADRO:
+        raise ValueError("Quadro grande demais.")
+    corpo = arquivo.read(tamanho - (CABECALHO.size - 4))
+    if len(corpo) < tamanho - (CABECALHO.size - 4):
+        return None
+    return id_requisicao, codigo, corpo
+
+def montar_requisicao(id_requisicao, metodo, argumentos):
+    indice = INDICE_METODO.get(metodo)
+    if indice is None:
+        return montar_quadro(id_requisicao, NOME_LIVRE, codificar([metodo, list(argumentos)]))
+    return montar_quadro(id_requisicao, indice, codificar(list(argumentos)))
+
+
+class _AtendimentoBinario(socketserver.StreamRequestHandler):
+    """Lê quadros da conexão e entrega cada requisição ao pool; as respostas saem na ordem em que terminam."""
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.envio = threading.Lock()
+
+    def handle(self):
+        while True:
+            try:
+                quadro = ler_quadro(self.rfile)
+            except (OSError, ValueError):
+                return
+            if quadro is None:
+                return
+            self.server.agendar(self, *quadro)
+
+    def _responder(self, id_requisicao, codigo, corpo):
+        self._enviar(id_requisicao, *self.server.executar(codigo, corpo))
+
+    def _recusar(self, id_requisicao, status, segundos):
+        """Responde que a requisição não foi executada e pode ser repetida depois de `segundos`."""
+        self._enviar(id_requisicao, RECUSA, codificar([status, int(segundos_retry_after(segundos))]))
+
+    def _enviar(self, id_requisicao, codigo, corpo):
+        try:
+            with self.envio:
+                self.wfile.write(montar_quadro(id_requisicao, codigo, corpo))
+        except OSError:
+            pass
+
+
+class Despertador:
+    """Uma única thread que chama funções quando o prazo de cada uma vence."""
+
+    def __init__(self):
+        self.prazos = []  # heap de (instante, sequência, função)
+        self.sequencia = itertools.count()
+        self.condicao = threading.Condition()
+        threading.Thread(target=self._executar, name="despertador", daemon=True).start()
+
+    def agendar(self, segundos, funcao):
+        with self.condicao:
+            heapq.heappush(self.prazos, (time.monotonic() + segundos, next(self.sequencia), funcao))
+            self.condicao.notify()
+
+    def _executar(self):
+        while True:
+            with self.condicao:
+                while not self.prazos or self.prazos[0][0] > time.monotonic():
+                    self.condicao.wait(self.prazos[0][0] - time.monotonic() if self.prazos else None)
+                _, _, funcao = heapq.heappop(self.prazos)
+            funcao()
+
+
+class ServidorBinario(socketserver.ThreadingTCPServer):
+    """Atende o protocolo binário chamando os mesmos métodos do GameServer usados pelo XML-RPC.
+
+    As chamadas longas registradas com `register_long_poll` não ocupam o pool enquanto esperam: ficam
+    inscritas na partida e só vão ao pool quando a versão muda ou o prazo vence.
+
+    Com `admissao` (admissao.ControleAdmissao, a mesma do XML-RPC), cada conexão conta como um cliente do
+    endereço de onde veio: acima da taxa a requisição recebe RECUSA 429, e com a fila do pool cheia, RECUSA 503.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, endereco, instancia, workers=32, metricas=METRICAS, admissao=None):
+        super().__init__(endereco, _AtendimentoBinario)
+        self.instancia = instancia
+        self.admissao = admissao
+        self.funcoes = {}
+        self.metricas = metricas
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="binario")
+        self.chamadas_longas = {}
+        self.preparar_espera = None
+        self.despertador = None
+
+    def register_long_poll(self, metodos, preparar_espera):
+        """Registra os métodos de espera e a função que os converte em (partida, versão, timeout, parâmetros)."""
+        self.chamadas_longas = {INDICE_METODO[nome]: nome for nome in metodos if nome in INDICE_METODO}
+        self.preparar_espera = preparar_espera
+        self.despertador = Despertador()
+
+    def agendar(self, atendimento, id_requisicao, codigo, corpo):
+        """Entrega a requisição ao pool; uma chamada longa antes espera a mudança da partida sem ocupar thread."""
+        if self.admissao is not None:
+            endereco, porta = atendimento.client_address[:2]
+            atraso = self.admissao.limitar(endereco, f"binario:{porta}")
+            if atraso:
+                atendimento._recusar(id_requisicao, 429, atraso)
+                return
+        metodo = self.chamadas_longas.get(codigo)
+        espera = None
+        if metodo is not None:
+            try:
+                espera = self.preparar_espera(metodo, decodificar(corpo))
+            except Exception:
+                espera = None  # executar responde o erro
+        if espera is None:
+            self._submeter(atendimento, id_requisicao, codigo, corpo)
+            return
+        partida, versao, timeout, argumentos = espera
+        corpo = bytes(codificar(list(argumentos)))
+        vez = threading.Lock()
+
+        def avisar():
+            if vez.acquire(blocking=False):  # a mudança e o prazo podem chegar juntos
+                partida.desinscrever(avisar)
+                self._submeter(atendimento, id_requisicao, codigo, corpo)
+
+        if partida.inscrever(versao, avisar):
+            self.despertador.agendar(timeout, avisar)
+        else:
+            avisar()
+
+    def _submeter(self, atendimento, id_requisicao, codigo, corpo):
+        """Põe a requisição na fila do pool, a menos que o controle de admissão a recuse por fila cheia."""
+        if self.admissao is None:
+            self.executor.submit(atendimento._responder, id_requisicao, codigo, corpo)
+            return
+        if not self.admissao.entrar():
+            atendimento._recusar(id_requisicao, 503, self.admissao.espera_fila())
+            return
+
+        def atender():
+            try:
+                atendimento._responder(id_requisicao, codigo, corpo)
+            finally:
+                self.admissao.sair()
+
+        self.executor.submit(atender)
+
+    def register_function(self, function=None, name=None):
+        self.funcoes[name or function.__name__] = function
+        return function
+
+    def _funcao(self, nome):
+        funcao = self.funcoes.get(nome)
+        if funcao is None and not nome.startswith("_"):
+            funcao = getattr(self.instancia, nome, None)
+        if funcao is None:
+            raise ValueError(f'method "{nome}" is not supported')
+        return funcao
+
+    def executar(self, codigo, corpo):
+        """Decodifica e executa uma requisição. Retorna (código da resposta, corpo codificado)."""
+        self.metricas.iniciar()
+        resposta = b""
+        try:
+            argumentos = decodificar(corpo)
+            if codigo == NOME_LIVRE:
+                metodo, argumentos = argumentos
+            else:
+                metodo = METODOS[codigo]
+            self.metricas.definir_metodo(metodo)
+            resultado = self._funcao(metodo)(*argumentos)
+            if isinstance(resultado, EstadoPublico):
+                resposta = resultado.codificado("binario", lambda dados: bytes(codificar(dados)))
+            else:
+                resposta = codificar(resultado)
+            return OK, resposta
+        except Exception as e:
+            self.metricas.registrar_erro()
+            resposta = codificar(f"{type(e).__name__}: {e}")
+            return ERRO, resposta
+        finally:
+            self.metricas.finalizar(len(corpo), len(resposta))
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ClienteBinario:
+    """Cliente do protocolo binário com a mesma interface do ServerProxy: `cliente.get_state(match_id, player_id)`.
+
+    Pode ser usado por várias threads ao mesmo tempo. `chamar_assincrono` envia sem esperar e devolve um
+    Future, o que permite enviar várias requisições de uma vez pela mesma conexão.
+    Erros do servidor são levantados como xmlrpc.client.Fault e as recusas do controle de admissão como
+    xmlrpc.client.ProtocolError com o status e o Retry-After, como no cliente XML-RPC.
+    """
+
+    def __init__(self, endereco, timeout=None):
+        self.endereco = "%s:%d" % endereco[:2]
+        self.sock = socket.create_connection(endereco, timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._arquivo = self.sock.makefile("rb")
+        self._envio = threading.Lock()
+        self._pendentes = {}
+        self._ids = itertools.count(1)
+        self._encerrado = False
+        self.bytes_enviados = 0
+        self.bytes_recebidos = 0
+        self._leitor = threading.Thread(target=self._ler_respostas, daemon=True, name="cliente-binario")
+        self._leitor.start()
+
+    def _ler_respostas(self):
+        """Entrega as respostas aos Futures pendentes. Quando a conexão termina ou chega um quadro que não se
+        consegue ler, falha todos os pendentes, inclusive o que estava sendo respondido, e encerra a conexão."""
+        erro = ConnectionError("Conexão com o servidor encerrada.")
+        futuro = None
+        try:
+            while True:
+                quadro = ler_quadro(self._arquivo)
+                if quadro is None:
+                    break
+                id_requisicao, codigo, corpo = quadro
+                self.bytes_recebidos += CABECALHO.size + len(corpo)
+                futuro = self._pendentes.pop(id_requisicao, None)
+                if futuro is None:
+                    continue
+                valor = decodificar(corpo)
+                if codigo == OK:
+                    futuro.set_result(valor)
+                elif codigo == RECUSA:
+                    status, segundos = valor
+                    futuro.set_exception(xmlrpc.client.ProtocolError(
+                        self.endereco, status, HTTPStatus(status).phrase, {"Retry-After": str(segundos)}))
+                else:
+                    futuro.set_exception(xmlrpc.client.Fault(1, valor))
+        except Exception as e:
+            # Depois de um quadro inválido o fluxo fica dessincronizado, então a conexão não serve mais.
+            erro = ConnectionError(f"Conexão com o servidor encerrada: {e}")
+            if futuro is not None and not futuro.done():
+                futuro.set_exception(erro)
+            self.close()
+        with self._envio:
+            self._encerrado = True
+            pendentes = list(self._pendentes.values())
+            self._pendentes.clear()
+        for futuro in pendentes:
+            futuro.set_exception(erro)
+
+    def chamar_assincrono(self, metodo, *argumentos):
+        futuro = Future()
+        with self._envio:
+            id_requisicao = next(self._ids)
+            quadro = montar_requisicao(id_requisicao, metodo, argumentos)
+            if self._encerrado:
+                raise ConnectionError("Conexão com o servidor encerrada.")
+            self._pendentes[id_requisicao] = futuro
+            self.sock.sendall(quadro)
+            self.bytes_enviados += len(quadro)
+        return futuro
+
+    def chamar(self, metodo, *argumentos):
+        return self.chamar_assincrono(metodo, *argumentos).result()
+
+    def __getattr__(self, nome):
+        if nome.startswith("_"):
+            raise AttributeError(nome)
+        return functools.partial(self.chamar, nome)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
@@ -1,194 +1,457 @@
-from xmlrpc.server import SimpleXMLRPCServer
 from xmlrpc.server import SimpleXMLRPCRequestHandler
+from collections import OrderedDict
+import argparse
+import itertools
 import threading
+import time
 
-from game_logic import (
-    criar_tabuleiro, verificar_vitoria, eh_movimento_valido,
-    realizar_movimento, verificar_e_realizar_capturas, proximo_jogador,
-    eh_casa_central, pode_continuar_jogada_apos_captura,
-    existe_captura_com_movimento, jogador_esta_bloqueado, peca_esta_bloqueada
-)
+from admissao import ControleAdmissao
+import diario
+from ia import JogadorIA
+from metricas import novo_lock, registrar_funcoes, registrar_funcoes_admin
+from partida import TIMEOUT_MAXIMO_ESPERA, Partida
+from protocolo_binario import ServidorBinario
+from game_logic import TABULEIRO_TAMANHO, TAMANHOS_TABULEIRO
+from servidores import MODOS, criar_servidor, criar_servidor_admin
 
 class QuietRequestHandler(SimpleXMLRPCRequestHandler):
     def log_message(self, format, *args):
         """Sobrescreve o método original para não imprimir logs de acesso HTTP."""
         pass
 
+# Chamadas longas: posição de since_version e do timeout nos parâmetros.
+CHAMADAS_LONGAS = {"wait_state": (2, 3), "watch_match": (1, 2)}
+
+def validar_tamanho(tamanho):
+    if tamanho not in TAMANHOS_TABULEIRO:
+        raise ValueError(f"Tamanho de tabuleiro inválido: {tamanho} (use {', '.join(map(str, TAMANHOS_TABULEIRO))}).")
+
 class GameServer:
-    def __init__(self):
-        """Inicializa o servidor do jogo, criando um lock para controle de concorrência e resetando o estado."""
-        self.lock = threading.Lock()
-        self.reset_game()
+    def __init__(self, tempo_retencao=120, tempo_abandono=3600, intervalo_coleta=30,
+                 dados=None, intervalo_snapshot=60.0, tablebase=None, espectadores_em_espera=16, admissao=None,
+                 jogadores_em_espera=16):
+        """Inicializa o registro de partidas. Cada partida tem seu próprio lock; o lock do servidor protege apenas o registro.
+
+        Com `dados`, as partidas são restauradas do diário nesse diretório e toda ação aceita passa a ser gravada nele.
+        Com `tablebase` (arquivo gerado por tablebase.py), as IAs jogam os finais com poucas peças de forma perfeita.
+        `espectadores_em_espera` limita quantos espectadores podem ficar bloqueados em watch_match ao mesmo tempo,
+        para que eles não ocupem as threads que atendem os jogadores; `jogadores_em_espera` faz o mesmo para wait_state.
+        Os servidores assíncronos esperam sem thread (veja `_preparar_espera`) e não usam essas vagas.
+        Com `admissao` (admissao.ControleAdmissao), o intervalo sugerido nas respostas de estado cresce com a carga.
+        """
+        self.lock = novo_lock()
+        self.partidas = {}
+        self.partidas_abertas = OrderedDict()  # match_id -> tamanho do tabuleiro, na ordem de criação
+        self.ids_partidas = itertools.count(1)
+        self.tempo_retencao = tempo_retencao
+        self.tempo_abandono = tempo_abandono
+        self.intervalo_coleta = intervalo_coleta
+        self.ultima_coleta = time.monotonic()
+        self.bots = {}
+        self.vagas_espectadores = threading.BoundedSemaphore(espectadores_em_espera)
+        self.vagas_espera = threading.BoundedSemaphore(jogadores_em_espera)
+        self.admissao = admissao
+        self.tablebase = None
+        if tablebase:
+            from tablebase import Tablebase  # importado só aqui porque a geração da tabela depende do numpy
+            self.tablebase = Tablebase(tablebase)
+        self.dados = dados
+        self.diario = None
+        if dados:
+            self._restaurar()
+            self.diario = diario.Diario(dados)
+            for partida in self.partidas.values():
+                partida.diario = self.diario
+            self._gravar_snapshot()
+            self._parar_snapshots = threading.Event()
+            threading.Thread(target=self._snapshots_periodicos, args=(intervalo_snapshot,), daemon=True).start()
 
-    def reset_game(self):
-        """Reseta todas as variáveis de estado para iniciar uma nova partida."""
+    def _restaurar(self):
+        """Recria as partidas do último snapshot mais o restante do diário e religa as IAs das partidas em andamento."""
+        inicio = time.perf_counter()
+        partidas, ias, maior_id, reaplicados = diario.restaurar(
+            self.dados,
+            criar_partida=lambda match_id, tamanho: Partida(match_id, tamanho),
+            importar_partida=lambda match_id, dados: Partida.importar(dados))
+        self.partidas = partidas
+        self.ids_partidas = itertools.count(maior_id + 1)
+        for match_id, partida in sorted(partidas.items()):
+            if partida.vencedor is None and not partida.esta_cheia():
+                self.partidas_abertas[match_id] = partida.tamanho
+        for match_id, por_jogador in ias.items():
+            partida = partidas.get(match_id)
+            if partida is None or partida.vencedor is not None:
+                continue
+            for player_id, tempo in por_jogador.items():
+                self._iniciar_bot(partida, player_id, tempo)
+        if partidas or reaplicados:
+            print(f"[*] {len(partidas)} partida(s) restaurada(s) do diário ({reaplicados} ações reaplicadas) "
+                  f"em {time.perf_counter() - inicio:.2f} s.")
+
+    def _gravar_snapshot(self):
+        """Grava o estado completo de todas as partidas e passa o diário para um novo segmento.
+
+        O segmento é trocado antes de copiar as partidas: o que for gravado durante a cópia fica no novo
+        segmento e, na restauração, a sequência de cada partida diz quais registros já estão no snapshot.
+        """
+        segmento = self.diario.rotacionar()
         with self.lock:
-            self.tabuleiro = criar_tabuleiro()
-            self.jogador_atual = 1
-            self.fase = "colocacao"
-            self.pecas_colocadas = {1: 0, 2: 0}
-            self.pecas_turno_atual = {1: 0, 2: 0}
-            self.ultimo_jogador_colocou = None
-            self.vencedor = None
-            self.chat_log = []
-            self.conexoes = {1: False, 2: False}
-            self.mensagens_erro = {1: None, 2: None}
-            self.modo_remocao = {1: False, 2: False}
-            self.turnos_peca_central = 0
-            self.jogador_peca_central = None
-
-
-    def register_player(self):
-        """Registra um novo jogador, atribuindo ID 1 ou 2. Retorna 0 se o servidor estiver cheio."""
+            partidas = list(self.partidas.values())
+            ias = {str(match_id): {str(player_id): bot.busca.tempo_por_jogada for player_id, bot in por_jogador.items()}
+                   for match_id, por_jogador in self.bots.items()}
+            maior_id = max(self.partidas, default=0)
+        diario.gravar_snapshot(self.dados, {
+            "segmento": segmento,
+            "maior_id": maior_id,
+            "partidas": [partida.exportar() for partida in partidas],
+            "ias": ias,
+        })
+
+    def _snapshots_periodicos(self, intervalo):
+        while not self._parar_snapshots.wait(intervalo):
+            self._gravar_snapshot()
+
+    def _encerrar(self):
+        """Grava um último snapshot e fecha o diário. Chamada pelo run_server ao desligar (não é exposta por RPC)."""
+        if self.diario:
+            self._parar_snapshots.set()
+            self._gravar_snapshot()
+            self.diario.fechar()
+
+    def _partida(self, match_id):
+        """Busca uma partida pelo id. A leitura do dicionário é atômica e não precisa do lock do registro."""
+        partida = self.partidas.get(match_id) if isinstance(match_id, int) else None
+        if partida is None:
+            raise ValueError(f"Partida {match_id} não encontrada.")
+        return partida
+
+    def _coletar_partidas_finalizadas(self):
+        """Remove partidas encerradas há mais de `tempo_retencao` segundos e partidas abandonadas."""
+        agora = time.monotonic()
+        if agora - self.ultima_coleta < self.intervalo_coleta:
+            return
+        self.ultima_coleta = agora
         with self.lock:
-            if not self.conexoes[1]:
-                self.conexoes[1] = True; print("[+] Jogador 1 conectado."); return 1
-            elif not self.conexoes[2]:
-                self.conexoes[2] = True; print("[+] Jogador 2 conectado."); return 2
-            else:
-                print("[-] Tentativa de conexão recusada: servidor cheio."); return 0
-
-    def get_state(self, player_id):
-        """Método que o cliente chama periodicamente para "puxar" o estado atual do jogo."""
+            candidatas = list(self.partidas.values())
+        removidas = []
+        for partida in candidatas:
+            finalizada_em = partida.finalizada_em
+            if finalizada_em is not None and agora - finalizada_em > self.tempo_retencao:
+                removidas.append(partida.match_id)
+            elif agora - partida.ultima_atividade > self.tempo_abandono:
+                removidas.append(partida.match_id)
+        if removidas:
+            with self.lock:
+                for match_id in removidas:
+                    self.partidas.pop(match_id, None)
+                    self.partidas_abertas.pop(match_id, None)
+                    self.bots.pop(match_id, None)
+                    if self.diario:
+                        self.diario.registrar(match_id, 0, diario.REMOVIDA)
+            print(f"[*] {len(removidas)} partida(s) encerrada(s) removida(s) da memória.")
+
+    def create_match(self, tamanho=TABULEIRO_TAMANHO):
+        """Cria uma nova partida vazia com tabuleiro `tamanho` x `tamanho` (5, 7 ou 9) e retorna seu id."""
+        validar_tamanho(tamanho)
         with self.lock:
-            error_message = self.mensagens_erro.get(player_id)
-            if error_message:
-                self.mensagens_erro[player_id] = None
-
-            return {
-                "tabuleiro": self.tabuleiro,
-                "jogador_atual": self.jogador_atual,
-                "fase": self.fase,
-                "vencedor": self.vencedor,
-                "chat_log": self.chat_log,
-                "seu_turno": self.jogador_atual == player_id,
-                "error": error_message,
-                "modo_remocao": self.modo_remocao.get(player_id, False)
-            }
-
-    def send_chat_message(self, player_id, message):
-        """Adiciona uma mensagem ao log de chat do servidor."""
+            match_id = next(self.ids_partidas)
+        return self._criar_partida(match_id, tamanho)
+
+    def _criar_partida(self, match_id, tamanho=TABULEIRO_TAMANHO):
+        """Cria a partida com o id dado (escolhido por este servidor ou pelo gateway)."""
+        validar_tamanho(tamanho)
+        self._coletar_partidas_finalizadas()
         with self.lock:
-            self.chat_log.append(f"[Jogador {player_id}] {message}")
-        return True
+            if match_id in self.partidas:
+                raise ValueError(f"Partida {match_id} já existe.")
+            partida = Partida(match_id, tamanho)
+            if self.diario:
+                self.diario.registrar(match_id, 0, diario.CRIAR, 0, tamanho)
+                partida.diario = self.diario
+            self.partidas[match_id] = partida
+            self.partidas_abertas[match_id] = tamanho
+        print(f"[+] Partida {match_id} criada ({tamanho}x{tamanho}).")
+        return match_id
 
-    def place_piece(self, player_id, linha, coluna):
-        """Lida com a lógica de colocação de peças."""
+    def _exportar_partida(self, match_id):
+        """Retira a partida deste servidor e devolve o estado dela e das suas IAs, para ser importada em outro.
+
+        Quem ainda espera na partida (wait_state, IAs) é acordado e passa a falar com o novo dono.
+        """
         with self.lock:
-            if self.fase != "colocacao" or player_id != self.jogador_atual:
-                self.mensagens_erro[player_id] = "Não é seu turno."
-                return False
-            if not (0 <= linha < 5 and 0 <= coluna < 5):
-                self.mensagens_erro[player_id] = "Posição fora do tabuleiro."
-                return False
-            if eh_casa_central(linha, coluna) or self.tabuleiro[linha][coluna] != 0:
-                self.mensagens_erro[player_id] = "Posição inválida."
-                return False
-
-            self.tabuleiro[linha][coluna] = player_id
-            self.pecas_colocadas[player_id] = self.pecas_colocadas.get(player_id, 0) + 1
-            self.pecas_turno_atual[player_id] = self.pecas_turno_atual.get(player_id, 0) + 1
-            self.ultimo_jogador_colocou = player_id
-
-            if self.pecas_turno_atual[player_id] == 2:
-                self.pecas_turno_atual[player_id] = 0
-                if self.pecas_colocadas.get(1, 0) >= 12 and self.pecas_colocadas.get(2, 0) >= 12:
-                    self.fase = "movimentacao"
-                    self.jogador_atual = self.ultimo_jogador_colocou
-                else:
-                    self.jogador_atual = proximo_jogador(self.jogador_atual)
-            return True
-
-    def move_piece(self, player_id, linha_origem, coluna_origem, linha_destino, coluna_destino):
-        """Lida com a lógica de movimento de peças, agora com todas as regras complexas."""
+            partida = self.partidas.pop(match_id, None)
+            if partida is None:
+                raise ValueError(f"Partida {match_id} não encontrada.")
+            self.partidas_abertas.pop(match_id, None)
+            bots = self.bots.pop(match_id, {})
+            if self.diario:
+                self.diario.registrar(match_id, 0, diario.REMOVIDA)
+        with partida.lock:
+            partida._alterar()
+        dados = partida.exportar()
+        print(f"[*] Partida {match_id} exportada.")
+        return {"partida": dados, "ias": {str(player_id): bot.busca.tempo_por_jogada for player_id, bot in bots.items()}}
+
+    def _importar_partida(self, dados):
+        """Recebe uma partida exportada por outro servidor, religando as IAs dela."""
+        partida = Partida.importar(dados["partida"])
+        match_id = partida.match_id
         with self.lock:
-            if self.fase != "movimentacao" or player_id != self.jogador_atual:
-                self.mensagens_erro[player_id] = "Aguarde seu turno."
-                return False
-            
-            if jogador_esta_bloqueado(self.tabuleiro, player_id):
-                self.mensagens_erro[player_id] = "Você está bloqueado! Remova uma peça adversária."
-                self.modo_remocao[player_id] = True
-                return False
-
-            peca_no_centro = self.tabuleiro[2][2]
-            if peca_no_centro == player_id and self.jogador_peca_central == player_id and self.turnos_peca_central >= 3:
-            
-                if peca_esta_bloqueada(self.tabuleiro, 2, 2):
-                    self.mensagens_erro[player_id] = "Peça central bloqueada! Remova uma peça adversária adjacente."
-                    self.modo_remocao[player_id] = True
-                    return False 
-                
-                elif (linha_origem, coluna_origem) != (2, 2):
-                    self.mensagens_erro[player_id] = "Regra dos 3 turnos: Você DEVE mover a peça central."
-                    return False
-
-            elif existe_captura_com_movimento(self.tabuleiro, player_id):
-                copia_tabuleiro = [row[:] for row in self.tabuleiro]
-                if eh_movimento_valido(copia_tabuleiro, linha_origem, coluna_origem, linha_destino, coluna_destino, player_id):
-                    realizar_movimento(copia_tabuleiro, linha_origem, coluna_origem, linha_destino, coluna_destino)
-                    if not verificar_e_realizar_capturas(copia_tabuleiro, linha_destino, coluna_destino, player_id):
-                        self.mensagens_erro[player_id] = "Movimento inválido. Existe uma captura obrigatória a ser feita."
-                        return False
-                else:
-                    self.mensagens_erro[player_id] = "Movimento inválido. Lembre-se que há uma captura obrigatória."
-                    return False
-            
-            if not eh_movimento_valido(self.tabuleiro, linha_origem, coluna_origem, linha_destino, coluna_destino, player_id):
-                self.mensagens_erro[player_id] = "Movimento inválido."
-                return False
-
-            realizar_movimento(self.tabuleiro, linha_origem, coluna_origem, linha_destino, coluna_destino)
-            capturou = verificar_e_realizar_capturas(self.tabuleiro, linha_destino, coluna_destino, player_id)
-
-            if verificar_vitoria(self.tabuleiro, player_id):
-                self.vencedor = player_id; return True
-
-            jogador_troca = True
-            if capturou and pode_continuar_jogada_apos_captura(self.tabuleiro, linha_destino, coluna_destino, player_id):
-                jogador_troca = False
-            
-            if jogador_troca:
-                self.jogador_atual = proximo_jogador(self.jogador_atual)
-                
-                peca_final_centro = self.tabuleiro[2][2]
-                if peca_final_centro != 0 and peca_final_centro == self.jogador_peca_central:
-                    self.turnos_peca_central += 1
-                elif peca_final_centro != 0 and peca_final_centro != self.jogador_peca_central:
-                    self.jogador_peca_central = peca_final_centro
-                    self.turnos_peca_central = 1
-                else:
-                    self.jogador_peca_central = None
-                    self.turnos_peca_central = 0
-            return True
-
-    def remove_piece_when_blocked(self, player_id, linha, coluna):
-        """Permite que um jogador bloqueado remova uma peça adversária."""
+            if match_id in self.partidas:
+                raise ValueError(f"Partida {match_id} já existe.")
+            self.partidas[match_id] = partida
+            if partida.vencedor is None and not partida.esta_cheia():
+                self.partidas_abertas[match_id] = partida.tamanho
+            partida.diario = self.diario
+        for player_id, tempo in dados["ias"].items():
+            self._iniciar_bot(partida, int(player_id), tempo)
+        if self.diario:
+            # O diário só tem registros de ações; a partida importada entra inteira no snapshot.
+            self._gravar_snapshot()
+        print(f"[*] Partida {match_id} importada.")
+        return match_id
+
+    def join_match(self, match_id):
+        """Entra em uma partida existente. Retorna o ID do jogador (1 ou 2) ou 0 se a partida estiver cheia."""
+        partida = self._partida(match_id)
+        player_id = partida.register_player()
+        if player_id == 0 or partida.esta_cheia():
+            with self.lock:
+                self.partidas_abertas.pop(match_id, None)
+        return player_id
+
+    def list_matches(self, apenas_abertas=False):
+        """Lista as partidas em memória (ou apenas as que aguardam jogadores)."""
         with self.lock:
-            if not self.modo_remocao.get(player_id):
-                self.mensagens_erro[player_id] = "Não está em modo de remoção."; return False
-            adversario = proximo_jogador(player_id)
-            if self.tabuleiro[linha][coluna] == adversario:
-                self.tabuleiro[linha][coluna] = 0; self.modo_remocao[player_id] = False; return True
-            else:
-                self.mensagens_erro[player_id] = "Selecione uma peça do adversário."; return False
-
-    def surrender(self, player_id):
-        """Registra a desistência de um jogador."""
+            ids = list(self.partidas_abertas if apenas_abertas else self.partidas)
+        return [self.partidas[match_id].resumo() for match_id in ids if match_id in self.partidas]
+
+    def add_bot(self, match_id, tempo_por_jogada=1.0):
+        """Coloca um jogador computador na próxima vaga da partida. Retorna o ID do jogador ou 0 se estiver cheia."""
+        partida = self._partida(match_id)
+        if partida.tamanho != TABULEIRO_TAMANHO:
+            raise ValueError(f"A IA só joga no tabuleiro {TABULEIRO_TAMANHO}x{TABULEIRO_TAMANHO}.")
+        player_id = self.join_match(match_id)
+        if player_id != 0:
+            if self.diario:
+                self.diario.registrar(match_id, 0, diario.IA, player_id, texto=repr(float(tempo_por_jogada)))
+            self._iniciar_bot(partida, player_id, tempo_por_jogada)
+            print(f"[+] Partida {match_id}: IA entrou como Jogador {player_id}.")
+        return player_id
+
+    def _iniciar_bot(self, partida, player_id, tempo_por_jogada):
+        match_id = partida.match_id
+        bot = JogadorIA(partida, player_id, tempo_por_jogada, ativa=lambda: match_id in self.partidas,
+                        tablebase=self.tablebase)
         with self.lock:
-            self.vencedor = proximo_jogador(player_id)
-            self.chat_log.append(f"Jogador {player_id} desistiu.")
-            print(f"[*] Fim de jogo. Jogador {self.vencedor} venceu por desistência.")
-        return True
+            self.bots.setdefault(match_id, {})[player_id] = bot
+        bot.iniciar()
+
+    def get_bot_stats(self, match_id):
+        """Estatísticas da última busca de cada IA da partida (profundidade, nós por segundo, acertos na tabela)."""
+        self._partida(match_id)
+        return {str(player_id): bot.busca.estatisticas for player_id, bot in self.bots.get(match_id, {}).items()}
+
+    def register_player(self, tamanho=TABULEIRO_TAMANHO):
+        """Coloca o jogador na primeira partida com vaga do tamanho pedido, criando uma nova se necessário.
+
+        Retorna [match_id, player_id].
+        """
+        validar_tamanho(tamanho)
+        while True:
+            with self.lock:
+                match_id = next((m for m, t in self.partidas_abertas.items() if t == tamanho), None)
+            if match_id is None:
+                match_id = self.create_match(tamanho)
+            try:
+                player_id = self.join_match(match_id)
+            except ValueError:
+                continue
+            if player_id != 0:
+                return [match_id, player_id]
+
+    def _nivel_carga(self):
+        return self.admissao.nivel_carga() if self.admissao is not None else 0
+
+    def get_state(self, match_id, player_id):
+        return self._partida(match_id).get_state(player_id, self._nivel_carga())
+
+    def wait_state(self, match_id, player_id, since_version, timeout):
+        """Espera o estado passar de `since_version`. Com todas as vagas de espera ocupadas, responde na hora."""
+        partida = self._partida(match_id)
+        if timeout <= 0 or not self.vagas_espera.acquire(blocking=False):
+            return partida.wait_state(player_id, since_version, 0, self._nivel_carga())
+        try:
+            return partida.wait_state(player_id, since_version, timeout, self._nivel_carga())
+        finally:
+            self.vagas_espera.release()
+
+    def _preparar_espera(self, metodo, params):
+        """Como atender a chamada longa `metodo(*params)` (wait_state ou watch_match) sem uma thread parada.
+
+        Retorna (partida, since_version, timeout, params com timeout 0): quem chama espera a versão da partida
+        passar de since_version (Partida.inscrever) por até timeout segundos e então faz a chamada com os novos
+        parâmetros, que responde sem esperar. Para as demais chamadas, retorna None e elas seguem como vieram.
+        """
+        posicoes = CHAMADAS_LONGAS.get(metodo)
+        if posicoes is None or len(params) <= posicoes[1]:
+            return None
+        try:
+            timeout = min(float(params[posicoes[1]]), TIMEOUT_MAXIMO_ESPERA)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(params[0], int):
+            return None  # um id inválido segue para a chamada, que responde com o erro
+        partida = self.partidas.get(params[0])
+        if partida is None or timeout <= 0:
+            return None
+        params = list(params)
+        params[posicoes[1]] = 0
+        return partida, params[posicoes[0]], timeout, tuple(params)
+
+    def watch_match(self, match_id, since_version=-1, timeout=0):
+        """Acompanha qualquer partida como espectador, sem ocupar vaga de jogador.
+
+        Com todas as vagas de espera ocupadas, responde na hora em vez de prender mais uma thread; sem mudança, a
+        resposta leva "ocupado": True e o espectador deve esperar um pouco antes de perguntar de novo.
+        """
+        partida = self._partida(match_id)
+        if timeout <= 0:
+            return partida.watch_match(since_version, 0)
+        if not self.vagas_espectadores.acquire(blocking=False):
+            return partida.watch_match(since_version, 0, ocupado=True)
+        try:
+            return partida.watch_match(since_version, timeout)
+        finally:
+            self.vagas_espectadores.release()
+
+    def get_chat(self, match_id, player_id, after_seq, limit):
+        return self._partida(match_id).get_chat(player_id, after_seq, limit)
+
+    def send_chat_message(self, match_id, player_id, message):
+        return self._partida(match_id).send_chat_message(player_id, message)
+
+    def place_piece(self, match_id, player_id, linha, coluna):
+        return self._partida(match_id).place_piece(player_id, linha, coluna)
+
+    def place_pieces(self, match_id, player_id, casas):
+        return self._partida(match_id).place_pieces(player_id, casas)
+
+    def get_legal_moves(self, match_id, player_id):
+        return self._partida(match_id).get_legal_moves(player_id)
+
+    def move_piece(self, match_id, player_id, linha_origem, coluna_origem, linha_destino, coluna_destino):
+        return self._partida(match_id).move_piece(player_id, linha_origem, coluna_origem, linha_destino, coluna_destino)
+
+    def remove_piece_when_blocked(self, match_id, player_id, linha, coluna):
+        return self._partida(match_id).remove_piece_when_blocked(player_id, linha, coluna)
+
+    def surrender(self, match_id, player_id):
+        return self._partida(match_id).surrender(player_id)
+
+def registrar_funcoes_shard(servidor, jogo):
+    """Chamadas usadas pelo gateway (gateway.py) quando este servidor é um dos seus processos (--shard).
+
+    Ficam no endpoint de administração, que só ouve em 127.0.0.1, e nunca na porta pública: com elas, qualquer
+    cliente poderia retirar ou criar partidas por fora do gateway.
+    """
+    servidor.register_function(jogo._criar_partida, "shard.create_match")
+    servidor.register_function(lambda: sorted(jogo.partidas), "shard.list_ids")
+    servidor.register_function(jogo._exportar_partida, "shard.export_match")
+    servidor.register_function(jogo._importar_partida, "shard.import_match")
 
 def run_server():
     """Configura e inicia o servidor XML-RPC."""
-    server_addr = ('127.0.0.1', 55555)
-    server = SimpleXMLRPCServer(server_addr, requestHandler=QuietRequestHandler, allow_none=True)
+    parser = argparse.ArgumentParser(description="Servidor XML-RPC do jogo Seega.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=55555)
+    parser.add_argument("--modo", choices=MODOS, default="threads",
+                        help="simples: uma requisição por vez; threads: pool de threads; async: asyncio com keep-alive.")
+    parser.add_argument("--workers", type=int, default=32, help="Número máximo de threads que atendem requisições.")
+    parser.add_argument("--max-conexoes", type=int, default=256, help="Conexões simultâneas aceitas.")
+    parser.add_argument("--timeout-ocioso", type=float, default=30.0, help="Segundos até fechar uma conexão ociosa.")
+    parser.add_argument("--porta-binaria", type=int, default=55556,
+                        help="Porta TCP do protocolo binário (protocolo_binario.py); 0 desativa.")
+    parser.add_argument("--porta-admin", type=int, default=55557,
+                        help="Porta do endpoint de administração (set_profiler), só em 127.0.0.1; 0 desativa.")
+    parser.add_argument("--dados", help="Diretório do diário de partidas: restaura as partidas ao iniciar e grava cada ação.")
+    parser.add_argument("--intervalo-snapshot", type=float, default=60.0, help="Segundos entre snapshots do diário.")
+    parser.add_argument("--espectadores-em-espera", type=int,
+                        help="Espectadores bloqueados em watch_match ao mesmo tempo (padrão: metade de --workers).")
+    parser.add_argument("--jogadores-em-espera", type=int,
+                        help="Jogadores bloqueados em wait_state ao mesmo tempo nos modos simples e threads "
+                             "(padrão: metade de --workers); o modo async espera sem ocupar threads.")
+    parser.add_argument("--shard", action="store_true",
+                        help="Processo de um gateway (gateway.py): aceita ids de partida escolhidos por ele e a troca de partidas, "
+                             "no endpoint de administração (exige --porta-admin).")
+    parser.add_argument("--tablebase", help="Arquivo da tablebase de finais (tablebase.py) usado pelas IAs.")
+    parser.add_argument("--fila-maxima", type=int,
+                        help="Requisições à espera de uma thread antes de recusar com 503 "
+                             "(padrão: igual a --workers).")
+    parser.add_argument("--taxa-por-cliente", type=float, default=50.0,
+                        help="Requisições por segundo de cada cliente (endereço IP e cabeçalho X-Seega-Cliente) "
+                             "antes de recusar com 429; 0 desativa.")
+    parser.add_argument("--taxa-por-endereco", type=float,
+                        help="Requisições por segundo de cada endereço IP, somando todos os seus clientes "
+                             "(padrão: 10x a taxa por cliente).")
+    parser.add_argument("--rajada-por-cliente", type=int, default=0,
+                        help="Requisições seguidas aceitas de um cliente acima da taxa (padrão: 2x a taxa).")
+    args = parser.parse_args()
+    if args.shard and not args.porta_admin:
+        parser.error("--shard exige --porta-admin: as chamadas do gateway ficam no endpoint de administração.")
+
+    admissao = None
+    if args.modo != "simples":
+        admissao = ControleAdmissao(args.workers, args.workers if args.fila_maxima is None else args.fila_maxima,
+                                    args.taxa_por_cliente, args.rajada_por_cliente, args.taxa_por_endereco)
+    server_addr = (args.host, args.porta)
+    server = criar_servidor(args.modo, server_addr, QuietRequestHandler, workers=args.workers,
+                            max_conexoes=args.max_conexoes, timeout_ocioso=args.timeout_ocioso, admissao=admissao)
     server.register_introspection_functions()
-    server.register_instance(GameServer())
-    print("🎮 Servidor XML-RPC do jogo Seega iniciado em http://127.0.0.1:55555")
-    server.serve_forever()
+    server.register_multicall_functions()
+    registrar_funcoes(server)
+    jogo = GameServer(dados=args.dados, intervalo_snapshot=args.intervalo_snapshot,
+                      tablebase=args.tablebase,
+                      espectadores_em_espera=args.espectadores_em_espera or max(1, args.workers // 2),
+                      jogadores_em_espera=args.jogadores_em_espera or max(1, args.workers // 2),
+                      admissao=admissao)
+    if admissao is not None:
+        server.register_function(admissao.estatisticas, "get_admission_stats")
+    server.register_instance(jogo)
+    if hasattr(server, "register_long_poll"):
+        server.register_long_poll(CHAMADAS_LONGAS, jogo._preparar_espera)
+    print(f"🎮 Servidor XML-RPC do jogo Seega iniciado em http://{args.host}:{args.porta} (modo {args.modo})")
+
+    servidor_binario = None
+    if args.porta_binaria:
+        servidor_binario = ServidorBinario((args.host, args.porta_binaria), jogo, workers=args.workers,
+                                           admissao=admissao)
+        registrar_funcoes(servidor_binario)
+        servidor_binario.register_long_poll(CHAMADAS_LONGAS, jogo._preparar_espera)
+        threading.Thread(target=servidor_binario.serve_forever, daemon=True).start()
+        print(f"🔌 Protocolo binário em tcp://{args.host}:{args.porta_binaria}")
+
+    servidor_admin = None
+    if args.porta_admin:
+        servidor_admin = criar_servidor_admin(args.porta_admin)
+        registrar_funcoes_admin(servidor_admin)
+        if args.shard:
+            registrar_funcoes_shard(servidor_admin, jogo)
+        threading.Thread(target=servidor_admin.serve_forever, daemon=True).start()
+        print(f"🔧 Administração em http://127.0.0.1:{args.porta_admin}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jogo._encerrar()
+        if servidor_binario:
+            servidor_binario.shutdown()
+            servidor_binario.server_close()
+        if servidor_admin:
+            servidor_admin.shutdown()
+            servidor_admin.server_close()
 
 if __name__ == "__main__":
-    run_server()
\ No newline at end of file
+    run_server()
@@ -0,0 +1,471 @@
+from xmlrpc.client import Marshaller
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCDispatcher
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import selectors
+import socket
+import threading
+import time
+import xmlrpc.client
+
+from admissao import CABECALHO_CLIENTE, segundos_retry_after
+from metricas import METRICAS, DespachoInstrumentado
+from partida import EstadoPublico
+
+def _xml_do_estado(dados):
+    partes = []
+    Marshaller(allow_none=True).dump_struct(dados, partes.append)
+    return "".join(partes)
+
+def _escrever_estado_publico(marshaller, estado, escrever):
+    """Escreve o XML do estado dos espectadores, gerado só na primeira resposta de cada versão."""
+    escrever(estado.codificado("xml", _xml_do_estado))
+
+class MarshallerSeega(Marshaller):
+    """Marshaller das respostas do servidor: conhece o EstadoPublico, sem mexer no Marshaller do xmlrpc.client."""
+
+    dispatch = dict(Marshaller.dispatch)
+    dispatch[EstadoPublico] = _escrever_estado_publico
+
+def dumps_resposta(params, allow_none=True, encoding=None):
+    """Como `xmlrpc.client.dumps(params, methodresponse=True)`, mas com o MarshallerSeega.
+
+    `params` é uma tupla com o resultado ou uma Fault.
+    """
+    encoding = encoding or "utf-8"
+    cabecalho = "<?xml version='1.0'?>\n" if encoding == "utf-8" else f"<?xml version='1.0' encoding='{encoding}'?>\n"
+    corpo = MarshallerSeega(encoding, allow_none).dumps(params)
+    return "".join((cabecalho, "<methodResponse>\n", corpo, "</methodResponse>\n"))
+
+class DespachoSeega:
+    """Mixin para SimpleXMLRPCDispatcher que monta as respostas com `dumps_resposta`."""
+
+    def _marshaled_dispatch(self, data, dispatch_method=None, path=None):
+        try:
+            params, metodo = xmlrpc.client.loads(data, use_builtin_types=self.use_builtin_types)
+            if dispatch_method is not None:
+                resposta = dispatch_method(metodo, params)
+            else:
+                resposta = self._dispatch(metodo, params)
+            resposta = dumps_resposta((resposta,), self.allow_none, self.encoding)
+        except RecusaHTTP:
+            raise
+        except xmlrpc.client.Fault as falha:
+            resposta = dumps_resposta(falha, self.allow_none, self.encoding)
+        except BaseException as e:
+            resposta = dumps_resposta(xmlrpc.client.Fault(1, f"{type(e)}:{e}"), self.allow_none, self.encoding)
+        return resposta.encode(self.encoding or "utf-8", "xmlcharrefreplace")
+
+def resposta_http(status, corpo, manter_conexao, retry_after=None):
+    cabecalhos = [
+        f"HTTP/1.1 {status}",
+        "Content-Type: text/xml",
+        f"Content-Length: {len(corpo)}",
+        "Connection: keep-alive" if manter_conexao else "Connection: close",
+    ]
+    if retry_after is not None:
+        cabecalhos.append(f"Retry-After: {segundos_retry_after(retry_after)}")
+    return ("\r\n".join(cabecalhos) + "\r\n\r\n").encode("latin-1") + corpo
+
+class RecusaHTTP(Exception):
+    """Levantada pelo dispatcher para o servidor async responder com um status de recusa (429, 503) em vez de 200.
+
+    O gateway a usa para repassar ao cliente a recusa de um processo, com o Retry-After dele.
+    """
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(status)
+        self.status = status
+        self.retry_after = retry_after
+
+def _recusar_conexao(conexao, retry_after):
+    """Responde 503 direto no socket, sem ocupar uma thread do pool, descartando a requisição recebida."""
+    try:
+        conexao.setblocking(False)
+        try:
+            conexao.recv(1 << 16)  # descarta a requisição já recebida, para o fechamento não virar um reset
+        except BlockingIOError:
+            pass
+        conexao.sendall(resposta_http("503 Service Unavailable", b"", False, retry_after))
+    except OSError:
+        pass
+
+class _LimiteTaxaHTTP:
+    """Mixin do request handler que recusa com 429, antes de decodificar o XML, o cliente acima da sua taxa."""
+
+    def do_POST(self):
+        admissao = self.server.admissao
+        espera = admissao.limitar(self.client_address[0], self.headers.get(CABECALHO_CLIENTE)) if admissao else 0
+        if not espera:
+            return super().do_POST()
+        # O corpo é lido (sem decodificar) para a conexão continuar utilizável.
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        self.send_response(429)
+        self.send_header("Content-Length", "0")
+        self.send_header("Retry-After", segundos_retry_after(espera))
+        self.end_headers()
+
+class ServidorXMLRPCSimples(DespachoInstrumentado, DespachoSeega, SimpleXMLRPCServer):
+    """O servidor original, uma requisição por vez, com as métricas de requisição."""
+
+    metricas = METRICAS
+
+class DispatcherInstrumentado(DespachoInstrumentado, DespachoSeega, SimpleXMLRPCDispatcher):
+    metricas = METRICAS
+
+class _AtendimentoPorRequisicao:
+    """Mixin do request handler que não atende a conexão ao ser criado: o servidor chama `handle_one_request`
+    a cada requisição que chega e `finish` ao fechar a conexão."""
+
+    def __init__(self, request, client_address, server):
+        self.request = request
+        self.client_address = client_address
+        self.server = server
+        self.close_connection = False
+        self.setup()
+
+    def tem_dados(self):
+        """Se a próxima requisição já está no buffer de leitura (cliente com pipelining), sem bloquear."""
+        try:
+            self.connection.settimeout(0)
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+class ServidorXMLRPCThreadPool(DespachoInstrumentado, DespachoSeega, SimpleXMLRPCServer):
+    """Servidor XML-RPC com keep-alive HTTP/1.1 que atende cada requisição em um pool limitado de threads.
+
+    As conexões ociosas ficam em um selector, vigiado por uma única thread; quando chega uma requisição, a conexão
+    sai do selector e vai para o pool até a resposta ser enviada. Uma conexão persistente só ocupa uma thread
+    enquanto uma requisição dela é atendida, e as que passam de `timeout_ocioso` segundos sem requisições são fechadas.
+
+    Com `admissao` (admissao.ControleAdmissao), cada requisição que sai do selector conta como pendente até a
+    resposta; se a fila do pool estiver cheia, ela recebe 503 e a conexão é fechada. Clientes acima da sua taxa
+    recebem 429.
+    """
+
+    metricas = METRICAS
+    request_queue_size = 128
+    daemon_threads = True
+
+    def __init__(self, endereco, requestHandler, workers=32, max_conexoes=256, timeout_ocioso=30.0, admissao=None,
+                 **kwargs):
+        self.admissao = admissao
+        self.timeout_ocioso = timeout_ocioso
+        handler = type(requestHandler.__name__, (_LimiteTaxaHTTP, _AtendimentoPorRequisicao, requestHandler), {
+            "protocol_version": "HTTP/1.1",
+            "timeout": timeout_ocioso,
+        })
+        super().__init__(endereco, requestHandler=handler, **kwargs)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rpc")
+        self.vagas_conexao = threading.BoundedSemaphore(max_conexoes)
+        # Conexões que voltam ao selector, entregues pelas threads do pool à thread que o vigia.
+        self.devolvidas = deque()
+        self.selector = selectors.DefaultSelector()
+        self._despertar_leitura, self._despertar_escrita = socket.socketpair()
+        self._despertar_leitura.setblocking(False)
+        self.selector.register(self._despertar_leitura, selectors.EVENT_READ)
+        self._encerrando = False
+        threading.Thread(target=self._vigiar_conexoes, daemon=True, name="conexoes").start()
+
+    def process_request(self, request, client_address):
+        """Põe a conexão aceita no selector; recusa de imediato se o limite de conexões foi atingido."""
+        if not self.vagas_conexao.acquire(blocking=False):
+            self.shutdown_request(request)
+            return
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+            self._fechar_socket(request)
+            return
+        self._devolver(handler)
+
+    def _devolver(self, handler):
+        self.devolvidas.append(handler)
+        try:
+            self._despertar_escrita.send(b"\0")
+        except OSError:
+            pass
+
+    def _vigiar_conexoes(self):
+        """Laço da thread do selector: entrega ao pool as conexões com requisição e fecha as ociosas."""
+        ultima_varredura = time.monotonic()
+        while not self._encerrando:
+            try:
+                prontas = self.selector.select(timeout=1.0)
+            except OSError:
+                return
+            for chave, _ in prontas:
+                if chave.fileobj is self._despertar_leitura:
+                    try:
+                        self._despertar_leitura.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                self.selector.unregister(chave.fileobj)
+                handler = chave.data[0]
+                if not handler.tem_dados():  # o cliente fechou a conexão
+                    self._fechar(handler)
+                    continue
+                if self.admissao is not None and not self.admissao.entrar():
+                    _recusar_conexao(handler.connection, self.admissao.espera_fila())
+                    self._fechar(handler)
+                    continue
+                self.executor.submit(self._atender_requisicao, handler)
+            agora = time.monotonic()
+            while self.devolvidas:
+                handler = self.devolvidas.popleft()
+                self.selector.register(handler.connection, selectors.EVENT_READ, (handler, agora))
+            if agora - ultima_varredura >= 1.0:
+                ultima_varredura = agora
+                for chave in list(self.selector.get_map().values()):
+                    if chave.data is not None and agora - chave.data[1] > self.timeout_ocioso:
+                        self.selector.unregister(chave.fileobj)
+                        self._fechar(chave.data[0])
+
+    def _atender_requisicao(self, handler):
+        """Atende as requisições que já chegaram na conexão e a devolve ao selector (ou a fecha)."""
+        try:
+            while True:
+                handler.handle_one_request()
+                if handler.close_connection or not handler.tem_dados():
+                    break
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+            handler.close_connection = True
+        finally:
+            if self.admissao is not None:
+                self.admissao.sair()
+        if handler.close_connection or self._encerrando:
+            self._fechar(handler)
+        else:
+            self._devolver(handler)
+
+    def _fechar(self, handler):
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self._fechar_socket(handler.request)
+
+    def _fechar_socket(self, request):
+        self.shutdown_request(request)
+        self.vagas_conexao.release()
+
+    def server_close(self):
+        super().server_close()
+        self._encerrando = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for chave in list(self.selector.get_map().values()):
+            if chave.data is not None:
+                self._fechar(chave.data[0])
+        self._despertar_escrita.close()
+
+
+def _concluir(futuro):
+    if not futuro.done():
+        futuro.set_result(None)
+
+class ServidorXMLRPCAsync:
+    """Servidor XML-RPC sobre asyncio: mesmo protocolo HTTP/XML, conexões persistentes e despacho em threads.
+
+    As chamadas longas registradas com `register_long_poll` esperam no laço de eventos, sem ocupar o pool.
+
+    Com `admissao` (admissao.ControleAdmissao), requisições que chegam com a fila do pool cheia recebem 503 e
+    clientes acima da sua taxa recebem 429, ambas respondidas pelo laço de eventos sem passar pelo pool.
+    """
+
+    rpc_paths = ("/", "/RPC2")
+    tamanho_maximo_corpo = 1 << 20
+
+    def __init__(self, endereco, workers=32, max_conexoes=1024, timeout_ocioso=30.0, allow_none=True, dispatcher=None,
+                 admissao=None):
+        self.endereco = endereco
+        self.admissao = admissao
+        self.timeout_ocioso = timeout_ocioso
+        self.max_conexoes = max_conexoes
+        self.conexoes_ativas = 0
+        self.dispatcher = dispatcher or DispatcherInstrumentado(allow_none=allow_none, encoding=None)
+        # Os métodos do GameServer usam locks bloqueantes, então o despacho roda fora do laço de eventos.
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rpc")
+        self._loop = None
+        self._servidor = None
+        self.chamadas_longas = ()
+        self.preparar_espera = None
+
+    def register_long_poll(self, metodos, preparar_espera):
+        """Faz as chamadas `metodos` esperarem no laço de eventos, com `preparar_espera(metodo, params)` dizendo
+        a partida, a versão e o tempo da espera (veja GameServer._preparar_espera)."""
+        self.chamadas_longas = tuple(nome.encode() for nome in metodos)
+        self.preparar_espera = preparar_espera
+
+    def register_introspection_functions(self):
+        self.dispatcher.register_introspection_functions()
+
+    def register_multicall_functions(self):
+        self.dispatcher.register_multicall_functions()
+
+    def register_instance(self, instance, allow_dotted_names=False):
+        self.dispatcher.register_instance(instance, allow_dotted_names)
+
+    def register_function(self, function=None, name=None):
+        return self.dispatcher.register_function(function, name)
+
+    async def _ler_requisicao(self, reader):
+        """Lê uma requisição HTTP completa. Retorna None se o cliente fechou a conexão."""
+        linha = await reader.readline()
+        if not linha:
+            return None
+        metodo, caminho, versao = linha.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        cabecalhos = {}
+        while True:
+            linha = await reader.readline()
+            if linha in (b"\r\n", b"\n", b""):
+                break
+            nome, _, valor = linha.decode("latin-1").partition(":")
+            cabecalhos[nome.strip().lower()] = valor.strip()
+        tamanho = int(cabecalhos.get("content-length", 0))
+        if tamanho > self.tamanho_maximo_corpo:
+            raise ValueError("Corpo da requisição grande demais.")
+        corpo = await reader.readexactly(tamanho) if tamanho else b""
+        return metodo, caminho, versao, cabecalhos, corpo
+
+    async def _despachar(self, corpo, manter_conexao):
+        """Executa a requisição no pool de threads e monta a resposta HTTP."""
+        loop = asyncio.get_running_loop()
+        try:
+            resposta = await loop.run_in_executor(self.executor, self.dispatcher._marshaled_dispatch, corpo)
+        except RecusaHTTP as recusa:
+            return resposta_http(recusa.status, b"", manter_conexao, recusa.retry_after)
+        return resposta_http("200 OK", resposta, manter_conexao)
+
+    async def _esperar(self, corpo):
+        """Numa chamada longa, espera no laço de eventos a versão da partida mudar ou o tempo acabar.
+
+        Retorna o corpo da chamada já sem espera, para o pool só montar a resposta.
+        """
+        if not any(nome in corpo for nome in self.chamadas_longas):
+            return corpo
+        try:
+            params, metodo = xmlrpc.client.loads(corpo)
+        except Exception:
+            return corpo  # o dispatcher responde o erro
+        try:
+            espera = self.preparar_espera(metodo, params)
+        except Exception:
+            return corpo  # idem: a chamada sem espera chega ao dispatcher, que responde com uma falha XML-RPC
+        if espera is None:
+            return corpo
+        partida, versao, timeout, params = espera
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+
+        def avisar():
+            try:
+                loop.call_soon_threadsafe(_concluir, futuro)
+            except RuntimeError:
+                pass  # o laço já foi encerrado
+
+        if partida.inscrever(versao, avisar):
+            try:
+                await asyncio.wait_for(futuro, timeout)
+            except asyncio.TimeoutError:
+                partida.desinscrever(avisar)
+        return xmlrpc.client.dumps(params, metodo, allow_none=True).encode()
+
+    async def _atender_conexao(self, reader, writer):
+        if self.conexoes_ativas >= self.max_conexoes:
+            writer.close()
+            return
+        self.conexoes_ativas += 1
+        endereco_cliente = (writer.get_extra_info("peername") or ("?",))[0]
+        admissao = self.admissao
+        try:
+            while True:
+                try:
+                    requisicao = await asyncio.wait_for(self._ler_requisicao(reader), self.timeout_ocioso)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+                    break
+                if requisicao is None:
+                    break
+                metodo, caminho, versao, cabecalhos, corpo = requisicao
+                conexao = cabecalhos.get("connection", "").lower()
+                manter_conexao = conexao != "close" and (versao == "HTTP/1.1" or conexao == "keep-alive")
+
+                if metodo != "POST" or caminho not in self.rpc_paths:
+                    writer.write(resposta_http("404 Not Found", b"", manter_conexao))
+                elif admissao is None:
+                    writer.write(await self._despachar(await self._esperar(corpo), manter_conexao))
+                else:
+                    espera = admissao.limitar(endereco_cliente, cabecalhos.get(CABECALHO_CLIENTE.lower()))
+                    if espera:
+                        writer.write(resposta_http("429 Too Many Requests", b"", manter_conexao, espera))
+                        await writer.drain()
+                        if not manter_conexao:
+                            break
+                        continue
+                    # a espera não conta na fila: só o trabalho no pool é admitido
+                    corpo = await self._esperar(corpo)
+                    if not admissao.entrar():
+                        writer.write(resposta_http("503 Service Unavailable", b"", manter_conexao, admissao.espera_fila()))
+                    else:
+                        try:
+                            writer.write(await self._despachar(corpo, manter_conexao))
+                        finally:
+                            admissao.sair()
+                await writer.drain()
+                if not manter_conexao:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.conexoes_ativas -= 1
+            writer.close()
+
+    async def _servir(self):
+        self._loop = asyncio.get_running_loop()
+        host, porta = self.endereco
+        self._servidor = await asyncio.start_server(self._atender_conexao, host, porta, backlog=512)
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    def serve_forever(self):
+        try:
+            asyncio.run(self._servir())
+        except asyncio.CancelledError:
+            pass
+
+    def shutdown(self):
+        if self._loop is not None and self._servidor is not None:
+            self._loop.call_soon_threadsafe(self._servidor.close)
+
+    def server_close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+MODOS = ("simples", "threads", "async")
+
+def criar_servidor_admin(porta):
+    """Cria o servidor das chamadas de administração, ouvindo só em 127.0.0.1 e fora da porta pública do jogo."""
+    servidor = SimpleXMLRPCServer(("127.0.0.1", porta), logRequests=False, allow_none=True)
+    servidor.register_introspection_functions()
+    return servidor
+
+def criar_servidor(modo, endereco, requestHandler, workers=32, max_conexoes=256, timeout_ocioso=30.0, admissao=None):
+    """Cria o servidor RPC no modo escolhido: 'simples' (uma requisição por vez), 'threads' ou 'async'.
+
+    O controle de admissão vale para 'threads' e 'async'; o servidor simples o ignora.
+    """
+    if modo == "simples":
+        return ServidorXMLRPCSimples(endereco, requestHandler=requestHandler, allow_none=True)
+    if modo == "threads":
+        return ServidorXMLRPCThreadPool(endereco, requestHandler, workers=workers, max_conexoes=max_conexoes,
+                                        timeout_ocioso=timeout_ocioso, admissao=admissao, allow_none=True)
+    if modo == "async":
+        return ServidorXMLRPCAsync(endereco, workers=workers, max_conexoes=max_conexoes,
+                                   timeout_ocioso=timeout_ocioso, allow_none=True, admissao=admissao)
+    raise ValueError(f"Modo de servidor desconhecido: {modo}")
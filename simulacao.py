@@ -0,0 +1,142 @@
+"""Estado completo de uma partida de Seega em bitboards, para busca e simulação sem servidor.
+
+Reproduz as regras aplicadas por `Partida`: colocação de duas peças por turno, fase de movimentação
+com captura obrigatória, capturas em cadeia, regra dos 3 turnos da peça central e remoção quando bloqueado.
+"""
+
+from bitboard import (
+    N, CHEIO, CENTRO, iterar_bits, para_bitboards, para_tabuleiro, pode_continuar_bits,
+    movimentos_legais_bits
+)
+
+PECAS_POR_JOGADOR = 12
+
+COLOCAR = 0
+MOVER = 1
+REMOVER = 2
+
+class EstadoSeega:
+    __slots__ = ("b1", "b2", "jogador", "fase", "colocadas", "no_turno",
+                 "jogador_centro", "turnos_centro", "vencedor")
+
+    def __init__(self, b1=0, b2=0, jogador=1, fase="colocacao", colocadas=(0, 0), no_turno=0,
+                 jogador_centro=None, turnos_centro=0, vencedor=None):
+        self.b1 = b1
+        self.b2 = b2
+        self.jogador = jogador
+        self.fase = fase
+        self.colocadas = colocadas
+        self.no_turno = no_turno
+        self.jogador_centro = jogador_centro
+        self.turnos_centro = turnos_centro
+        self.vencedor = vencedor
+
+    @classmethod
+    def de_partida(cls, partida):
+        """Copia o estado de uma `Partida`. Deve ser chamada com o lock da partida."""
+        b1, b2 = para_bitboards(partida.tabuleiro)
+        return cls(b1, b2, partida.jogador_atual, partida.fase,
+                   (partida.pecas_colocadas[1], partida.pecas_colocadas[2]),
+                   partida.pecas_turno_atual[partida.jogador_atual],
+                   partida.jogador_peca_central, partida.turnos_peca_central, partida.vencedor)
+
+    def copiar(self):
+        return EstadoSeega(self.b1, self.b2, self.jogador, self.fase, self.colocadas, self.no_turno,
+                           self.jogador_centro, self.turnos_centro, self.vencedor)
+
+    def tabuleiro(self):
+        return para_tabuleiro(self.b1, self.b2)
+
+    def pecas(self, jogador):
+        """Retorna (peças do jogador, peças do adversário)."""
+        return (self.b1, self.b2) if jogador == 1 else (self.b2, self.b1)
+
+    def regra_central_ativa(self):
+        proprias, _ = self.pecas(self.jogador)
+        return bool(proprias & CENTRO) and self.jogador_centro == self.jogador and self.turnos_centro >= 3
+
+    def legais(self):
+        """Jogadas legais da fase de movimentação: (remocao, restricao, {(origem, destino): capturadas})."""
+        proprias, adversarias = self.pecas(self.jogador)
+        return movimentos_legais_bits(proprias, adversarias, self.regra_central_ativa())
+
+    def jogadas(self):
+        """Lista as jogadas legais como tuplas (COLOCAR, casa), (MOVER, origem, destino, capturadas) ou (REMOVER, casa)."""
+        if self.vencedor is not None:
+            return []
+        if self.fase == "colocacao":
+            vazias = CHEIO & ~(self.b1 | self.b2 | CENTRO)
+            return [(COLOCAR, casa) for casa in iterar_bits(vazias)]
+        remocao, _, movimentos = self.legais()
+        if remocao:
+            _, adversarias = self.pecas(self.jogador)
+            return [(REMOVER, casa) for casa in iterar_bits(adversarias)]
+        return [(MOVER, origem, destino, capturadas) for (origem, destino), capturadas in movimentos.items()]
+
+    def _definir_pecas(self, jogador, proprias, adversarias):
+        if jogador == 1:
+            self.b1, self.b2 = proprias, adversarias
+        else:
+            self.b2, self.b1 = proprias, adversarias
+
+    def aplicar(self, jogada):
+        """Retorna um novo estado com a jogada aplicada (a jogada deve ser legal)."""
+        novo = self.copiar()
+        jogador = self.jogador
+        proprias, adversarias = self.pecas(jogador)
+        tipo = jogada[0]
+
+        if tipo == COLOCAR:
+            novo._definir_pecas(jogador, proprias | (1 << jogada[1]), adversarias)
+            colocadas = list(self.colocadas)
+            colocadas[jogador - 1] += 1
+            novo.colocadas = tuple(colocadas)
+            novo.no_turno = self.no_turno + 1
+            if novo.no_turno == 2:
+                novo.no_turno = 0
+                if colocadas[0] >= PECAS_POR_JOGADOR and colocadas[1] >= PECAS_POR_JOGADOR:
+                    novo.fase = "movimentacao"
+                else:
+                    novo.jogador = 3 - jogador
+            return novo
+
+        if tipo == REMOVER:
+            adversarias &= ~(1 << jogada[1])
+            novo._definir_pecas(jogador, proprias, adversarias)
+            if not adversarias:
+                novo.vencedor = jogador
+            return novo
+
+        _, origem, destino, capturadas = jogada
+        proprias = (proprias & ~(1 << origem)) | (1 << destino)
+        adversarias &= ~capturadas
+        novo._definir_pecas(jogador, proprias, adversarias)
+        if not adversarias:
+            novo.vencedor = jogador
+            return novo
+        if capturadas and pode_continuar_bits(destino, proprias, adversarias):
+            return novo
+
+        novo.jogador = 3 - jogador
+        no_centro = 1 if novo.b1 & CENTRO else 2 if novo.b2 & CENTRO else 0
+        if no_centro != 0 and no_centro == self.jogador_centro:
+            novo.turnos_centro = self.turnos_centro + 1
+        elif no_centro != 0:
+            novo.jogador_centro = no_centro
+            novo.turnos_centro = 1
+        else:
+            novo.jogador_centro = None
+            novo.turnos_centro = 0
+        return novo
+
+def casa(indice):
+    """Converte um índice de casa em (linha, coluna)."""
+    return divmod(indice, N)
+
+def descrever_jogada(jogada):
+    """Converte a jogada para os argumentos das chamadas RPC: (nome do método, argumentos)."""
+    if jogada[0] == COLOCAR:
+        return "place_piece", casa(jogada[1])
+    if jogada[0] == REMOVER:
+        return "remove_piece_when_blocked", casa(jogada[1])
+    return "move_piece", casa(jogada[1]) + casa(jogada[2])
@@ -0,0 +1,424 @@
+"""Tablebase de finais do Seega: todas as posições da fase de movimentação com até K peças de cada lado,
+resolvidas por análise retrógrada e gravadas em um arquivo consultado por mmap.
+
+Cada posição é vista do jogador da vez: (peças próprias, peças adversárias, estado da peça central). O
+estado da peça central tem 7 valores: 0 = sem dono, 1..3 = dono é o jogador da vez há min(turnos, 3)
+turnos, 4..6 = dono é o adversário; as regras só distinguem turnos >= 3, então o corte não perde nada.
+
+O índice de uma posição é um hash perfeito dentro da sua classe de material (a peças próprias, b adversárias):
+
+    (representante das próprias sob as 8 simetrias do tabuleiro * C(25 - a, b) + posto das adversárias
+     entre as casas livres) * 7 + estado do centro
+
+Cada posição ocupa um byte: 0 = empate, 1..127 = vitória em d lances, 128 + d = derrota em d lances
+(distâncias acima de 127 ficam em 127). Um lance é qualquer jogada, inclusive cada captura de uma cadeia.
+
+Uso:
+    python tablebase.py gerar --pecas 3 --saida finais.tb --processos 4
+    python tablebase.py consultar --arquivo finais.tb --proprias 0,0 2,2 --adversarias 4,4
+"""
+
+import argparse
+import array
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+from itertools import combinations
+
+import numpy as np
+
+from bitboard import CASAS, CHEIO, N
+from game_logic import geometria
+from simulacao import EstadoSeega, descrever_jogada
+
+MAGICO = b"SEEGA-TABLEBASE-1\n"
+TAMANHO_CABECALHO = struct.Struct("<I")
+ESTADOS_CENTRO = 7
+MAX_DISTANCIA = 127
+DERROTA = 128
+
+EMPATE, VITORIA, PERDA = 0, 1, -1
+
+def _permutacoes():
+    """As 8 simetrias do quadrado como permutações das casas (as mesmas de game_logic.Geometria)."""
+    return geometria(N).simetrias
+
+def _tabelas_por_byte(permutacoes):
+    """Para cada simetria, a imagem de cada byte da máscara, para transformar uma máscara com 4 consultas."""
+    tabelas = []
+    for permutacao in permutacoes:
+        por_byte = []
+        for deslocamento in range(0, CASAS, 8):
+            tabela = []
+            for byte in range(256):
+                imagem = 0
+                for i in range(8):
+                    if byte >> i & 1 and deslocamento + i < CASAS:
+                        imagem |= 1 << permutacao[deslocamento + i]
+                tabela.append(imagem)
+            por_byte.append(tabela)
+        tabelas.append(por_byte)
+    return tabelas
+
+TABELAS_SIMETRIA = _tabelas_por_byte(_permutacoes())
+BINOMIAL = [[math.comb(n, k) for k in range(CASAS + 1)] for n in range(CASAS + 1)]
+
+def transformar(mascara, simetria):
+    t0, t1, t2, t3 = TABELAS_SIMETRIA[simetria]
+    return t0[mascara & 0xFF] | t1[mascara >> 8 & 0xFF] | t2[mascara >> 16 & 0xFF] | t3[mascara >> 24]
+
+def canonica(mascara):
+    """Menor imagem da máscara entre as 8 simetrias. Retorna (imagem, simetria usada)."""
+    melhor, escolhida = mascara, 0
+    for simetria in range(1, 8):
+        imagem = transformar(mascara, simetria)
+        if imagem < melhor:
+            melhor, escolhida = imagem, simetria
+    return melhor, escolhida
+
+def _bits(mascara):
+    casas = []
+    while mascara:
+        menor = mascara & -mascara
+        casas.append(menor.bit_length() - 1)
+        mascara ^= menor
+    return casas
+
+def _posto(posicoes):
+    """Posto de um conjunto de posições crescentes no sistema combinatório de numeração."""
+    return sum(BINOMIAL[p][i + 1] for i, p in enumerate(posicoes))
+
+def _desfazer_posto(posto, k):
+    posicoes = []
+    for i in range(k, 0, -1):
+        p = i - 1
+        while BINOMIAL[p + 1][i] <= posto:
+            p += 1
+        posicoes.append(p)
+        posto -= BINOMIAL[p][i]
+    return posicoes[::-1]
+
+def _centro(c):
+    """Estado do centro relativo -> (jogador_centro, turnos_centro) com o jogador da vez sendo 1."""
+    if c == 0:
+        return None, 0
+    return (1, c) if c <= 3 else (2, c - 3)
+
+def _centro_relativo(dono, turnos):
+    if dono is None:
+        return 0
+    return min(turnos, 3) + (0 if dono == 1 else 3)
+
+def codificar(resultado, distancia):
+    distancia = min(distancia, MAX_DISTANCIA)
+    if resultado == VITORIA:
+        return distancia
+    if resultado == PERDA:
+        return DERROTA + distancia
+    return 0
+
+def decodificar(valor):
+    """Byte da tabela -> (resultado do ponto de vista do jogador da vez, distância)."""
+    if valor == 0:
+        return EMPATE, 0
+    if valor < DERROTA:
+        return VITORIA, valor
+    return PERDA, valor - DERROTA
+
+class Indexador:
+    """Hash perfeito das posições com até `pecas` peças de cada lado. Os representantes são recalculados ao abrir."""
+
+    def __init__(self, pecas, classes=None):
+        self.pecas = pecas
+        self.representantes = {}
+        self.indice_representante = {}
+        for a in range(1, pecas + 1):
+            reps = sorted({canonica(sum(1 << c for c in combinacao))[0]
+                           for combinacao in combinations(range(CASAS), a)})
+            self.representantes[a] = reps
+            self.indice_representante[a] = {mascara: i for i, mascara in enumerate(reps)}
+        if classes is None:
+            classes, deslocamento = {}, 0
+            for a, b in sorted(self.classes_possiveis(), key=lambda classe: (sum(classe), classe)):
+                tamanho = len(self.representantes[a]) * BINOMIAL[CASAS - a][b] * ESTADOS_CENTRO
+                classes[(a, b)] = (deslocamento, tamanho)
+                deslocamento += tamanho
+        self.classes = classes
+        self.total = sum(tamanho for _, tamanho in classes.values())
+
+    def classes_possiveis(self):
+        return [(a, b) for a in range(1, self.pecas + 1) for b in range(1, self.pecas + 1)]
+
+    def indice(self, proprias, adversarias, c):
+        """Índice global da posição, ou None se ela estiver fora da tabela."""
+        a, b = bin(proprias).count("1"), bin(adversarias).count("1")
+        classe = self.classes.get((a, b))
+        if classe is None:
+            return None
+        representante, simetria = canonica(proprias)
+        adversarias = transformar(adversarias, simetria)
+        livres = CHEIO & ~representante
+        posicoes = [bin(livres & ((1 << casa) - 1)).count("1") for casa in _bits(adversarias)]
+        local = self.indice_representante[a][representante] * BINOMIAL[CASAS - a][b] + _posto(posicoes)
+        return classe[0] + local * ESTADOS_CENTRO + c
+
+    def posicao(self, a, b, indice):
+        """Inverso de `indice` dentro da classe (a, b): retorna (próprias, adversárias, estado do centro)."""
+        local, c = divmod(indice - self.classes[(a, b)][0], ESTADOS_CENTRO)
+        rep, posto = divmod(local, BINOMIAL[CASAS - a][b])
+        proprias = self.representantes[a][rep]
+        livres = _bits(CHEIO & ~proprias)
+        adversarias = sum(1 << livres[p] for p in _desfazer_posto(posto, b))
+        return proprias, adversarias, c
+
+def estado_da_posicao(proprias, adversarias, c):
+    jogador_centro, turnos_centro = _centro(c)
+    return EstadoSeega(proprias, adversarias, 1, "movimentacao", (12, 12), 0, jogador_centro, turnos_centro)
+
+def posicao_do_estado(estado):
+    """(próprias, adversárias, estado do centro) do ponto de vista do jogador da vez."""
+    proprias, adversarias = estado.pecas(estado.jogador)
+    dono = estado.jogador_centro
+    if dono is not None:
+        dono = 1 if dono == estado.jogador else 2
+    return proprias, adversarias, _centro_relativo(dono, estado.turnos_centro)
+
+# Estado dos processos de geração: o indexador e a tabela parcial (já resolvida nas classes menores).
+_GERACAO = {}
+
+def _iniciar_processo(caminho, pecas, classes, inicio_dados):
+    indexador = Indexador(pecas, classes)
+    _GERACAO["indexador"] = indexador
+    _GERACAO["tabela"] = np.memmap(caminho, dtype=np.uint8, mode="r", offset=inicio_dados, shape=(indexador.total,))
+
+def _sucessores(tarefa):
+    """Arestas das posições [inicio, fim) da classe (a, b) até seus sucessores.
+
+    Sucessores dentro do grupo sendo resolvido viram arestas internas (origem, destino, mesmo jogador); os demais
+    (vitória imediata ou classe menor, já resolvida) viram arestas externas (origem, resultado para a origem, distância).
+    """
+    a, b, inicio, fim, grupo = tarefa
+    indexador, tabela = _GERACAO["indexador"], _GERACAO["tabela"]
+    internas, externas = array.array("q"), array.array("q")
+    for indice in range(inicio, fim):
+        estado = estado_da_posicao(*indexador.posicao(a, b, indice))
+        for jogada in estado.jogadas():
+            novo = estado.aplicar(jogada)
+            if novo.vencedor is not None:
+                externas.extend((indice, VITORIA, 0))
+                continue
+            proprias, adversarias, c = posicao_do_estado(novo)
+            destino = indexador.indice(proprias, adversarias, c)
+            mesmo = novo.jogador == 1
+            if (bin(proprias).count("1"), bin(adversarias).count("1")) in grupo:
+                internas.extend((indice, destino, mesmo))
+            else:
+                resultado, distancia = decodificar(int(tabela[destino]))
+                externas.extend((indice, resultado if mesmo else -resultado, distancia))
+    return internas.tobytes(), externas.tobytes()
+
+def _resolver_grupo(locais, n, internas, externas):
+    """Análise retrógrada em camadas: na camada d ficam as posições cujo resultado sai em d lances.
+
+    Uma posição ganha na primeira camada em que algum sucessor dá vitória a ela; perde quando o último sucessor
+    que não perdia para ela é resolvido como derrota. O que sobra é empate (jogo infinito com jogo perfeito).
+    """
+    origens, destinos, mesmos = locais(internas[:, 0]), locais(internas[:, 1]), internas[:, 2].astype(bool)
+    ext_origens, ext_resultados, ext_distancias = locais(externas[:, 0]), externas[:, 1], externas[:, 2]
+    restantes = np.bincount(origens, minlength=n) + np.bincount(ext_origens, minlength=n)
+
+    ordem = np.argsort(destinos, kind="stable")
+    origens, destinos, mesmos = origens[ordem], destinos[ordem], mesmos[ordem]
+    inicio_por_destino = np.searchsorted(destinos, np.arange(n + 1))
+
+    resultado = np.zeros(n, dtype=np.int8)
+    distancia = np.zeros(n, dtype=np.int32)
+    novos = np.empty(0, dtype=np.int64)
+    ultima_externa = int(ext_distancias.max()) if len(ext_distancias) else -1
+    camada = 1
+    while len(novos) or camada - 1 <= ultima_externa:
+        comecos, fins = inicio_por_destino[novos], inicio_por_destino[novos + 1]
+        quantidades = fins - comecos
+        arestas = np.repeat(comecos - np.cumsum(quantidades) + quantidades, quantidades) + np.arange(quantidades.sum())
+        resultado_destino = resultado[destinos[arestas]]
+        candidatas = np.concatenate((origens[arestas], ext_origens[ext_distancias == camada - 1]))
+        resultados = np.concatenate((np.where(mesmos[arestas], resultado_destino, -resultado_destino),
+                                     ext_resultados[ext_distancias == camada - 1]))
+
+        vitorias = np.unique(candidatas[resultados == VITORIA])
+        vitorias = vitorias[resultado[vitorias] == EMPATE]
+        resultado[vitorias], distancia[vitorias] = VITORIA, camada
+
+        perdendo = candidatas[resultados == PERDA]
+        derrotas, vezes = np.unique(perdendo, return_counts=True)
+        restantes[derrotas] -= vezes
+        derrotas = derrotas[(resultado[derrotas] == EMPATE) & (restantes[derrotas] == 0)]
+        resultado[derrotas], distancia[derrotas] = PERDA, camada
+
+        novos = np.concatenate((vitorias, derrotas))
+        camada += 1
+    return resultado, distancia
+
+def gerar(caminho, pecas=3, processos=None, progresso=print):
+    """Gera a tablebase com até `pecas` peças por lado em `caminho`. Retorna um resumo com tamanhos e tempos."""
+    processos = processos or os.cpu_count()
+    inicio_total = time.perf_counter()
+    indexador = Indexador(pecas)
+    cabecalho = json.dumps({
+        "pecas": pecas,
+        "classes": [[a, b, deslocamento, tamanho] for (a, b), (deslocamento, tamanho) in indexador.classes.items()],
+    }).encode()
+    inicio_dados = len(MAGICO) + TAMANHO_CABECALHO.size + len(cabecalho)
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(MAGICO + TAMANHO_CABECALHO.pack(len(cabecalho)) + cabecalho)
+        arquivo.truncate(inicio_dados + indexador.total)
+    tabela = np.memmap(caminho, dtype=np.uint8, mode="r+", offset=inicio_dados, shape=(indexador.total,))
+
+    grupos = sorted({tuple(sorted(((a, b), (b, a)))) for a, b in indexador.classes}, key=lambda g: (sum(g[0]), g))
+    resumo = {"pecas": pecas, "posicoes": indexador.total, "processos": processos, "grupos": []}
+    with multiprocessing.Pool(processos, _iniciar_processo,
+                              (caminho, pecas, indexador.classes, inicio_dados)) as pool:
+        for grupo in grupos:
+            grupo = tuple(dict.fromkeys(grupo))
+            inicio = time.perf_counter()
+            faixas = [indexador.classes[classe] for classe in grupo]
+            n = sum(tamanho for _, tamanho in faixas)
+            passo = max(256, n // (processos * 32))
+            tarefas = [(a, b, i, min(i + passo, deslocamento + tamanho), set(grupo))
+                       for (a, b), (deslocamento, tamanho) in zip(grupo, faixas)
+                       for i in range(deslocamento, deslocamento + tamanho, passo)]
+            internas, externas = [], []
+            for parte_internas, parte_externas in pool.imap(_sucessores, tarefas):
+                internas.append(np.frombuffer(parte_internas, dtype=np.int64))
+                externas.append(np.frombuffer(parte_externas, dtype=np.int64))
+            internas = np.concatenate(internas).reshape(-1, 3)
+            externas = np.concatenate(externas).reshape(-1, 3)
+            geracao = time.perf_counter() - inicio
+
+            def locais(indices, faixas=faixas):
+                (d1, t1), *resto = faixas
+                if not resto:
+                    return indices - d1
+                d2, _ = resto[0]
+                return np.where(indices < d1 + t1, indices - d1, indices - d2 + t1)
+
+            resultado, distancia = _resolver_grupo(locais, n, internas, externas)
+            valores = np.where(resultado == VITORIA, np.minimum(distancia, MAX_DISTANCIA),
+                               np.where(resultado == PERDA, DERROTA + np.minimum(distancia, MAX_DISTANCIA), 0))
+            pos = 0
+            for deslocamento, tamanho in faixas:
+                tabela[deslocamento:deslocamento + tamanho] = valores[pos:pos + tamanho]
+                pos += tamanho
+            tabela.flush()
+
+            dados_grupo = {"classes": [list(classe) for classe in grupo], "posicoes": n,
+                           "vitorias": int((resultado == VITORIA).sum()), "derrotas": int((resultado == PERDA).sum()),
+                           "empates": int((resultado == EMPATE).sum()), "maior_distancia": int(distancia.max()),
+                           "arestas": len(internas) + len(externas),
+                           "segundos_sucessores": geracao, "segundos_total": time.perf_counter() - inicio}
+            resumo["grupos"].append(dados_grupo)
+            if progresso:
+                progresso(f"[*] {'+'.join(f'{a}x{b}' for a, b in grupo)}: {n} posições, "
+                          f"{dados_grupo['vitorias']} vitórias, {dados_grupo['derrotas']} derrotas, "
+                          f"{dados_grupo['empates']} empates, até {dados_grupo['maior_distancia']} lances "
+                          f"({dados_grupo['segundos_total']:.1f} s)")
+    del tabela
+    resumo["bytes"] = os.path.getsize(caminho)
+    resumo["segundos"] = time.perf_counter() - inicio_total
+    return resumo
+
+class Tablebase:
+    """Consulta a tablebase mapeada em memória: cada consulta calcula o índice e lê um byte."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, "rb") as arquivo:
+            if arquivo.read(len(MAGICO)) != MAGICO:
+                raise ValueError(f"{caminho} não é uma tablebase de Seega.")
+            tamanho, = TAMANHO_CABECALHO.unpack(arquivo.read(TAMANHO_CABECALHO.size))
+            cabecalho = json.loads(arquivo.read(tamanho))
+            self.inicio_dados = len(MAGICO) + TAMANHO_CABECALHO.size + tamanho
+            self.mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self.pecas = cabecalho["pecas"]
+        self.indexador = Indexador(self.pecas, {(a, b): (d, t) for a, b, d, t in cabecalho["classes"]})
+        self.consultas = 0
+        self.acertos = 0
+
+    def consultar(self, estado):
+        """(resultado para o jogador da vez, distância em lances) ou None se a posição não está na tabela."""
+        self.consultas += 1
+        if estado.fase != "movimentacao" or estado.vencedor is not None:
+            return None
+        proprias, adversarias, c = posicao_do_estado(estado)
+        indice = self.indexador.indice(proprias, adversarias, c)
+        if indice is None:
+            return None
+        self.acertos += 1
+        return decodificar(self.mapa[self.inicio_dados + indice])
+
+    def melhor_jogada(self, estado):
+        """Jogada ótima pela tabela: a vitória mais curta, senão um empate, senão a derrota mais longa."""
+        melhor, chave_melhor = None, None
+        for jogada in estado.jogadas():
+            novo = estado.aplicar(jogada)
+            if novo.vencedor is not None:
+                return jogada
+            consulta = self.consultar(novo)
+            if consulta is None:
+                return None
+            resultado, distancia = consulta
+            if novo.jogador != estado.jogador:
+                resultado = -resultado
+            chave = (resultado, -distancia if resultado == VITORIA else distancia)
+            if chave_melhor is None or chave > chave_melhor:
+                melhor, chave_melhor = jogada, chave
+        return melhor
+
+    def fechar(self):
+        self.mapa.close()
+
+def _casas(texto):
+    return sum(1 << (int(l) * N + int(c)) for l, c in (casa.split(",") for casa in texto))
+
+def main():
+    parser = argparse.ArgumentParser(description="Tablebase de finais do Seega.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    gerar_parser = subcomandos.add_parser("gerar", help="Gera a tablebase por análise retrógrada.")
+    gerar_parser.add_argument("--pecas", type=int, default=3, help="Máximo de peças de cada lado (K).")
+    gerar_parser.add_argument("--saida", default="finais.tb")
+    gerar_parser.add_argument("--processos", type=int, default=os.cpu_count())
+    gerar_parser.add_argument("--resumo", help="Arquivo JSON com tamanhos e tempos por grupo de classes.")
+    consultar_parser = subcomandos.add_parser("consultar", help="Consulta uma posição (jogador da vez = próprias).")
+    consultar_parser.add_argument("--arquivo", default="finais.tb")
+    consultar_parser.add_argument("--proprias", nargs="+", required=True, help="Casas como linha,coluna.")
+    consultar_parser.add_argument("--adversarias", nargs="+", required=True)
+    args = parser.parse_args()
+
+    if args.comando == "gerar":
+        resumo = gerar(args.saida, args.pecas, args.processos)
+        print(f"🏁 {resumo['posicoes']} posições ({resumo['bytes'] / 1024 / 1024:.1f} MB) geradas em "
+              f"{resumo['segundos']:.1f} s com {resumo['processos']} processos -> {args.saida}")
+        if args.resumo:
+            with open(args.resumo, "w") as arquivo:
+                json.dump(resumo, arquivo, indent=2)
+        return
+
+    tablebase = Tablebase(args.arquivo)
+    estado = EstadoSeega(_casas(args.proprias), _casas(args.adversarias), 1, "movimentacao", (12, 12))
+    consulta = tablebase.consultar(estado)
+    if consulta is None:
+        print("❌ Posição fora da tablebase.")
+        return
+    resultado, distancia = consulta
+    print({VITORIA: f"✅ Vitória em {distancia} lances.", PERDA: f"❌ Derrota em {distancia} lances.",
+           EMPATE: "🤝 Empate."}[resultado])
+    jogada = tablebase.melhor_jogada(estado)
+    if jogada is not None:
+        print(f"   Melhor jogada: {descrever_jogada(jogada)}")
+
+if __name__ == "__main__":
+    main()
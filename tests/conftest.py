@@ -0,0 +1,24 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import game_logic
+
+QUANTIDADE = 150
+
+@pytest.fixture(params=game_logic.TAMANHOS_TABULEIRO, ids=lambda tamanho: f"{tamanho}x{tamanho}")
+def estados(request):
+    """Estados aleatórios de um tamanho de tabuleiro, com o estado da peça central, no formato de `movimentos_legais`."""
+    rnd = random.Random(request.param)
+    estados = []
+    for densidade in (0.3, 0.7, 0.95):
+        for _ in range(QUANTIDADE):
+            tabuleiro = [[rnd.choice((1, 2)) if rnd.random() < densidade else 0 for _ in range(request.param)]
+                         for _ in range(request.param)]
+            estados.append({"tabuleiro": tabuleiro, "jogador_peca_central": rnd.choice((None, 1, 2)),
+                            "turnos_peca_central": rnd.randrange(5)})
+    return estados
@@ -0,0 +1,120 @@
+"""Controle de admissão, sozinho e nos servidores XML-RPC com threads e assíncrono."""
+
+import socket
+import threading
+import time
+import xmlrpc.client
+
+import pytest
+
+from admissao import ControleAdmissao, LimitadorTaxa
+from server import QuietRequestHandler
+from servidores import criar_servidor
+
+def test_limitador_recusa_acima_da_rajada():
+    limitador = LimitadorTaxa(taxa=10, rajada=3)
+    assert [limitador.espera("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    espera = limitador.espera("a")
+    assert 0 < espera <= 0.1
+    assert limitador.espera("b") == 0.0  # cada cliente tem o seu balde
+    time.sleep(espera + 0.02)
+    assert limitador.espera("a") == 0.0
+    assert limitador.recusas == 1
+
+def test_taxa_do_endereco_soma_os_clientes():
+    admissao = ControleAdmissao(4, 4, taxa=100, taxa_endereco=1)
+    assert admissao.limitar("10.0.0.1", "x") == 0.0
+    assert admissao.limitar("10.0.0.1", "y") == 0.0
+    assert admissao.limitar("10.0.0.1", "z") > 0
+    assert admissao.limitar("10.0.0.2", "z") == 0.0
+
+def test_fila_cheia_recusa_ate_sair():
+    admissao = ControleAdmissao(workers=2, fila_maxima=1)
+    assert [admissao.entrar() for _ in range(4)] == [True, True, True, False]
+    assert admissao.estatisticas()["recusas_fila"] == 1
+    assert admissao.nivel_carga() == 3 and admissao.espera_fila() == 1
+    admissao.sair()
+    assert admissao.entrar()
+    for _ in range(3):
+        admissao.sair()
+    assert admissao.em_andamento == 0 and admissao.nivel_carga() == 0
+
+class Instancia:
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.ocupado = threading.Event()
+
+    def ping(self, valor):
+        return valor
+
+    def bloquear(self):
+        self.ocupado.set()
+        self.liberar.wait(5)
+        return True
+
+def _porta_livre():
+    with socket.socket() as sonda:
+        sonda.bind(("127.0.0.1", 0))
+        return sonda.getsockname()[1]
+
+@pytest.fixture(params=("threads", "async"))
+def servidor(request):
+    """Fábrica de (instancia, url) de um servidor no modo do parâmetro com o controle de admissão dado."""
+    criados = []
+
+    def criar(admissao):
+        instancia = Instancia()
+        porta = _porta_livre()
+        servidor = criar_servidor(request.param, ("127.0.0.1", porta), QuietRequestHandler, workers=1,
+                                  admissao=admissao)
+        servidor.register_instance(instancia)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        criados.append((servidor, instancia))
+        url = f"http://127.0.0.1:{porta}"
+        prazo = time.monotonic() + 5
+        while True:
+            try:
+                with socket.create_connection(("127.0.0.1", porta)):
+                    break
+            except ConnectionRefusedError:
+                if time.monotonic() > prazo:
+                    raise
+                time.sleep(0.02)
+        return instancia, url
+
+    yield criar
+    for servidor, instancia in criados:
+        instancia.liberar.set()
+        servidor.shutdown()
+        servidor.server_close()
+
+def test_recusa_429_acima_da_taxa(servidor):
+    _, url = servidor(ControleAdmissao(1, 4, taxa=1, rajada=1))
+    proxy = xmlrpc.client.ServerProxy(url)
+    assert proxy.ping(1) == 1
+    with pytest.raises(xmlrpc.client.ProtocolError) as recusa:
+        proxy.ping(2)
+    assert recusa.value.errcode == 429
+    assert int(recusa.value.headers["Retry-After"]) >= 1
+
+def test_recusa_503_com_a_fila_cheia(servidor):
+    instancia, url = servidor(ControleAdmissao(1, 0))
+    ocupada = threading.Thread(target=lambda: xmlrpc.client.ServerProxy(url).bloquear())
+    ocupada.start()
+    assert instancia.ocupado.wait(5)
+    with pytest.raises(xmlrpc.client.ProtocolError) as recusa:
+        xmlrpc.client.ServerProxy(url).ping(1)
+    assert recusa.value.errcode == 503
+    assert int(recusa.value.headers["Retry-After"]) >= 1
+    instancia.liberar.set()
+    ocupada.join(5)
+    prazo = time.monotonic() + 5
+    while True:
+        try:
+            assert xmlrpc.client.ServerProxy(url).ping(1) == 1
+            break
+        except xmlrpc.client.ProtocolError:
+            # A resposta sai antes de a thread devolver a vaga da fila.
+            if time.monotonic() > prazo:
+                raise
+            time.sleep(0.01)
@@ -0,0 +1,46 @@
+"""O motor em bitboards (bitboard.py) dá os mesmos resultados de game_logic em tabuleiros aleatórios de cada tamanho."""
+
+import bitboard
+import game_logic
+
+CONSULTAS = ("verificar_vitoria", "existe_captura_possivel", "existe_captura_com_movimento", "jogador_esta_bloqueado",
+             "peca_central_bloqueada")
+
+def _normalizar(legais):
+    return dict(legais, remocoes=sorted(legais["remocoes"]),
+                movimentos={movimento: sorted(capturas) for movimento, capturas in legais["movimentos"].items()})
+
+def test_consultas(estados):
+    for estado in estados:
+        tabuleiro = estado["tabuleiro"]
+        n = len(tabuleiro)
+        for jogador in (1, 2):
+            for nome in CONSULTAS:
+                assert getattr(bitboard, nome)(tabuleiro, jogador) == getattr(game_logic, nome)(tabuleiro, jogador), nome
+            for linha in range(n):
+                for coluna in range(n):
+                    assert (bitboard.pode_continuar_jogada_apos_captura(tabuleiro, linha, coluna, jogador) ==
+                            game_logic.pode_continuar_jogada_apos_captura(tabuleiro, linha, coluna, jogador))
+        for linha in range(n):
+            for coluna in range(n):
+                assert (bitboard.peca_esta_bloqueada(tabuleiro, linha, coluna) ==
+                        game_logic.peca_esta_bloqueada(tabuleiro, linha, coluna))
+
+def test_movimentos_legais(estados):
+    for estado in estados:
+        for jogador in (1, 2):
+            assert (_normalizar(bitboard.movimentos_legais(estado, jogador)) ==
+                    _normalizar(game_logic.movimentos_legais(estado, jogador)))
+
+def test_capturas_apos_movimento(estados):
+    for estado in estados:
+        for jogador in (1, 2):
+            for movimento in game_logic.movimentos_legais(estado, jogador)["movimentos"]:
+                assert bitboard.eh_movimento_valido(estado["tabuleiro"], *movimento, jogador)
+                esperado = [linha[:] for linha in estado["tabuleiro"]]
+                obtido = [linha[:] for linha in estado["tabuleiro"]]
+                game_logic.realizar_movimento(esperado, *movimento)
+                game_logic.realizar_movimento(obtido, *movimento)
+                assert (bitboard.verificar_e_realizar_capturas(obtido, movimento[2], movimento[3], jogador) ==
+                        game_logic.verificar_e_realizar_capturas(esperado, movimento[2], movimento[3], jogador))
+                assert obtido == esperado
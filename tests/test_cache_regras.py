@@ -0,0 +1,40 @@
+"""As consultas com cache (cache_regras.py) dão os mesmos resultados de game_logic, com o cache frio e quente."""
+
+import pytest
+
+import cache_regras
+import game_logic
+
+CONSULTAS = ("existe_captura_possivel", "existe_captura_com_movimento", "jogador_esta_bloqueado")
+
+@pytest.fixture(autouse=True)
+def cache_vazio():
+    cache_regras.configurar(cache_regras.CAPACIDADE_PADRAO)
+
+def test_consultas(estados):
+    for _ in range(2):
+        for estado in estados:
+            tabuleiro = estado["tabuleiro"]
+            for jogador in (1, 2):
+                for nome in CONSULTAS:
+                    assert getattr(cache_regras, nome)(tabuleiro, jogador) == getattr(game_logic, nome)(tabuleiro, jogador), nome
+                for linha, valores in enumerate(tabuleiro):
+                    for coluna, valor in enumerate(valores):
+                        if valor == jogador:
+                            assert (cache_regras.pode_continuar_jogada_apos_captura(tabuleiro, linha, coluna, jogador) ==
+                                    game_logic.pode_continuar_jogada_apos_captura(tabuleiro, linha, coluna, jogador))
+    assert cache_regras.estatisticas()["taxa_acerto"] > 0
+
+def test_capturas_apos_movimento(estados):
+    for estado in estados:
+        for jogador in (1, 2):
+            for movimento in game_logic.movimentos_legais(estado, jogador)["movimentos"]:
+                esperado = [linha[:] for linha in estado["tabuleiro"]]
+                obtido = [linha[:] for linha in estado["tabuleiro"]]
+                game_logic.realizar_movimento(esperado, *movimento)
+                game_logic.realizar_movimento(obtido, *movimento)
+                assert (cache_regras.capturas_do_movimento(estado["tabuleiro"], *movimento, jogador) ==
+                        game_logic.capturas_do_movimento(estado["tabuleiro"], *movimento, jogador))
+                assert (cache_regras.verificar_e_realizar_capturas(obtido, movimento[2], movimento[3], jogador) ==
+                        game_logic.verificar_e_realizar_capturas(esperado, movimento[2], movimento[3], jogador))
+                assert obtido == esperado
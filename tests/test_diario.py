@@ -0,0 +1,111 @@
+"""Recuperação pelo diário: o último snapshot mais os registros gravados depois dele reconstroem as partidas."""
+
+import random
+
+import diario
+from partida import Partida
+from server import GameServer
+
+CAMPOS = ("tamanho", "tabuleiro", "jogador_atual", "fase", "pecas_colocadas", "pecas_turno_atual", "vencedor",
+          "chat", "chat_seq", "conexoes", "modo_remocao", "turnos_peca_central", "jogador_peca_central")
+
+def _jogar(jogo, match_id, acoes, rnd):
+    """Faz até `acoes` jogadas aleatórias na partida, com uma mensagem de chat de vez em quando.
+
+    Retorna quantas ações (jogadas e mensagens) foram gravadas no diário.
+    """
+    partida = jogo.partidas[match_id]
+    feitas = 0
+    for _ in range(acoes):
+        if partida.vencedor is not None:
+            break
+        jogador = partida.jogador_atual
+        legais = jogo.get_legal_moves(match_id, jogador)
+        if legais["colocacoes"]:
+            jogo.place_piece(match_id, jogador, *rnd.choice(legais["colocacoes"]))
+        elif legais["remocoes"]:
+            jogo.remove_piece_when_blocked(match_id, jogador, *rnd.choice(legais["remocoes"]))
+        elif legais["movimentos"]:
+            jogo.move_piece(match_id, jogador, *rnd.choice(legais["movimentos"])[:4])
+        else:
+            break
+        feitas += 1
+        if rnd.random() < 0.1:
+            jogo.send_chat_message(match_id, jogador, f"lance {feitas}")
+            feitas += 1
+    return feitas
+
+def _essencial(partida):
+    dados = partida.exportar()
+    return {campo: dados[campo] for campo in CAMPOS}
+
+def _derrubar(jogo):
+    """Simula a queda do processo: o diário é descarregado, mas sem o snapshot final do `_encerrar`."""
+    jogo._parar_snapshots.set()
+    jogo.diario.fechar()
+
+def test_snapshot_mais_diario(tmp_path):
+    rnd = random.Random(0)
+    jogo = GameServer(dados=str(tmp_path))
+    partidas = []
+    for tamanho in (5, 7, 9, 5):
+        match_id = jogo.create_match(tamanho)
+        jogo.join_match(match_id)
+        jogo.join_match(match_id)
+        partidas.append(match_id)
+        _jogar(jogo, match_id, 30, rnd)
+    jogo._gravar_snapshot()
+
+    depois_do_snapshot = sum(_jogar(jogo, match_id, 40, rnd) for match_id in partidas)
+    nova = jogo.create_match(7)
+    jogo.join_match(nova)
+    jogo.join_match(nova)
+    depois_do_snapshot += _jogar(jogo, nova, 20, rnd)
+    partidas.append(nova)
+    esperado = {match_id: _essencial(jogo.partidas[match_id]) for match_id in partidas}
+    _derrubar(jogo)
+
+    restauradas, _, maior_id, reaplicados = diario.restaurar(
+        str(tmp_path), criar_partida=lambda match_id, tamanho: Partida(match_id, tamanho=tamanho),
+        importar_partida=lambda match_id, dados: Partida.importar(dados))
+    assert maior_id == nova
+    # Só as ações posteriores ao snapshot são reaplicadas, mais as duas entradas de jogador na partida nova.
+    assert reaplicados == depois_do_snapshot + 2
+    assert {match_id: _essencial(partida) for match_id, partida in restauradas.items()} == esperado
+
+    reiniciado = GameServer(dados=str(tmp_path))
+    try:
+        assert {match_id: _essencial(reiniciado.partidas[match_id]) for match_id in partidas} == esperado
+        assert reiniciado.create_match() == nova + 1
+    finally:
+        reiniciado._encerrar()
+
+def test_partidas_removidas_nao_voltam(tmp_path):
+    jogo = GameServer(dados=str(tmp_path))
+    fica = jogo.create_match()
+    sai = jogo.create_match()
+    jogo._gravar_snapshot()
+    jogo._exportar_partida(sai)
+    _derrubar(jogo)
+
+    restauradas, _, _, _ = diario.restaurar(
+        str(tmp_path), criar_partida=lambda match_id, tamanho: Partida(match_id, tamanho=tamanho),
+        importar_partida=lambda match_id, dados: Partida.importar(dados))
+    assert sorted(restauradas) == [fica]
+
+def test_reproduzir_sem_snapshot(tmp_path):
+    rnd = random.Random(1)
+    jogo = GameServer(dados=str(tmp_path))
+    match_id = jogo.create_match(9)
+    jogo.join_match(match_id)
+    jogo.join_match(match_id)
+    _jogar(jogo, match_id, 25, rnd)
+    jogo._gravar_snapshot()
+    _jogar(jogo, match_id, 25, rnd)
+    esperado = _essencial(jogo.partidas[match_id])
+    _derrubar(jogo)
+
+    # O reprodutor ignora o snapshot e refaz a partida desde o registro de criação, em todos os segmentos.
+    partida, acoes = diario.reproduzir(str(tmp_path), match_id)
+    assert acoes > 0
+    assert _essencial(partida) == esperado
@@ -0,0 +1,124 @@
+"""Roteamento do gateway com processos reais: as partidas continuam acessíveis, com o mesmo estado, depois de
+mudarem de processo com add_shard e remove_shard."""
+
+import socket
+import threading
+import xmlrpc.client
+
+import pytest
+
+from gateway import DespachoGateway, Gateway
+
+PARTIDAS = 24
+
+def _porta_base(quantidade):
+    """Primeira de `quantidade` portas livres seguidas, a partir de uma porta escolhida pelo sistema."""
+    for _ in range(20):
+        with socket.socket() as sonda:
+            sonda.bind(("127.0.0.1", 0))
+            base = sonda.getsockname()[1]
+        if base + quantidade > 65535:
+            continue
+        try:
+            for porta in range(base, base + quantidade):
+                with socket.socket() as teste:
+                    teste.bind(("127.0.0.1", porta))
+            return base
+        except OSError:
+            continue
+    pytest.skip("Sem portas livres seguidas para os processos do gateway.")
+
+@pytest.fixture(scope="module")
+def gateway():
+    gateway = Gateway(porta_base=_porta_base(6), workers=4)  # três processos, duas portas cada
+    gateway.iniciar(2)
+    yield gateway
+    gateway.encerrar()
+
+def _colocar(gateway, match_id, vezes):
+    for _ in range(vezes):
+        estado = gateway.chamar(match_id, "get_state", match_id, 1)
+        if estado["fase"] != "colocacao":
+            return
+        jogador = estado["jogador_atual"]
+        legais = gateway.chamar(match_id, "get_legal_moves", match_id, jogador)
+        gateway.chamar(match_id, "place_piece", match_id, jogador, *legais["colocacoes"][0])
+
+def _tabuleiros(gateway, partidas):
+    return {match_id: gateway.chamar(match_id, "get_state", match_id, 1)["tabuleiro"] for match_id in partidas}
+
+def test_migracao_mantem_partidas(gateway):
+    partidas = []
+    for _ in range(PARTIDAS):
+        match_id, _ = gateway.register_player()
+        gateway.register_player()
+        partidas.append(match_id)
+        _colocar(gateway, match_id, 3)
+    antes = _tabuleiros(gateway, partidas)
+
+    novo = gateway.anel.copiar()
+    novo.adicionar("w2")
+    movidas = sorted(match_id for match_id in partidas if novo.dono(match_id) == "w2")
+    assert movidas, "nenhuma partida mudaria de processo"
+
+    # Um jogador esperando numa partida que vai mudar de processo e outro consultando todas durante a troca.
+    versao = gateway.chamar(movidas[0], "get_state", movidas[0], 1)["versao"]
+    esperas, erros, parar = [], [], threading.Event()
+
+    def esperar():
+        esperas.append(gateway.chamar(movidas[0], "wait_state", movidas[0], 1, versao, 10))
+
+    def consultar():
+        while not parar.is_set():
+            try:
+                _tabuleiros(gateway, partidas)
+            except Exception as erro:
+                erros.append(erro)
+
+    threads = [threading.Thread(target=esperar), threading.Thread(target=consultar)]
+    for thread in threads:
+        thread.start()
+    nome = gateway.add_shard()
+    parar.set()
+    for thread in threads:
+        thread.join(15)
+
+    assert nome == "w2"
+    assert not erros
+    assert esperas and esperas[0]["versao"] > versao
+    assert gateway._chamar_no("w2", "shard.list_ids") == movidas
+    for origem in ("w0", "w1"):
+        assert not set(gateway._chamar_no(origem, "shard.list_ids")) & set(movidas)
+    assert _tabuleiros(gateway, partidas) == antes
+
+    # As partidas movidas seguem jogáveis no dono novo e voltam com remove_shard.
+    for match_id in movidas:
+        _colocar(gateway, match_id, 2)
+    depois = _tabuleiros(gateway, partidas)
+    assert depois != antes
+    assert gateway.remove_shard("w2") == len(movidas)
+    assert sorted(gateway._chamar_no("w0", "shard.list_ids") + gateway._chamar_no("w1", "shard.list_ids")) == sorted(partidas)
+    assert _tabuleiros(gateway, partidas) == depois
+
+def test_chamadas_internas_fora_do_alcance_dos_clientes(gateway):
+    match_id, _ = gateway.register_player()
+    despacho = DespachoGateway(gateway)
+
+    def despachar(metodo, *params):
+        return xmlrpc.client.loads(despacho._marshaled_dispatch(xmlrpc.client.dumps(params, metodo).encode()))[0][0]
+
+    with pytest.raises(xmlrpc.client.Fault, match="shard.export_match"):
+        despachar("shard.export_match", match_id)
+    with pytest.raises(xmlrpc.client.Fault, match="shard.create_match"):
+        despachar("shard.create_match", match_id + 1, 5)
+    resultados = despachar("system.multicall", [{"methodName": "get_state", "params": [match_id, 1]},
+                                                {"methodName": "shard.export_match", "params": [match_id]}])
+    assert resultados[0][0]["versao"] >= 0
+    assert "não disponível" in resultados[1]["faultString"]
+
+    # A porta pública do processo também não tem as chamadas internas; só o endpoint de administração.
+    dono = gateway.anel.dono(match_id)
+    with pytest.raises(xmlrpc.client.Fault):
+        xmlrpc.client.ServerProxy("http://%s:%d" % gateway.enderecos[dono]).shard.list_ids()
+    assert match_id in gateway._chamar_no(dono, "shard.list_ids")
+    assert gateway.register_player()[0] == match_id
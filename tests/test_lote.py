@@ -0,0 +1,48 @@
+"""A avaliação em lote (lote.py) coincide com as funções de game_logic aplicadas a cada tabuleiro."""
+
+import random
+
+import numpy as np
+
+import game_logic
+import lote
+
+def test_consultas(estados):
+    tabuleiros = np.array([estado["tabuleiro"] for estado in estados], dtype=np.int8)
+    for jogador in (1, 2):
+        assert lote.vitorias(tabuleiros, jogador).tolist() == [
+            game_logic.verificar_vitoria(estado["tabuleiro"], jogador) for estado in estados]
+        assert lote.bloqueados(tabuleiros, jogador).tolist() == [
+            game_logic.jogador_esta_bloqueado(estado["tabuleiro"], jogador) for estado in estados]
+        assert lote.existe_captura(tabuleiros, jogador).tolist() == [
+            game_logic.existe_captura_com_movimento(estado["tabuleiro"], jogador) for estado in estados]
+
+def test_mascaras_movimentos(estados):
+    tabuleiros = np.array([estado["tabuleiro"] for estado in estados], dtype=np.int8)
+    centro = np.array([estado["jogador_peca_central"] or 0 for estado in estados])
+    turnos = np.array([estado["turnos_peca_central"] for estado in estados])
+    n = tabuleiros.shape[1]
+    for jogador in (1, 2):
+        mascaras = lote.mascaras_movimentos(tabuleiros, jogador, centro, turnos)
+        for mascara, estado in zip(mascaras, estados):
+            origens, direcoes = np.nonzero(mascara.reshape(-1, 4))
+            obtidos = {(o // n, o % n, o // n + lote.DIRECOES[d][0], o % n + lote.DIRECOES[d][1])
+                       for o, d in zip(origens.tolist(), direcoes.tolist())}
+            assert obtidos == set(game_logic.movimentos_legais(estado, jogador)["movimentos"])
+
+def test_realizar_movimentos_com_captura(estados):
+    tabuleiros = np.array([estado["tabuleiro"] for estado in estados], dtype=np.int8)
+    rnd = random.Random(1)
+    for jogador in (1, 2):
+        indices, movimentos = [], []
+        for indice, estado in enumerate(estados):
+            legais = list(game_logic.movimentos_legais({"tabuleiro": estado["tabuleiro"]}, jogador)["movimentos"])
+            if legais:
+                indices.append(indice)
+                movimentos.append(rnd.choice(legais))
+        novos, _, capturou = lote.realizar_movimentos_com_captura(tabuleiros[indices], jogador, movimentos)
+        for novo, houve_captura, indice, movimento in zip(novos.tolist(), capturou.tolist(), indices, movimentos):
+            esperado = [linha[:] for linha in estados[indice]["tabuleiro"]]
+            game_logic.realizar_movimento(esperado, *movimento)
+            assert houve_captura == game_logic.verificar_e_realizar_capturas(esperado, movimento[2], movimento[3], jogador)
+            assert novo == esperado
@@ -0,0 +1,127 @@
+"""Uma partida isolada, sem servidor: chat, colocação em lote e o estado publicado."""
+
+import xmlrpc.client
+
+import protocolo_binario
+import servidores
+from partida import CAPACIDADE_CHAT, LIMITE_CHAT_POR_CONSULTA, TAMANHO_MAXIMO_MENSAGEM, Partida
+
+def _partida(tamanho=5):
+    partida = Partida(1, tamanho)
+    partida.register_player()
+    partida.register_player()
+    return partida
+
+def test_chat_entrega_a_partir_do_cursor():
+    partida = _partida()
+    inicio = partida.get_chat(1, 0, 0)["ultimo_seq"]
+    for i in range(10):
+        assert partida.send_chat_message(1 + i % 2, f"mensagem {i}")
+    resposta = partida.get_chat(2, inicio + 3, 4)
+    assert [seq for seq, _ in resposta["mensagens"]] == [inicio + 4, inicio + 5, inicio + 6, inicio + 7]
+    assert resposta["mensagens"][0][1] == "[Jogador 2] mensagem 3"
+    assert resposta["ultimo_seq"] == inicio + 10
+    assert partida.get_chat(2, inicio + 10, 10)["mensagens"] == []
+    assert len(partida.get_chat(2, -1, 10 ** 6)["mensagens"]) <= LIMITE_CHAT_POR_CONSULTA
+
+def test_chat_descarta_as_mais_antigas():
+    partida = _partida()
+    for i in range(CAPACIDADE_CHAT + 50):
+        partida.send_chat_message(1, str(i))
+    resposta = partida.get_chat(1, 0, LIMITE_CHAT_POR_CONSULTA)
+    ultimo_seq = resposta["ultimo_seq"]
+    assert resposta["primeiro_seq"] == ultimo_seq - CAPACIDADE_CHAT + 1
+    # Um cursor anterior ao buffer recomeça da mais antiga ainda guardada.
+    assert resposta["mensagens"][0][0] == resposta["primeiro_seq"]
+    assert partida.publico.dados["chat_seq"] == ultimo_seq
+
+def test_chat_recusa_mensagem_vazia_ou_longa():
+    partida = _partida()
+    ultimo_seq = partida.get_chat(1, 0, 0)["ultimo_seq"]
+    assert partida.send_chat_message(1, "x" * TAMANHO_MAXIMO_MENSAGEM)
+    assert not partida.send_chat_message(1, "x" * (TAMANHO_MAXIMO_MENSAGEM + 1))
+    assert "caracteres" in partida.get_state(1).dados["error"]
+    assert not partida.send_chat_message(1, "")
+    assert not partida.send_chat_message(1, 42)
+    assert partida.get_chat(1, 0, 0)["ultimo_seq"] == ultimo_seq + 1
+
+def test_place_pieces_coloca_as_duas_pecas_do_turno():
+    partida = _partida()
+    assert partida.place_pieces(1, [[0, 0], [0, 1]])
+    dados = partida.publico.dados
+    assert dados["tabuleiro"][0][:2] == [1, 1]
+    assert dados["jogador_atual"] == 2 and dados["pecas_no_turno"] == 0
+    # Com uma peça já colocada no turno, só cabe mais uma.
+    assert partida.place_piece(2, 1, 0)
+    assert partida.publico.dados["pecas_no_turno"] == 1
+    assert not partida.place_pieces(2, [[1, 1], [1, 3]])
+    assert partida.place_pieces(2, [[1, 1]])
+    assert partida.publico.dados["jogador_atual"] == 1
+
+def test_place_pieces_invalido_nao_altera_o_tabuleiro():
+    partida = _partida()
+    antes = partida.publico
+    lotes = (
+        [[0, 0], [2, 2]],          # a casa central
+        [[0, 0], [0, 0]],          # a mesma casa duas vezes
+        [[0, 0], [5, 0]],          # fora do tabuleiro
+        [],
+        [[0, 0], [0, 1], [0, 2]],  # mais peças que o turno
+    )
+    for casas in lotes:
+        assert not partida.place_pieces(1, casas)
+        assert partida.get_state(1).dados["error"]
+    assert not partida.place_pieces(2, [[0, 0]])  # fora do turno
+    assert partida.exportar()["tabuleiro"] == antes.dados["tabuleiro"]
+    assert partida.publico.dados["tabuleiro"] == antes.dados["tabuleiro"]
+    assert partida.publico.dados["pecas_no_turno"] == 0
+
+def test_estado_publico_codificado_uma_vez_por_formato():
+    partida = _partida()
+    publico = partida.publico
+    chamadas = []
+
+    def codificar(dados):
+        chamadas.append(dados)
+        return bytes(protocolo_binario.codificar(dados))
+
+    binario = publico.codificado("binario", codificar)
+    assert publico.codificado("binario", codificar) is binario
+    assert len(chamadas) == 1
+    assert protocolo_binario.decodificar(binario) == publico.dados
+    # O XML das respostas sai do mesmo cache e decodifica no estado publicado.
+    xml = servidores.dumps_resposta((publico,))
+    assert servidores.dumps_resposta((publico,)) == xml
+    assert xmlrpc.client.loads(xml)[0][0] == publico.dados
+    assert set(publico.codificacoes) == {"binario", "xml"}
+    # Cada versão publicada tem os seus bytes.
+    partida.place_piece(1, 0, 0)
+    assert partida.publico is not publico and partida.publico.codificacoes == {}
+
+def test_espectadores_recebem_o_mesmo_estado():
+    partida = _partida()
+    primeiro = partida.watch_match(-1, 0)
+    assert primeiro is partida.publico and partida.watch_match(-1, 0) is primeiro
+    assert "seu_turno" not in primeiro.dados
+    assert partida.watch_match(primeiro.versao, 0).dados == {"alterado": False, "versao": primeiro.versao}
+
+def test_estado_do_jogador_derivado_do_publicado():
+    partida = _partida()
+    publico = partida.publico
+    jogador1 = publico.do_jogador(1)
+    assert publico.do_jogador(1) is jogador1 and publico.do_jogador(2) is not jogador1
+    assert jogador1.dados["seu_turno"] is True and publico.do_jogador(2).dados["seu_turno"] is False
+    assert publico.do_jogador(1, nivel_carga=3) is not jogador1
+    # Com mensagem de erro, a resposta é nova e não fica guardada.
+    com_erro = publico.do_jogador(1, "Posição inválida.")
+    assert com_erro.dados["error"] == "Posição inválida." and publico.do_jogador(1).dados["error"] is None
+    assert "seu_turno" not in publico.dados
+
+def test_estado_publicado_nao_muda_depois_de_uma_jogada():
+    partida = _partida()
+    antes = partida.get_state(1)
+    tabuleiro = [linha[:] for linha in antes.dados["tabuleiro"]]
+    assert partida.place_piece(1, 0, 0)
+    depois = partida.get_state(1)
+    assert antes.dados["tabuleiro"] == tabuleiro
+    assert depois.versao > antes.versao and depois.dados["tabuleiro"][0][0] == 1
@@ -0,0 +1,87 @@
+"""Servidor e cliente do protocolo binário, com um objeto simples no lugar do GameServer."""
+
+import socket
+import threading
+import time
+import xmlrpc.client
+
+import pytest
+
+from admissao import ControleAdmissao
+from protocolo_binario import OK, ClienteBinario, ServidorBinario, montar_quadro
+
+class Instancia:
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.ocupado = threading.Event()
+
+    def ping(self, valor):
+        return valor
+
+    def bloquear(self):
+        self.ocupado.set()
+        self.liberar.wait(5)
+        return True
+
+@pytest.fixture
+def servidor(request):
+    instancia = Instancia()
+    servidor = ServidorBinario(("127.0.0.1", 0), instancia, workers=1, admissao=getattr(request, "param", None))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    cliente = ClienteBinario(servidor.server_address)
+    yield servidor, instancia, cliente
+    instancia.liberar.set()
+    cliente.close()
+    servidor.shutdown()
+    servidor.server_close()
+
+def test_chamada_e_erro(servidor):
+    _, _, cliente = servidor
+    assert cliente.ping({"tabuleiro": [[0, 1], [2, 0]], "versao": 3}) == {"tabuleiro": [[0, 1], [2, 0]], "versao": 3}
+    with pytest.raises(xmlrpc.client.Fault, match="not supported"):
+        cliente.inexistente()
+
+@pytest.mark.parametrize("servidor", [ControleAdmissao(4, 4, taxa=1, rajada=1)], indirect=True)
+def test_recusa_acima_da_taxa(servidor):
+    _, _, cliente = servidor
+    assert cliente.ping(1) == 1
+    with pytest.raises(xmlrpc.client.ProtocolError) as recusa:
+        cliente.ping(2)
+    assert recusa.value.errcode == 429
+    assert int(recusa.value.headers["Retry-After"]) >= 1
+
+@pytest.mark.parametrize("servidor", [ControleAdmissao(1, 0)], indirect=True)
+def test_recusa_com_a_fila_cheia(servidor):
+    servidor_binario, instancia, cliente = servidor
+    ocupada = cliente.chamar_assincrono("bloquear")
+    assert instancia.ocupado.wait(5)
+    with pytest.raises(xmlrpc.client.ProtocolError) as recusa:
+        cliente.ping(1)
+    assert recusa.value.errcode == 503
+    instancia.liberar.set()
+    assert ocupada.result(5) is True
+    # A resposta sai antes de a thread devolver a vaga da fila.
+    prazo = time.monotonic() + 5
+    while servidor_binario.admissao.em_andamento and time.monotonic() < prazo:
+        time.sleep(0.01)
+    assert cliente.ping(1) == 1
+
+def test_quadro_invalido_falha_todas_as_pendentes():
+    enviadas = threading.Event()
+    with socket.create_server(("127.0.0.1", 0)) as escuta:
+        def responder():
+            conexao, _ = escuta.accept()
+            with conexao:
+                enviadas.wait(5)
+                conexao.sendall(montar_quadro(1, OK, b""))  # corpo vazio: não decodifica
+                conexao.recv(1)  # espera o cliente fechar
+        threading.Thread(target=responder, daemon=True).start()
+        cliente = ClienteBinario(escuta.getsockname())
+        pendentes = [cliente.chamar_assincrono("ping", 1), cliente.chamar_assincrono("ping", 2)]
+        enviadas.set()
+        for futuro in pendentes:
+            with pytest.raises(ConnectionError):
+                futuro.result(5)
+        with pytest.raises(ConnectionError):
+            cliente.ping(3)
+        cliente.close()
@@ -0,0 +1,107 @@
+"""GameServer servido por XML-RPC nos modos 'threads' e 'async', como em `server.py`."""
+
+import socket
+import threading
+import time
+import xmlrpc.client
+
+import pytest
+
+from server import CHAMADAS_LONGAS, GameServer, QuietRequestHandler
+from servidores import criar_servidor
+
+def _porta_livre():
+    with socket.socket() as sonda:
+        sonda.bind(("127.0.0.1", 0))
+        return sonda.getsockname()[1]
+
+@pytest.fixture(params=("threads", "async"))
+def servidor(request):
+    """(jogo, proxy) de um servidor no modo do parâmetro, já atendendo."""
+    jogo = GameServer()
+    porta = _porta_livre()
+    servidor = criar_servidor(request.param, ("127.0.0.1", porta), QuietRequestHandler, workers=4)
+    servidor.register_multicall_functions()
+    servidor.register_instance(jogo)
+    if hasattr(servidor, "register_long_poll"):
+        servidor.register_long_poll(CHAMADAS_LONGAS, jogo._preparar_espera)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    proxy = xmlrpc.client.ServerProxy(f"http://127.0.0.1:{porta}", allow_none=True)
+    for _ in range(50):
+        try:
+            proxy.list_matches()
+            break
+        except ConnectionRefusedError:
+            threading.Event().wait(0.05)
+    yield jogo, proxy
+    proxy("close")()
+    servidor.shutdown()
+    servidor.server_close()
+
+@pytest.mark.parametrize("match_id", [[1], {"id": 1}, "1", None])
+def test_id_de_partida_invalido_vira_falha(servidor, match_id):
+    _, proxy = servidor
+    match_id_valido, _ = proxy.register_player()
+    for metodo, params in (("wait_state", (match_id, 1, -1, 1)), ("watch_match", (match_id, -1, 1))):
+        with pytest.raises(xmlrpc.client.Fault, match="não encontrada"):
+            getattr(proxy, metodo)(*params)
+    # A conexão continua atendendo depois da falha.
+    assert proxy.get_state(match_id_valido, 1)["versao"] >= 1
+
+def test_jogadores_formam_partidas_independentes():
+    jogo = GameServer()
+    assert [jogo.register_player() for _ in range(5)] == [[1, 1], [1, 2], [2, 1], [2, 2], [3, 1]]
+    assert jogo.place_piece(1, 1, 0, 0)
+    assert jogo.get_state(1, 1).dados["tabuleiro"][0][0] == 1
+    assert jogo.get_state(2, 1).dados["tabuleiro"][0][0] == 0
+    assert [resumo["match_id"] for resumo in jogo.list_matches()] == [1, 2, 3]
+    assert [resumo["match_id"] for resumo in jogo.list_matches(apenas_abertas=True)] == [3]
+
+def test_create_e_join_match():
+    jogo = GameServer()
+    match_id = jogo.create_match(7)
+    assert jogo.list_matches() == [{"match_id": match_id, "tamanho": 7, "jogadores": 0, "fase": "colocacao",
+                                    "vencedor": None}]
+    assert [jogo.join_match(match_id) for _ in range(3)] == [1, 2, 0]
+    assert jogo.list_matches(apenas_abertas=True) == []
+    # Um jogador procurando partida 5x5 não entra na 7x7.
+    assert jogo.register_player(5) == [match_id + 1, 1]
+    with pytest.raises(ValueError):
+        jogo.join_match(99)
+    with pytest.raises(ValueError):
+        jogo.create_match(6)
+
+def test_partidas_encerradas_sao_coletadas():
+    jogo = GameServer(tempo_retencao=0, intervalo_coleta=0)
+    jogo.register_player()
+    jogo.register_player()
+    jogo.surrender(1, 1)
+    assert jogo.get_state(1, 2).dados["vencedor"] == 2
+    jogo.create_match()
+    assert 1 not in jogo.partidas
+    with pytest.raises(ValueError, match="não encontrada"):
+        jogo.get_state(1, 2)
+
+def test_wait_state_sem_mudanca_responde_so_a_versao():
+    jogo = GameServer()
+    match_id, player_id = jogo.register_player()
+    versao = jogo.get_state(match_id, player_id).dados["versao"]
+    inicio = time.monotonic()
+    resposta = jogo.wait_state(match_id, player_id, versao, 0.2).dados
+    assert time.monotonic() - inicio >= 0.15
+    assert resposta["alterado"] is False and resposta["versao"] == versao
+    assert set(resposta) == {"alterado", "versao", "proximo_poll_ms"}
+    # Uma versão antiga recebe o estado completo na hora.
+    assert jogo.wait_state(match_id, player_id, versao - 1, 5).dados["tabuleiro"]
+
+def test_wait_state_acorda_com_a_mudanca(servidor):
+    jogo, proxy = servidor
+    match_id, _ = proxy.register_player()
+    proxy.register_player()
+    versao = proxy.get_state(match_id, 1)["versao"]
+    threading.Timer(0.2, jogo.place_piece, (match_id, 1, 0, 0)).start()
+    inicio = time.monotonic()
+    resposta = proxy.wait_state(match_id, 2, versao, 10)
+    assert time.monotonic() - inicio < 5
+    assert resposta["alterado"] is True and resposta["versao"] > versao
+    assert resposta["tabuleiro"][0][0] == 1 and resposta["seu_turno"] is False
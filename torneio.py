@@ -0,0 +1,156 @@
+"""Torneio de autojogo sem interface e sem servidor: joga muitas partidas completas entre políticas.
+
+Uso:
+    python torneio.py --partidas 10000 --politicas aleatoria gulosa --saida resultados.bin
+    python torneio.py --partidas 200 --politicas busca:p2 gulosa
+    python torneio.py --partidas 2000 --escalonamento
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import struct
+import time
+
+from ia import BuscaAlfaBeta
+from simulacao import EstadoSeega, MOVER
+
+MAGICO = b"SEEGA-TORNEIO-1\n"
+# indice, vencedor (0 = empate), politica do jogador 1 invertida, jogadas, peças restantes de cada jogador, duração (ms)
+REGISTRO = struct.Struct("<IBBHBBf")
+
+def politica_aleatoria(rnd, parametro=None):
+    return lambda estado, jogadas: rnd.choice(jogadas)
+
+def politica_gulosa(rnd, parametro=None):
+    """Escolhe a jogada que captura mais peças; empates e colocações são sorteados."""
+    def escolher(estado, jogadas):
+        melhor = max((bin(j[3]).count("1") if j[0] == MOVER else 0) for j in jogadas)
+        return rnd.choice([j for j in jogadas if (bin(j[3]).count("1") if j[0] == MOVER else 0) == melhor])
+    return escolher
+
+def politica_busca(rnd, parametro=None):
+    """Busca alfa-beta de `ia.py`. O parâmetro é o tempo por jogada em segundos (padrão 0.05) ou
+    "p<N>" para profundidade fixa sem limite de tempo, que torna as partidas reprodutíveis pela semente.
+    """
+    if parametro and parametro.startswith("p"):
+        busca = BuscaAlfaBeta(tempo_por_jogada=float("inf"), profundidade_maxima=int(parametro[1:]), entradas_tabela=1 << 16)
+    else:
+        busca = BuscaAlfaBeta(tempo_por_jogada=float(parametro or 0.05), entradas_tabela=1 << 16)
+    return lambda estado, jogadas: busca.escolher(estado)
+
+POLITICAS = {
+    "aleatoria": politica_aleatoria,
+    "gulosa": politica_gulosa,
+    "busca": politica_busca,
+}
+
+def criar_politica(especificacao, rnd):
+    """Cria uma política a partir de "nome" ou "nome:parametro" (ex.: "busca:0.1")."""
+    nome, _, parametro = especificacao.partition(":")
+    if nome not in POLITICAS:
+        raise ValueError(f"Política desconhecida: {nome}")
+    return POLITICAS[nome](rnd, parametro or None)
+
+def jogar_partida(politica1, politica2, rnd, max_jogadas=500):
+    """Joga uma partida completa. Retorna (vencedor ou 0 para empate, número de jogadas, estado final)."""
+    estado = EstadoSeega()
+    politicas = {1: politica1, 2: politica2}
+    jogadas_feitas = 0
+    while estado.vencedor is None and jogadas_feitas < max_jogadas:
+        jogadas = estado.jogadas()
+        if not jogadas:
+            break
+        estado = estado.aplicar(politicas[estado.jogador](estado, jogadas))
+        jogadas_feitas += 1
+    return estado.vencedor or 0, jogadas_feitas, estado
+
+def _semente(semente_base, indice):
+    return semente_base * 1_000_003 + indice
+
+def _tarefa(argumentos):
+    """Executada nos processos do pool: joga a partida `indice` de forma determinística."""
+    indice, semente_base, especificacao_a, especificacao_b, max_jogadas = argumentos
+    rnd = random.Random(_semente(semente_base, indice))
+    invertida = indice % 2 == 1
+    if invertida:
+        especificacao_a, especificacao_b = especificacao_b, especificacao_a
+    inicio = time.perf_counter()
+    vencedor, jogadas, estado = jogar_partida(criar_politica(especificacao_a, rnd), criar_politica(especificacao_b, rnd),
+                                              rnd, max_jogadas)
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+    return REGISTRO.pack(indice, vencedor, invertida, jogadas,
+                         bin(estado.b1).count("1"), bin(estado.b2).count("1"), duracao_ms)
+
+def executar(partidas, politicas, processos=None, semente=0, max_jogadas=500, saida=None):
+    """Distribui as partidas em um pool de processos e grava os resultados à medida que terminam.
+
+    Retorna um resumo com o placar [vitórias da 1ª política, vitórias da 2ª, empates], partidas por segundo e o número de processos.
+    """
+    processos = processos or os.cpu_count()
+    tarefas = [(i, semente, politicas[0], politicas[1], max_jogadas) for i in range(partidas)]
+    placar = [0, 0, 0]
+    arquivo = open(saida, "wb") if saida else None
+    if arquivo:
+        arquivo.write(MAGICO)
+        cabecalho = {"politicas": politicas, "semente": semente, "max_jogadas": max_jogadas}
+        arquivo.write(json.dumps(cabecalho).encode() + b"\n")
+
+    inicio = time.perf_counter()
+    try:
+        with multiprocessing.Pool(processos) as pool:
+            for registro in pool.imap_unordered(_tarefa, tarefas, chunksize=max(1, partidas // (processos * 16))):
+                if arquivo:
+                    arquivo.write(registro)
+                _, vencedor, invertida, *_ = REGISTRO.unpack(registro)
+                placar[2 if vencedor == 0 else (vencedor - 1) ^ invertida] += 1
+    finally:
+        if arquivo:
+            arquivo.close()
+    duracao = time.perf_counter() - inicio
+    return {"placar": placar, "partidas": partidas, "processos": processos,
+            "segundos": duracao, "partidas_por_segundo": partidas / duracao}
+
+def ler_resultados(caminho):
+    """Lê um arquivo de resultados. Retorna (cabeçalho, lista de registros como dicionários)."""
+    with open(caminho, "rb") as arquivo:
+        if arquivo.readline() != MAGICO:
+            raise ValueError(f"{caminho} não é um arquivo de resultados de torneio.")
+        cabecalho = json.loads(arquivo.readline())
+        dados = arquivo.read()
+    campos = ("indice", "vencedor", "invertida", "jogadas", "pecas1", "pecas2", "duracao_ms")
+    return cabecalho, [dict(zip(campos, valores)) for valores in REGISTRO.iter_unpack(dados)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Torneio de autojogo de Seega em vários núcleos.")
+    parser.add_argument("--partidas", type=int, default=1000)
+    parser.add_argument("--politicas", nargs=2, default=["aleatoria", "gulosa"],
+                        help=f"Duas políticas entre {', '.join(POLITICAS)} (ex.: busca:0.05).")
+    parser.add_argument("--processos", type=int, default=os.cpu_count())
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--max-jogadas", type=int, default=500, help="Jogadas até a partida ser declarada empate.")
+    parser.add_argument("--saida", help="Arquivo binário onde os resultados são gravados conforme as partidas terminam.")
+    parser.add_argument("--escalonamento", action="store_true",
+                        help="Mede partidas por segundo com 1, 2, 4, ... processos até --processos.")
+    args = parser.parse_args()
+
+    if args.escalonamento:
+        contagens = sorted({2 ** i for i in range(args.processos.bit_length()) if 2 ** i <= args.processos} | {args.processos})
+        base = None
+        print(f"{'processos':>9} {'partidas/s':>11} {'aceleração':>11}")
+        for processos in contagens:
+            resumo = executar(args.partidas, args.politicas, processos, args.semente, args.max_jogadas)
+            base = base or resumo["partidas_por_segundo"]
+            print(f"{processos:9d} {resumo['partidas_por_segundo']:11.1f} {resumo['partidas_por_segundo'] / base:10.2f}x")
+        return
+
+    resumo = executar(args.partidas, args.politicas, args.processos, args.semente, args.max_jogadas, args.saida)
+    print(f"🏁 {resumo['partidas']} partidas em {resumo['segundos']:.2f} s "
+          f"({resumo['partidas_por_segundo']:.1f} partidas/s, {resumo['processos']} processos)")
+    vitorias_a, vitorias_b, empates = resumo["placar"]
+    print(f"   A ({args.politicas[0]}): {vitorias_a} | B ({args.politicas[1]}): {vitorias_b} | empates: {empates}")
+
+if __name__ == "__main__":
+    main()